@@ -0,0 +1,40 @@
+"""Замер производительности бэктеста на годе часовых свечей.
+
+Запуск из корня проекта: python -m benchmarks.bench_backtest [число_свечей]
+"""
+import sys
+import time
+
+import numpy as np
+
+from services.backtest import backtest
+
+def synthetic_candles(candles, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(scale=0.01, size=candles)))
+    opens = np.r_[closes[0], closes[:-1]]
+    highs = np.maximum(opens, closes) * (1 + rng.random(candles) * 0.005)
+    lows = np.minimum(opens, closes) * (1 - rng.random(candles) * 0.005)
+    timestamps = 1_600_000_000_000 + np.arange(candles) * 3_600_000
+    return np.column_stack([timestamps, opens, highs, lows, closes, rng.random(candles) * 1000])
+
+def main(candles=365 * 24, repeats=5):
+    data = synthetic_candles(candles)
+    variants = {
+        'RSI(14) 30/70': {},
+        'RSI(14) + MA-200': {'ma_period': 200},
+        'RSI(7) 20/80': {'rsi_period': 7, 'rsi_lower': 20, 'rsi_upper': 80},
+    }
+    print(f"Свечей: {candles}")
+    for name, params in variants.items():
+        result = backtest(data, params)  # Прогрев
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            backtest(data, params)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<18} {best * 1000:8.2f} мс  сделок: {result['trades']:4d}  "
+              f"доходность: {result['total_return']:+.2%}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 365 * 24)
@@ -0,0 +1,67 @@
+"""Замер пакетного расчёта RSI и полос Боллинджера для матрицы (символы × свечи).
+
+Рабочие буферы индикаторов свои у каждого потока, поэтому первый вызов
+замеряется в новом потоке, где их ещё нет.
+
+Запуск из корня проекта: python -m benchmarks.bench_batch_indicators [символов] [свечей]
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+
+from services import indicators
+
+def best_time(func, repeats=7):
+    func()  # Прогрев
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def first_call_time(func):
+    timings = []
+    def run():
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return timings[0]
+
+TARGET = 0.05  # Цель для 500 × 500 на одном ядре, с
+
+def main(symbols=500, candles=500):
+    rng = np.random.default_rng(42)
+    closes = 100 + np.cumsum(rng.normal(size=(symbols, candles)), axis=1)
+    # Часть символов с короткой историей (новые листинги)
+    for row, start in enumerate(rng.integers(0, candles // 2, size=symbols // 5)):
+        closes[row, :start] = np.nan
+
+    def batch():
+        indicators.batch_rsi(closes, 14)
+        indicators.batch_bollinger_bands(closes, 20, 2)
+
+    def per_symbol():
+        for row in closes:
+            valid = row[~np.isnan(row)]
+            indicators.rsi(valid, 14)
+            indicators.bollinger_bands(valid, 20, 2)
+
+    cold_time = first_call_time(batch)
+    batch_time = best_time(batch)
+    loop_time = best_time(per_symbol, repeats=3)
+    print(f"Матрица {symbols} × {candles}, RSI(14) + Bollinger(20, 2)")
+    print(f"Пакетный расчёт:      {batch_time * 1000:8.2f} мс (запас до {TARGET * 1000:.0f} мс: "
+          f"{(TARGET - batch_time) * 1000:.1f} мс)")
+    print(f"Первый вызов в потоке: {cold_time * 1000:7.2f} мс")
+    print(f"Цикл по символам:     {loop_time * 1000:8.2f} мс")
+    print(f"Ускорение:            {loop_time / batch_time:8.1f}x")
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,64 @@
+"""Сравнение отрисовки свечей: отдельные plot/bar на свечу против двух коллекций.
+
+Запуск из корня проекта: python -m benchmarks.bench_chart_render [число_свечей ...]
+"""
+import sys
+import time
+from io import BytesIO
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from services.candlestick import draw_candles
+
+def synthetic_ohlc(candles, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(size=candles))
+    opens = np.r_[closes[0], closes[:-1]]
+    highs = np.maximum(opens, closes) + rng.random(candles)
+    lows = np.minimum(opens, closes) - rng.random(candles)
+    return np.arange(candles, dtype=np.float64), opens, highs, lows, closes
+
+def render_per_candle(x, opens, highs, lows, closes):
+    """Прежний способ: фитиль и тело каждой свечи — отдельные вызовы."""
+    plt.figure(figsize=(12, 6))
+    for i in range(len(x)):
+        plt.plot([x[i], x[i]], [lows[i], highs[i]], color='black', linewidth=1)
+        color = 'green' if closes[i] >= opens[i] else 'red'
+        plt.bar(x[i], abs(closes[i] - opens[i]), bottom=min(opens[i], closes[i]), color=color, width=0.7,
+                alpha=0.8)
+    return _save()
+
+def render_collections(x, opens, highs, lows, closes):
+    plt.figure(figsize=(12, 6))
+    draw_candles(plt.gca(), x, opens, highs, lows, closes)
+    return _save()
+
+def _save():
+    buffer = BytesIO()
+    plt.savefig(buffer, format='png', dpi=100)
+    plt.close()
+    return buffer
+
+def measure(func, data, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(*data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(sizes=(50, 500, 5000)):
+    render_collections(*synthetic_ohlc(10))  # Прогрев: шрифты и бэкенд
+    print(f"{'свечей':>7} {'по свечам':>12} {'коллекции':>12} {'ускорение':>10}")
+    for candles in sizes:
+        data = synthetic_ohlc(candles)
+        repeats = 3 if candles <= 500 else 1
+        legacy = measure(render_per_candle, data, repeats)
+        collections = measure(render_collections, data, repeats)
+        print(f"{candles:>7} {legacy * 1000:>9.0f} мс {collections * 1000:>9.0f} мс {legacy / collections:>9.1f}x")
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or (50, 500, 5000))
@@ -0,0 +1,70 @@
+"""Время отрисовки свечного графика: первый вызов в новом процессе и повторные вызовы.
+
+Сравниваются новая фигура с tight_layout и bbox_inches='tight' на каждый запрос
+и заготовка CandleChartTemplate с заданными заранее полями.
+
+Запуск из корня проекта: python -m benchmarks.bench_chart_template [число_свечей] [повторов]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from services import chart_render, indicators
+from services.chart import calculate_bollinger_bands, calculate_rsi
+
+def full_payload(candles=50, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(size=candles))
+    timestamps = 1_700_000_000_000 + np.arange(candles) * 3_600_000
+    data = np.column_stack([timestamps, closes, closes + 1, closes - 1, closes + rng.normal(size=candles) * 0.3,
+                            rng.random(candles) * 100])
+    highs, lows, volumes = data[:, 2], data[:, 3], data[:, 5]
+    return {
+        'symbol': 'BTC/USDT', 'timeframe': '1h', 'candles': data,
+        'ma20': np.convolve(closes, np.ones(20) / 20, mode='valid'),
+        'bollinger': calculate_bollinger_bands(closes, 20),
+        'vwap': indicators.vwap(highs, lows, closes, volumes, timestamps.astype(np.int64)),
+        'vwap_label': 'VWAP (сессия)',
+        'profile': indicators.volume_profile(closes, volumes, 24),
+        'rsi': calculate_rsi(closes, 14),
+    }
+
+def render_fresh(payload):
+    """Прежний способ: новая фигура и расчёт полей по содержимому на каждый запрос."""
+    template = chart_render.CandleChartTemplate()
+    template.update(payload)
+    return chart_render._to_png(template.figure)
+
+def _timed(render, payload, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        render(payload)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+def cold(candles):
+    """Первая отрисовка в этом процессе: загрузка шрифтов, инициализация бэкенда, создание заготовки."""
+    payload = full_payload(candles)
+    started = time.perf_counter()
+    chart_render.render('candles', payload)
+    return time.perf_counter() - started
+
+def main(candles=50, repeats=20):
+    command = [sys.executable, '-c', f"from benchmarks.bench_chart_template import cold; print(cold({candles}))"]
+    cold_time = float(subprocess.run(command, capture_output=True, text=True, check=True).stdout.split()[-1])
+    print(f"Первая отрисовка в новом процессе: {cold_time * 1000:.0f} мс")
+
+    payload = full_payload(candles)
+    chart_render.warm_up()
+    fresh = _timed(render_fresh, payload, repeats)
+    warm = _timed(lambda p: chart_render.render('candles', p), payload, repeats)
+    print(f"{'новая фигура, tight_layout':<28} {fresh * 1000:6.0f} мс")
+    print(f"{'заготовка, поля заданы':<28} {warm * 1000:6.0f} мс ({fresh / warm:.1f}x)")
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
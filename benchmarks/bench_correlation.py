@@ -0,0 +1,32 @@
+"""Замер расчёта матрицы корреляций и кластеров для большого числа пар.
+
+Запуск из корня проекта: python -m benchmarks.bench_correlation [число_пар]
+"""
+import sys
+import time
+
+import numpy as np
+
+from services.correlation import cluster_labels, correlation_matrix
+
+def main(symbols=300, window=168, repeats=5):
+    rng = np.random.default_rng(42)
+    factors = rng.normal(size=(5, window + 1))
+    groups = rng.integers(0, 5, symbols)
+    returns = factors[groups] + rng.normal(size=(symbols, window + 1))
+    closes = 100 * np.exp(np.cumsum(returns * 0.01, axis=1))
+    closes[rng.random(closes.shape) < 0.02] = np.nan
+
+    print(f"Пар: {symbols}, окно: {window}")
+    for name, func in (("Корреляции", lambda: correlation_matrix(closes, window)),
+                       ("Кластеры", lambda: cluster_labels(correlation_matrix(closes, window)[1], 0.6))):
+        func()  # Прогрев
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<12} {best * 1000:8.2f} мс")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
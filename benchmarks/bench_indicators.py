@@ -0,0 +1,42 @@
+"""Замер производительности индикаторов на длинном ряду свечей.
+
+Запуск из корня проекта: python -m benchmarks.bench_indicators [число_свечей]
+"""
+import sys
+import time
+
+import numpy as np
+
+from services import indicators
+
+def measure(name, func, candles, repeats=5):
+    func()  # Прогрев
+    best = min(_timed(func) for _ in range(repeats))
+    print(f"{name:<18} {best * 1000:8.2f} мс  {candles / best / 1e6:8.1f} млн свечей/с")
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+def main(candles=100_000):
+    rng = np.random.default_rng(42)
+    closes = 100 + np.cumsum(rng.normal(size=candles))
+    highs = closes + rng.random(candles)
+    lows = closes - rng.random(candles)
+    volumes = rng.random(candles) * 1000
+    timestamps = np.arange(candles, dtype=np.int64) * 3_600_000
+
+    print(f"Свечей: {candles}")
+    measure("SMA(20)", lambda: indicators.sma(closes, 20), candles)
+    measure("EMA(20)", lambda: indicators.ema(closes, 20), candles)
+    measure("RSI(14)", lambda: indicators.rsi(closes, 14), candles)
+    measure("MACD(12,26,9)", lambda: indicators.macd(closes), candles)
+    measure("Bollinger(20,2)", lambda: indicators.bollinger_bands(closes), candles)
+    measure("KDJ(9,3)", lambda: indicators.kdj(highs, lows, closes), candles)
+    measure("VWAP (сессия)", lambda: indicators.vwap(highs, lows, closes, volumes, timestamps), candles)
+    measure("OBV", lambda: indicators.obv(closes, volumes), candles)
+    measure("Профиль объёма", lambda: indicators.volume_profile(closes, volumes, 24), candles)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,98 @@
+"""Задержка запроса свечей с загрузкой рынков на каждый запрос и с общим снимком рынков.
+
+Биржа заменена заглушкой с фиксированными задержками ответа, поэтому замер
+показывает только сэкономленные обращения к бирже, а не скорость сети.
+
+Запуск из корня проекта: python -m benchmarks.bench_markets [запросов]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from services.markets import MarketSnapshot
+
+MARKETS_LATENCY = 0.35  # Типичный ответ load_markets Bybit, с
+OHLCV_LATENCY = 0.08  # Типичный ответ fetch_ohlcv, с
+
+class SimulatedExchange:
+    """Заглушка ccxt с задержками ответа и счётчиком запросов."""
+
+    def __init__(self, markets_count=2500, available=True):
+        self.markets = None
+        self.available = available
+        self.market_loads = 0
+        self._payload = {
+            f"COIN{i}/USDT": {'symbol': f"COIN{i}/USDT", 'base': f"COIN{i}", 'quote': 'USDT', 'spot': True,
+                              'active': True, 'precision': {'price': 0.0001, 'amount': 0.01}}
+            for i in range(markets_count)
+        }
+
+    async def load_markets(self, reload=False):
+        self.market_loads += 1
+        await asyncio.sleep(MARKETS_LATENCY)
+        if not self.available:
+            raise ConnectionError("Биржа недоступна")
+        return self._payload
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+    async def fetch_ohlcv(self, symbol, timeframe):
+        await asyncio.sleep(OHLCV_LATENCY)
+        return [[0, 1, 1, 1, 1, 1]]
+
+async def _timed(request, count):
+    times = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await request()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+async def main(requests=10):
+    path = os.path.join(tempfile.mkdtemp(), 'markets.json')
+
+    exchange = SimulatedExchange()
+
+    async def per_request():
+        await exchange.load_markets(reload=True)
+        await exchange.fetch_ohlcv('COIN1/USDT', '1h')
+
+    per_request_time = await _timed(per_request, requests)
+
+    snapshot = MarketSnapshot(exchange, path, 3600)
+    started = time.perf_counter()
+    await snapshot.ensure_loaded()  # Холодный старт без снимка на диске: загрузка с биржи
+    cold_exchange = time.perf_counter() - started
+
+    async def with_snapshot():
+        await snapshot.ensure_loaded()
+        await exchange.fetch_ohlcv('COIN1/USDT', '1h')
+
+    snapshot_time = await _timed(with_snapshot, requests)
+
+    restarted = MarketSnapshot(SimulatedExchange(), path, 3600)
+    started = time.perf_counter()
+    await restarted.ensure_loaded()  # Холодный старт со снимком на диске
+    cold_disk = time.perf_counter() - started
+
+    print(f"{'load_markets на каждый запрос':<34} {per_request_time * 1000:6.0f} мс на запрос")
+    print(f"{'общий снимок рынков':<34} {snapshot_time * 1000:6.0f} мс на запрос "
+          f"(−{(per_request_time - snapshot_time) * 1000:.0f} мс)")
+    print(f"{'первый запрос, снимка нет':<34} {cold_exchange * 1000:6.0f} мс")
+    print(f"{'первый запрос, снимок с диска':<34} {cold_disk * 1000:6.0f} мс")
+
+    # Биржа недоступна: запросы не повторяют загрузку рынков, пока не истечёт пауза
+    down = SimulatedExchange(available=False)
+    outage = MarketSnapshot(down, os.path.join(tempfile.mkdtemp(), 'markets.json'), 3600)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await outage.ensure_loaded()
+    print(f"{'биржа недоступна':<34} {requests} запросов за {(time.perf_counter() - started) * 1000:.0f} мс, "
+          f"загрузок рынков: {down.market_loads}")
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,59 @@
+"""Замер ускорения перебора параметров бэктеста в зависимости от числа процессов.
+
+Пул запускается принудительно (min_work=0), затем для нескольких длин истории
+сравнивается выбор sweep по умолчанию с последовательным перебором.
+
+Запуск из корня проекта: python -m benchmarks.bench_optimizer [число_свечей]
+"""
+import os
+import sys
+import time
+
+from benchmarks.bench_backtest import synthetic_candles
+from services.backtest import backtest
+from services.optimizer import DEFAULT_SPACE, parameter_grid, plan_workers, rank, sweep
+
+def serial_time(data, param_sets):
+    started = time.perf_counter()
+    for params in param_sets:
+        backtest(data, params)
+    return time.perf_counter() - started
+
+def main(candles=365 * 24):
+    data = synthetic_candles(candles)
+    param_sets = parameter_grid(DEFAULT_SPACE)
+    cores = os.cpu_count() or 1
+    print(f"Свечей: {candles}, прогонов: {len(param_sets)}, ядер: {cores}")
+
+    serial = serial_time(data, param_sets)
+    print(f"{'в одном процессе':<18} {serial:7.2f} с")
+
+    workers = sorted({1, 2, 4, cores, cores * 2})
+    for count in workers:
+        started = time.perf_counter()
+        first = None
+        results = []
+        for item in sweep(data, param_sets, count, min_work=0):
+            if first is None:
+                first = time.perf_counter() - started
+            results.append(item)
+        elapsed = time.perf_counter() - started
+        print(f"{count:>3} процесс(ов)     {elapsed:7.2f} с  ускорение: {serial / elapsed:5.2f}x  "
+              f"первый результат через {first:.2f} с")
+
+    best_params, best = rank(results)[0]
+    print(f"Лучшие параметры: {best_params}, доходность: {best['total_return']:+.2%}, сделок: {best['trades']}")
+
+    print("\nВыбор по умолчанию (OPTIMIZER_MIN_PARALLEL_WORK):")
+    for length in sorted({2_000, candles, candles * 4}):
+        data = synthetic_candles(length)
+        serial = serial_time(data, param_sets)
+        started = time.perf_counter()
+        for _ in sweep(data, param_sets):
+            pass
+        elapsed = time.perf_counter() - started
+        print(f"{length:>7} свечей  процессов: {plan_workers(length, len(param_sets)):>2}  {elapsed:7.2f} с  "
+              f"в одном процессе: {serial:7.2f} с")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 365 * 24)
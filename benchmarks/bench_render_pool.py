@@ -0,0 +1,59 @@
+"""Задержка цикла событий при отрисовке графиков: в самом цикле и в пуле процессов.
+
+Запуск из корня проекта: python -m benchmarks.bench_render_pool [число_графиков]
+"""
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from services import chart_render
+from services.render_pool import ChartRenderer
+
+def synthetic_payload(candles=50, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(size=candles))
+    timestamps = 1_700_000_000_000 + np.arange(candles) * 3_600_000
+    data = np.column_stack([timestamps, closes, closes + 1, closes - 1, closes + rng.normal(size=candles) * 0.3,
+                            rng.random(candles) * 100])
+    return {'symbol': 'BTC/USDT', 'timeframe': '1h', 'candles': data}
+
+async def _watch_loop(lags):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+async def run(charts, render):
+    lags = []
+    watcher = asyncio.create_task(_watch_loop(lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(render() for _ in range(charts)))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.02)  # Наблюдатель успевает зафиксировать последнюю задержку
+    watcher.cancel()
+    return elapsed, max(lags) if lags else 0.0
+
+async def main(charts=10):
+    payload = synthetic_payload()
+    chart_render.warm_up()
+
+    async def inline():
+        chart_render.render('candles', payload)
+
+    elapsed, lag = await run(charts, inline)
+    print(f"{'в цикле событий':<18} {elapsed:6.2f} с, макс. задержка цикла {lag * 1000:7.0f} мс")
+
+    renderer = ChartRenderer(max_queue=charts)
+    renderer.start()
+    await renderer.render('candles', payload)  # Ожидание запуска процессов
+    elapsed, lag = await run(charts, lambda: renderer.render('candles', payload))
+    print(f"{'в пуле процессов':<18} {elapsed:6.2f} с, макс. задержка цикла {lag * 1000:7.0f} мс")
+    stats = renderer.stats()
+    print(f"Ожидание в очереди: среднее {stats['avg_queue_wait'] * 1000:.0f} мс, "
+          f"отрисовка: средняя {stats['avg_render_time'] * 1000:.0f} мс")
+    renderer.close()
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
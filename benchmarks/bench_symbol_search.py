@@ -0,0 +1,48 @@
+"""Время поиска пары по вводу пользователя: точное совпадение, префикс и опечатка.
+
+Индекс строится по синтетическому набору базовых валют размером с рынок спота
+Bybit; опечатки не совпадают ни с одним префиксом и проходят нечёткий поиск.
+
+Запуск из корня проекта: python -m benchmarks.bench_symbol_search [базовых валют]
+"""
+import random
+import statistics
+import string
+import sys
+import time
+
+from services.symbol_index import SymbolIndex
+
+QUERIES = {
+    'точное совпадение': ['BTC', 'ETH', 'SOL', 'DOGE', 'LINK'],
+    'префикс': ['BT', 'ET', 'SO', 'DO', 'LI'],
+    'опечатка': ['BTCC', 'ETHH', 'SOLN', 'DOGGE', 'LIMK', 'AVAXX', 'PEPPE', 'RTH'],
+}
+
+def build_index(count):
+    rng = random.Random(42)
+    bases = {'BTC', 'ETH', 'SOL', 'DOGE', 'LINK', 'AVAX', 'PEPE', 'XRP', 'ADA', 'TON'}
+    while len(bases) < count:
+        bases.add(''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 8))))
+    markets = {f"{base}/{quote}": {'spot': True, 'base': base, 'quote': quote}
+               for base in bases for quote in ('USDT', 'USDC')}
+    return SymbolIndex(markets)
+
+def mean_time(index, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - started)
+    return statistics.mean(timings)
+
+def main(count=2500):
+    index = build_index(count)
+    print(f"Базовых валют: {count}, пар: {len(index)}")
+    for kind, queries in QUERIES.items():
+        first = mean_time(index, queries)
+        repeat = mean_time(index, queries)
+        print(f"{kind:<20} {first * 1000:7.3f} мс, повторно {repeat * 1000:7.3f} мс")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2500)
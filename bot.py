@@ -11,8 +11,18 @@ from handlers.market import get_market_handler
 from handlers.donate import get_donate_handler
 from handlers.info import get_info_handler
 from handlers.sentiment import get_sentiment_handler
+from handlers.screener import get_screener_handlers
+from handlers.backtest import get_backtest_handlers
+from handlers.correlation import get_correlation_handlers
 from handlers.back import get_back_handler
 from handlers.callback_handler import handle_callback
+from services.bybit_api import bybit_api
+from services.screener import screener
+from services.signals import signal_engine
+from services.backfill import stop_prefetch
+from services.correlation import correlation_service
+from services.render_pool import chart_renderer
+from services.chart_cache import chart_image_cache
 from database.database import create_tables, get_logs, get_support_messages, respond_to_support_message, get_support_message_by_id
 from config.config import TELEGRAM_TOKEN as TOKEN
 from logger import setup_logger
@@ -38,7 +48,8 @@ bot_application = None  # Хранение экземпляра Application
 main_menu = [
     ["📊 Анализ", "Рынок"],
     ["Сентимент", "Информация"],
-    ["Поддержка", "Донат"]
+    ["Скринер", "Поддержка"],
+    ["Донат"]
 ]
 back_button = [["Назад"]]
 
@@ -91,6 +102,15 @@ async def run_bot():
         for handler in get_analysis_handlers():
             application.add_handler(handler)
         
+        for handler in get_screener_handlers():
+            application.add_handler(handler)
+
+        for handler in get_correlation_handlers():
+            application.add_handler(handler)
+
+        for handler in get_backtest_handlers():
+            application.add_handler(handler)
+        
         application.add_handler(get_support_handler())
         application.add_handler(get_market_handler())
         application.add_handler(get_donate_handler())
@@ -99,6 +119,13 @@ async def run_bot():
         application.add_handler(get_back_handler())
         application.add_handler(CallbackQueryHandler(handle_callback))
     
+        # Запускаем фоновое обновление снимка рынков, скринер, расчёт сигналов и корреляций, пул отрисовки графиков
+        bybit_api.start_background_tasks()
+        chart_renderer.start()
+        screener.start_background()
+        signal_engine.start_background()
+        correlation_service.start_background()
+    
         bot_logger.info("Бот запущен. Нажми CTRL+C для остановки.")
         
         # Запускаем бота с настройкой повторных попыток
@@ -115,6 +142,14 @@ async def run_bot():
         bot_logger.error(f"Ошибка при запуске бота: {str(e)}")
         raise
     finally:
+        # Сначала останавливаем фоновые задачи, которые обращаются к бирже, затем закрываем соединение
+        await signal_engine.stop_background()
+        await screener.stop_background()
+        await correlation_service.stop_background()
+        await stop_prefetch()
+        await bybit_api.close()
+        chart_renderer.close()
+        bot_logger.info(f"Статистика кэша графиков: {chart_image_cache.stats()}")
         bot_logger.info("Бот остановлен.")
 
 def main():
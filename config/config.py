@@ -15,6 +15,61 @@ ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY', '')
 API_RATE_LIMIT = int(os.environ.get('API_RATE_LIMIT', 100))  # Запросов в минуту
 API_TIMEOUT = int(os.environ.get('API_TIMEOUT', 30))  # Секунд на запрос
 
+# Настройки кэша запросов к бирже
+CACHE_TICKER_TTL = int(os.environ.get('CACHE_TICKER_TTL', 5))  # Секунд хранения тикеров
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 2000))  # Максимум записей в кэше
+OHLCV_BATCH_CONCURRENCY = int(os.environ.get('OHLCV_BATCH_CONCURRENCY', 8))  # Параллельных запросов свечей в пакете
+BACKFILL_PAGE_LIMIT = int(os.environ.get('BACKFILL_PAGE_LIMIT', 1000))  # Свечей на страницу истории (максимум Bybit)
+BACKFILL_CONCURRENCY = int(os.environ.get('BACKFILL_CONCURRENCY', 4))  # Параллельных запросов страниц истории
+INDICATOR_CACHE_MAX_ENTRIES = int(os.environ.get('INDICATOR_CACHE_MAX_ENTRIES', 500))  # Рассчитанных индикаторов в памяти
+
+# Настройки скринера рынка
+SCREENER_TIMEFRAME = os.environ.get('SCREENER_TIMEFRAME', '1h')
+SCREENER_CANDLES = int(os.environ.get('SCREENER_CANDLES', 100))  # Свечей на пару для расчёта индикаторов
+SCREENER_INTERVAL = int(os.environ.get('SCREENER_INTERVAL', 900))  # Секунд между проходами
+SCREENER_MAX_SYMBOLS = int(os.environ.get('SCREENER_MAX_SYMBOLS', 0))  # 0 — все USDT-пары
+
+# Настройки движка торговых сигналов
+SIGNAL_SYMBOLS = [s.strip() for s in os.environ.get('SIGNAL_SYMBOLS', '').split(',') if s.strip()]  # Пусто — USDT-пары
+SIGNAL_MAX_SYMBOLS = int(os.environ.get('SIGNAL_MAX_SYMBOLS', 200))  # Пар, если список не задан
+SIGNAL_TIMEFRAMES = [tf.strip() for tf in os.environ.get('SIGNAL_TIMEFRAMES', '1h,4h').split(',') if tf.strip()]
+SIGNAL_RULES = [r.strip() for r in os.environ.get('SIGNAL_RULES', '').split(',') if r.strip()]  # Пусто — все правила
+SIGNAL_CANDLES = int(os.environ.get('SIGNAL_CANDLES', 100))  # Свечей истории для заполнения состояния индикаторов пары
+SIGNAL_WORKERS = int(os.environ.get('SIGNAL_WORKERS', 16))  # Параллельных запросов свечей за проход
+# Пар, обновляемых за один проход (раз в минуту). Каждая пара — не больше одного запроса свечей,
+# поэтому бюджет держит фоновую нагрузку в пределах доли API_RATE_LIMIT; остальные пары — в следующих проходах
+SIGNAL_REQUEST_BUDGET = int(os.environ.get('SIGNAL_REQUEST_BUDGET', max(API_RATE_LIMIT // 2, 1)))
+SIGNAL_MAX_ATTEMPTS = int(os.environ.get('SIGNAL_MAX_ATTEMPTS', 3))  # Попыток обновить пару на одной свече
+
+# Настройки бэктеста
+BACKTEST_DAYS = int(os.environ.get('BACKTEST_DAYS', 365))  # Глубина истории
+BACKTEST_MAX_CANDLES = int(os.environ.get('BACKTEST_MAX_CANDLES', 10000))  # Ограничение для мелких таймфреймов
+BACKTEST_FEE = float(os.environ.get('BACKTEST_FEE', 0.001))  # Комиссия за сделку в одну сторону
+OPTIMIZER_WORKERS = int(os.environ.get('OPTIMIZER_WORKERS', 0))  # Процессов перебора параметров, 0 — по числу ядер
+OPTIMIZER_MAX_RUNS = int(os.environ.get('OPTIMIZER_MAX_RUNS', 2000))  # Ограничение числа прогонов за один перебор
+# Минимальный объём перебора (свечей x прогонов) для пула процессов: меньший перебор быстрее выполнить в одном процессе,
+# чем запускать процессы (~0.3-0.8 с); 10 млн — около 2.5 с последовательного счёта
+OPTIMIZER_MIN_PARALLEL_WORK = int(os.environ.get('OPTIMIZER_MIN_PARALLEL_WORK', 10_000_000))
+CORRELATION_TIMEFRAME = os.environ.get('CORRELATION_TIMEFRAME', '1h')
+CORRELATION_SYMBOLS = int(os.environ.get('CORRELATION_SYMBOLS', 100))  # Топ USDT-пар по объёму торгов
+CORRELATION_WINDOW = int(os.environ.get('CORRELATION_WINDOW', 168))  # Скользящее окно доходностей, свечей
+CORRELATION_CLUSTER_THRESHOLD = float(os.environ.get('CORRELATION_CLUSTER_THRESHOLD', 0.8))  # Порог связи пар в кластере
+CORRELATION_INTERVAL = int(os.environ.get('CORRELATION_INTERVAL', 300))  # Секунд между проверками закрытия новой свечи
+CHART_RENDER_WORKERS = int(os.environ.get('CHART_RENDER_WORKERS', 2))  # Процессов отрисовки графиков, 0 — в потоке
+CHART_RENDER_QUEUE = int(os.environ.get('CHART_RENDER_QUEUE', 16))  # Максимум ожидающих и выполняемых задач отрисовки
+CHART_RENDER_TIMEOUT = float(os.environ.get('CHART_RENDER_TIMEOUT', 20))  # Секунд на отрисовку одного графика
+CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # Байт памяти под готовые PNG графиков
+
+# Настройки снимка рынков
+MARKETS_CACHE_PATH = os.environ.get('MARKETS_CACHE_PATH', os.path.join('data', 'markets.json'))
+MARKETS_REFRESH_INTERVAL = int(os.environ.get('MARKETS_REFRESH_INTERVAL', 300))  # Секунд между обновлениями
+
+# Настройки защиты от недоступности биржи
+CIRCUIT_ERROR_THRESHOLD = float(os.environ.get('CIRCUIT_ERROR_THRESHOLD', 0.5))  # Доля ошибок для размыкания
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 5))  # Минимум запросов в окне
+CIRCUIT_WINDOW = int(os.environ.get('CIRCUIT_WINDOW', 60))  # Секунд в скользящем окне
+CIRCUIT_PROBE_INTERVAL = int(os.environ.get('CIRCUIT_PROBE_INTERVAL', 15))  # Секунд между проверками биржи
+
 # API ключи для бирж
 BYBIT_API_KEY = os.environ.get('BYBIT_API_KEY', '')
 BYBIT_SECRET = os.environ.get('BYBIT_SECRET', '')
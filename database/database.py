@@ -62,6 +62,66 @@ def create_tables():
                 )
             ''')
 
+            # Создание таблицы candles (локальное хранилище свечей)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS candles (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    volume REAL NOT NULL,
+                    PRIMARY KEY (symbol, timeframe, timestamp)
+                ) WITHOUT ROWID
+            ''')
+
+            # Создание таблицы backfill_pages (загруженные страницы истории свечей)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backfill_pages (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    page_start INTEGER NOT NULL,
+                    page_end INTEGER NOT NULL,
+                    completed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (symbol, timeframe, page_start)
+                ) WITHOUT ROWID
+            ''')
+
+            # Создание таблицы trading_signals (см. models.TradingSignal)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS trading_signals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    symbol VARCHAR(20) NOT NULL,
+                    timeframe VARCHAR(10) NOT NULL,
+                    signal_type VARCHAR(20) NOT NULL,
+                    price FLOAT NOT NULL,
+                    confidence FLOAT,
+                    indicators TEXT,
+                    created_at DATETIME,
+                    is_sent BOOLEAN DEFAULT 0,
+                    candle_timestamp BIGINT
+                )
+            ''')
+            if not column_exists(cursor, "trading_signals", "candle_timestamp"):
+                cursor.execute('ALTER TABLE trading_signals ADD COLUMN candle_timestamp BIGINT DEFAULT NULL')
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_trading_signals_candle
+                ON trading_signals (symbol, timeframe, signal_type, candle_timestamp)
+            ''')
+
+            # Создание таблицы indicator_state (состояние потоковых индикаторов)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS indicator_state (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (symbol, timeframe)
+                ) WITHOUT ROWID
+            ''')
+
             conn.commit()
             logger.info("Таблицы успешно созданы или уже существуют.")
     except sqlite3.Error as e:
@@ -257,6 +317,148 @@ def get_unanswered_support_messages():
         logger.error(f"Ошибка при получении необработанных сообщений: {e}")
         return []
 
+def save_candles(symbol, timeframe, candles):
+    """Сохранение свечей в локальное хранилище (существующие свечи перезаписываются)."""
+    if not candles:
+        return
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return
+            cursor = conn.cursor()
+            cursor.executemany(
+                'INSERT OR REPLACE INTO candles (symbol, timeframe, timestamp, open, high, low, close, volume) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(symbol, timeframe, int(c[0]), c[1], c[2], c[3], c[4], c[5] or 0) for c in candles]
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при сохранении свечей {symbol} {timeframe}: {e}")
+
+def get_candles(symbol, timeframe, limit):
+    """Получение последних свечей из локального хранилища в хронологическом порядке."""
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return []
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT timestamp, open, high, low, close, volume FROM candles '
+                'WHERE symbol = ? AND timeframe = ? ORDER BY timestamp DESC LIMIT ?',
+                (symbol, timeframe, limit)
+            )
+            return [list(row) for row in reversed(cursor.fetchall())]
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении свечей {symbol} {timeframe}: {e}")
+        return []
+
+def get_candles_range(symbol, timeframe, start, end):
+    """Получение свечей из локального хранилища за интервал [start, end) в миллисекундах."""
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return []
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT timestamp, open, high, low, close, volume FROM candles '
+                'WHERE symbol = ? AND timeframe = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp',
+                (symbol, timeframe, start, end)
+            )
+            return [list(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении свечей {symbol} {timeframe}: {e}")
+        return []
+
+def mark_backfill_page(symbol, timeframe, page_start, page_end):
+    """Отметка страницы истории свечей как полностью загруженной."""
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR REPLACE INTO backfill_pages (symbol, timeframe, page_start, page_end) VALUES (?, ?, ?, ?)',
+                (symbol, timeframe, page_start, page_end)
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при сохранении прогресса загрузки {symbol} {timeframe}: {e}")
+
+def get_backfilled_pages(symbol, timeframe):
+    """Получение начал уже загруженных страниц истории свечей."""
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return set()
+            cursor = conn.cursor()
+            cursor.execute('SELECT page_start FROM backfill_pages WHERE symbol = ? AND timeframe = ?',
+                           (symbol, timeframe))
+            return {row['page_start'] for row in cursor.fetchall()}
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении прогресса загрузки {symbol} {timeframe}: {e}")
+        return set()
+
+def save_trading_signals(signals):
+    """Пакетное сохранение торговых сигналов.
+
+    signals — список кортежей (symbol, timeframe, signal_type, price, confidence,
+    indicators_json, candle_timestamp). Повтор сигнала того же типа на той же свече
+    пропускается. Возвращает число добавленных сигналов.
+    """
+    if not signals:
+        return 0
+    created_at = datetime.now().isoformat(sep=' ')
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return 0
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO trading_signals (symbol, timeframe, signal_type, price, confidence, '
+                'indicators, candle_timestamp, created_at, is_sent) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                [tuple(signal) + (created_at,) for signal in signals]
+            )
+            conn.commit()
+            return conn.total_changes - before
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при сохранении торговых сигналов: {e}")
+        return 0
+
+def save_indicator_states(states):
+    """Пакетное сохранение сериализованного состояния потоковых индикаторов.
+
+    states — список кортежей (symbol, timeframe, state).
+    """
+    if not states:
+        return
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return
+            conn.executemany(
+                'INSERT OR REPLACE INTO indicator_state (symbol, timeframe, state, updated_at) '
+                'VALUES (?, ?, ?, CURRENT_TIMESTAMP)',
+                states
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при сохранении состояния индикаторов: {e}")
+
+def get_indicator_state(symbol, timeframe):
+    """Получение сериализованного состояния потоковых индикаторов."""
+    try:
+        with create_connection() as conn:
+            if conn is None:
+                return None
+            cursor = conn.cursor()
+            cursor.execute('SELECT state FROM indicator_state WHERE symbol = ? AND timeframe = ?',
+                           (symbol, timeframe))
+            row = cursor.fetchone()
+            return row['state'] if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при получении состояния индикаторов {symbol} {timeframe}: {e}")
+        return None
+
 def column_exists(cursor, table_name, column_name):
     """Проверяет, существует ли столбец в таблице."""
     cursor.execute(f"PRAGMA table_info({table_name})")
@@ -339,6 +541,17 @@ def migrate_database():
                     ALTER TABLE settings ADD COLUMN is_encrypted BOOLEAN DEFAULT 0
                 ''')
 
+            # Добавляем столбец свечи и индекс для исключения повторных сигналов
+            if table_exists(cursor, "trading_signals"):
+                if not column_exists(cursor, "trading_signals", "candle_timestamp"):
+                    cursor.execute('''
+                        ALTER TABLE trading_signals ADD COLUMN candle_timestamp BIGINT DEFAULT NULL
+                    ''')
+                cursor.execute('''
+                    CREATE UNIQUE INDEX IF NOT EXISTS ix_trading_signals_candle
+                    ON trading_signals (symbol, timeframe, signal_type, candle_timestamp)
+                ''')
+
             conn.commit()
             logger.info("Миграция базы данных выполнена успешно.")
     except sqlite3.OperationalError as e:
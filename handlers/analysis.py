@@ -1,9 +1,13 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram.error import BadRequest
 import logging
 import datetime
-from services.bybit_api import fetch_ohlcv_async, fetch_ticker
-from services.chart import generate_chart
+from io import BytesIO
+from services.bybit_api import fetch_ticker, is_valid_symbol, resolve_pair, search_pairs, staleness_note
+from services.chart import get_chart_image
+from services.chart_cache import chart_image_cache
+from services.backfill import schedule_prefetch
 import re
 
 # Настройка логгера
@@ -38,9 +42,19 @@ async def handle_pair_selection(update: Update, context: ContextTypes.DEFAULT_TY
     # Извлекаем выбранную пару из callback_data
     pair = query.data.replace("pair_", "")
     
+    # Кнопка могла остаться в старом сообщении, а пара — перестать торговаться
+    if not await is_valid_symbol(pair):
+        keyboard = [[InlineKeyboardButton("◀️ Назад к парам", callback_data="analysis")]]
+        await query.edit_message_text(f"❌ Пара {pair} не найдена или не торгуется на Bybit.",
+                                      reply_markup=InlineKeyboardMarkup(keyboard))
+        return
+    
     # Сохраняем выбранную пару в контексте пользователя
     context.user_data["selected_pair"] = pair
     
+    # Загружаем историю базовых таймфреймов, чтобы остальные строились локально
+    schedule_prefetch(pair)
+    
     # Создаем клавиатуру с таймфреймами
     keyboard = []
     row = []
@@ -60,6 +74,25 @@ async def handle_pair_selection(update: Update, context: ContextTypes.DEFAULT_TY
     
     await query.edit_message_text(message_text, reply_markup=reply_markup, parse_mode="Markdown")
 
+async def _send_chart(context: ContextTypes.DEFAULT_TYPE, chat_id: int, chart, **kwargs):
+    """Отправка графика из get_chart_image.
+
+    Уже отправленная версия графика пересылается по file_id без повторной загрузки картинки.
+    """
+    key, png = chart
+    file_id = chart_image_cache.get_file_id(key)
+    if file_id:
+        try:
+            return await context.bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+        except BadRequest as e:
+            logger.warning(f"Telegram не принял file_id графика, загружаю заново: {e}")
+            chart_image_cache.drop_file_id(key)
+
+    message = await context.bot.send_photo(chat_id=chat_id, photo=BytesIO(png), **kwargs)
+    if message and message.photo:
+        chart_image_cache.set_file_id(key, message.photo[-1].file_id)
+    return message
+
 async def handle_timeframe_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обрабатывает выбор таймфрейма и показывает график."""
     query = update.callback_query
@@ -84,9 +117,9 @@ async def handle_timeframe_selection(update: Update, context: ContextTypes.DEFAU
     try:
         # Генерируем график
         logger.info(f"Запрос графика для {pair}, таймфрейм {timeframe}")
-        chart_buffer = await generate_chart(pair, timeframe, limit=50)
+        chart = await get_chart_image(pair, timeframe, limit=50)
         
-        if not chart_buffer:
+        if not chart:
             # Создаем клавиатуру для возврата
             keyboard = [
                 [InlineKeyboardButton("🔄 Попробовать снова", callback_data=f"timeframe_{timeframe}")],
@@ -108,6 +141,7 @@ async def handle_timeframe_selection(update: Update, context: ContextTypes.DEFAU
                 InlineKeyboardButton("🔄 Обновить", callback_data=f"refresh_{pair}_{timeframe}"),
                 InlineKeyboardButton("📈 Другой таймфрейм", callback_data=f"pair_{pair}")
             ],
+            [InlineKeyboardButton("🧪 Бэктест", callback_data=f"backtest_{pair}_{timeframe}")],
             [InlineKeyboardButton("◀️ Назад к парам", callback_data="analysis")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -120,10 +154,12 @@ async def handle_timeframe_selection(update: Update, context: ContextTypes.DEFAU
             logger.warning(f"Не удалось удалить предыдущее сообщение: {e}")
         
         # Отправляем график в любом случае
-        await context.bot.send_photo(
-            chat_id=update.effective_chat.id,
-            photo=chart_buffer,
-            caption=f"📊 График {pair} ({timeframe})\n\nДанные предоставлены Bybit API",
+        await _send_chart(
+            context,
+            update.effective_chat.id,
+            chart,
+            caption=f"📊 График {pair} ({timeframe})\n\nДанные предоставлены Bybit API"
+                    + staleness_note('ohlcv', pair, timeframe, 50),
             reply_markup=reply_markup,
             parse_mode="Markdown"
         )
@@ -181,9 +217,9 @@ async def handle_refresh_chart(update: Update, context: ContextTypes.DEFAULT_TYP
     try:
         # Генерируем обновленный график с большим количеством свечей
         logger.info(f"Запрос обновленного графика для {pair}, таймфрейм {timeframe}")
-        chart_buffer = await generate_chart(pair, timeframe, limit=50)
+        chart = await get_chart_image(pair, timeframe, limit=50)
         
-        if not chart_buffer:
+        if not chart:
             # Создаем клавиатуру для возврата с дополнительными опциями
             keyboard = [
                 [InlineKeyboardButton("🔄 Попробовать снова", callback_data=f"refresh_{pair}_{timeframe}")],
@@ -215,6 +251,7 @@ async def handle_refresh_chart(update: Update, context: ContextTypes.DEFAULT_TYP
                 InlineKeyboardButton("🔄 Обновить", callback_data=f"refresh_{pair}_{timeframe}"),
                 InlineKeyboardButton("📈 Другой таймфрейм", callback_data=f"pair_{pair}")
             ],
+            [InlineKeyboardButton("🧪 Бэктест", callback_data=f"backtest_{pair}_{timeframe}")],
             [InlineKeyboardButton("◀️ Назад к парам", callback_data="analysis")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -227,10 +264,12 @@ async def handle_refresh_chart(update: Update, context: ContextTypes.DEFAULT_TYP
             logger.warning(f"Не удалось удалить предыдущее сообщение: {e}")
         
         # Отправляем график в любом случае
-        await context.bot.send_photo(
-            chat_id=update.effective_chat.id,
-            photo=chart_buffer,
-            caption=f"📊 График {pair} ({timeframe})\n\nДанные обновлены: {datetime.datetime.now().strftime('%H:%M:%S')}",
+        await _send_chart(
+            context,
+            update.effective_chat.id,
+            chart,
+            caption=f"📊 График {pair} ({timeframe})\n\nДанные обновлены: {datetime.datetime.now().strftime('%H:%M:%S')}"
+                    + staleness_note('ohlcv', pair, timeframe, 50),
             reply_markup=reply_markup,
             parse_mode="Markdown"
         )
@@ -306,24 +345,26 @@ async def handle_pair_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Получаем введенный пользователем текст и переводим в верхний регистр
     symbol = update.message.text.strip().upper()
     
-    # Проверяем, что введенный текст - валидный символ (только буквы и цифры)
-    if not re.match(r'^[A-Z0-9]+$', symbol):
+    # Проверяем, что введенный текст - валидный символ (буквы, цифры и разделитель пары)
+    if not re.match(r'^[A-ZА-ЯЁ0-9/]+$', symbol):
         await update.message.reply_text(
-            "❌ Неверный формат. Пожалуйста, введите только буквы и цифры (например, BTC, ETH)."
+            "❌ Неверный формат. Пожалуйста, введите тикер из букв и цифр или пару через «/» (например, BTC, ETH или ETH/BTC)."
         )
         return
     
     # Формируем пару с USDT
-    pair = f"{symbol}/USDT"
+    pair = symbol if '/' in symbol else f"{symbol}/USDT"
     
-    # Проверяем, существует ли такая пара
+    # Проверяем, существует ли такая пара, по локальному индексу рынков
     try:
-        # Пытаемся получить данные для проверки существования пары
-        data = await fetch_ohlcv_async(pair, "1m", 1)
+        found_pair = await resolve_pair(symbol)
         
-        if data and len(data) > 0:  # Исправлено: добавлен пробел между and и len
+        if found_pair:
             # Пара существует, предлагаем выбрать таймфрейм
-            context.user_data["selected_pair"] = pair
+            context.user_data["selected_pair"] = found_pair
+            
+            # Загружаем историю базовых таймфреймов, чтобы остальные строились локально
+            schedule_prefetch(found_pair)
             
             # Создаем клавиатуру с таймфреймами
             keyboard = []
@@ -340,7 +381,22 @@ async def handle_pair_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await update.message.reply_text(
-                f"✅ Найдена пара *{pair}*\n\n🕒 Выберите таймфрейм:",
+                f"✅ Найдена пара *{found_pair}*\n\n🕒 Выберите таймфрейм:",
+                reply_markup=reply_markup,
+                parse_mode="Markdown"
+            )
+            return
+        
+        suggestions = await search_pairs(symbol)
+        if suggestions:
+            # Точного совпадения нет, предлагаем похожие пары
+            keyboard = [[InlineKeyboardButton(suggestion, callback_data=f"pair_{suggestion}")]
+                        for suggestion in suggestions]
+            keyboard.append([InlineKeyboardButton("🔍 Попробовать другую", callback_data="search_pair")])
+            reply_markup = InlineKeyboardMarkup(keyboard)
+            
+            await update.message.reply_text(
+                f"🔎 Пара *{pair}* не найдена. Возможно, вы искали:",
                 reply_markup=reply_markup,
                 parse_mode="Markdown"
             )
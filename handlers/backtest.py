@@ -0,0 +1,123 @@
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes, CallbackQueryHandler
+import asyncio
+import logging
+from services.backtest import run_backtest
+from services.chart import generate_equity_chart
+from services.optimizer import optimize
+
+# Настройка логгера
+logger = logging.getLogger(__name__)
+
+# Перебор параметров занимает все ядра, поэтому одновременно выполняется только один
+_optimize_lock = asyncio.Lock()
+
+def _format_report(result, pair: str, timeframe: str) -> str:
+    params = result['params']
+    profit_factor = f"{result['profit_factor']:.2f}" if result['profit_factor'] is not None else "—"
+    text = (
+        f"🧪 Бэктест {pair} ({timeframe})\n"
+        f"RSI({params['rsi_period']}): покупка ниже {params['rsi_lower']}, продажа выше {params['rsi_upper']}\n\n"
+        f"Свечей: {result['candles']}\n"
+        f"Доходность: {result['total_return']:+.2%} (удержание: {result['buy_and_hold']:+.2%})\n"
+        f"Макс. просадка: {result['max_drawdown']:.2%}\n"
+        f"Сделок: {result['trades']}, прибыльных: {result['win_rate']:.0%}\n"
+        f"Средняя сделка: {result['avg_trade']:+.2%}, профит-фактор: {profit_factor}\n"
+        f"Время в позиции: {result['exposure']:.0%}"
+    )
+    if result['trade_list'] and result['trade_list'][-1]['exit_time'] is None:
+        text += "\n\nПоследняя сделка ещё открыта."
+    return text
+
+def _format_optimization(results, pair: str, timeframe: str, limit: int = 5) -> str:
+    text = f"🔧 Подбор параметров RSI-стратегии {pair} ({timeframe})\n\nЛучшие сочетания по доходности:\n"
+    for i, (params, summary) in enumerate(results[:limit]):
+        trend = f"MA({params['ma_period']})" if params['ma_period'] else "без фильтра MA"
+        text += (
+            f"\n{i+1}. RSI({params['rsi_period']}) {params['rsi_lower']}/{params['rsi_upper']}, {trend}\n"
+            f"   Доходность: {summary['total_return']:+.2%}, просадка: {summary['max_drawdown']:.2%}, "
+            f"сделок: {summary['trades']}, прибыльных: {summary['win_rate']:.0%}"
+        )
+    text += f"\n\nУдержание за тот же период: {results[0][1]['buy_and_hold']:+.2%}"
+    return text
+
+async def handle_backtest(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Запускает бэктест стратегии для пары и таймфрейма и отправляет отчёт с графиком доходности."""
+    query = update.callback_query
+    await query.answer("⏳ Запускаю бэктест...")
+
+    _, pair, timeframe = query.data.split("_", 2)
+    keyboard = [
+        [InlineKeyboardButton("🔧 Подобрать параметры", callback_data=f"optimize_{pair}_{timeframe}")],
+        [InlineKeyboardButton("📊 К графику", callback_data=f"refresh_{pair}_{timeframe}")],
+        [InlineKeyboardButton("◀️ Назад к парам", callback_data="analysis")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    try:
+        logger.info(f"Запрос бэктеста для {pair}, таймфрейм {timeframe}")
+        result = await run_backtest(pair, timeframe)
+        if not result:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=f"❌ Недостаточно истории для бэктеста {pair} ({timeframe}).",
+                reply_markup=reply_markup
+            )
+            return
+
+        report = _format_report(result, pair, timeframe)
+        chart_buffer = await generate_equity_chart(result, pair, timeframe)
+        if chart_buffer:
+            await context.bot.send_photo(
+                chat_id=update.effective_chat.id,
+                photo=chart_buffer,
+                caption=report,
+                reply_markup=reply_markup
+            )
+        else:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=report, reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении бэктеста для {pair}: {e}")
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=f"❌ Не удалось выполнить бэктест для {pair} ({timeframe}). Попробуйте позже.",
+            reply_markup=reply_markup
+        )
+
+async def handle_optimize(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Перебирает параметры стратегии для пары и таймфрейма и отправляет лучшие сочетания."""
+    query = update.callback_query
+    await query.answer("⏳ Подбираю параметры, это займёт до минуты...")
+
+    _, pair, timeframe = query.data.split("_", 2)
+    keyboard = [
+        [InlineKeyboardButton("🧪 Бэктест", callback_data=f"backtest_{pair}_{timeframe}")],
+        [InlineKeyboardButton("◀️ Назад к парам", callback_data="analysis")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    try:
+        logger.info(f"Запрос подбора параметров для {pair}, таймфрейм {timeframe}")
+        async with _optimize_lock:
+            results = await optimize(pair, timeframe)
+        if results is None:
+            text = f"❌ Недостаточно истории для подбора параметров {pair} ({timeframe})."
+        elif not results:
+            text = f"❌ Ни одно сочетание параметров не дало достаточно сделок для {pair} ({timeframe})."
+        else:
+            text = _format_optimization(results, pair, timeframe)
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=text, reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(f"Ошибка при подборе параметров для {pair}: {e}")
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=f"❌ Не удалось подобрать параметры для {pair} ({timeframe}). Попробуйте позже.",
+            reply_markup=reply_markup
+        )
+
+def get_backtest_handlers():
+    """Возвращает обработчики бэктеста и подбора параметров."""
+    return [
+        CallbackQueryHandler(handle_backtest, pattern="^backtest_"),
+        CallbackQueryHandler(handle_optimize, pattern="^optimize_")
+    ]
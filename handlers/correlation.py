@@ -0,0 +1,89 @@
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
+import logging
+from services.bybit_api import resolve_pair
+from services.chart import generate_correlation_heatmap
+from services.correlation import correlation_service
+
+# Настройка логгера
+logger = logging.getLogger(__name__)
+
+def _base(symbol: str) -> str:
+    return symbol.split('/')[0]
+
+def _clusters_text(result, limit: int = 5) -> str:
+    clusters = result.clusters()
+    if not clusters:
+        return "Выраженных кластеров нет."
+    lines = []
+    for i, cluster in enumerate(clusters[:limit]):
+        names = ", ".join(_base(symbol) for symbol in cluster[:8])
+        more = f" и ещё {len(cluster) - 8}" if len(cluster) > 8 else ""
+        lines.append(f"{i+1}. {names}{more}")
+    return "\n".join(lines)
+
+def _related_text(result, pair: str) -> str:
+    most, least = result.related(pair, 5)
+    text = f"🔗 Корреляции {pair} ({result.timeframe}, {result.window} свечей)\n\n📈 Сильнее всего связаны:\n"
+    text += "\n".join(f"• {_base(symbol)}: {value:+.2f}" for symbol, value in most)
+    text += "\n\n📉 Слабее всего связаны:\n"
+    text += "\n".join(f"• {_base(symbol)}: {value:+.2f}" for symbol, value in least)
+    return text
+
+async def correlation_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Тепловая карта корреляций или, с аргументом (/corr BTC), пары, связанные с указанной.
+
+    Матрица рассчитывается в фоне (см. CorrelationService), ответ строится из последнего результата.
+    """
+    query = update.callback_query
+    if query:
+        await query.answer()
+    chat_id = update.effective_chat.id
+    keyboard = [
+        [InlineKeyboardButton("🔄 Обновить", callback_data="corr")],
+        [InlineKeyboardButton("◀️ Назад", callback_data="market")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    try:
+        result = correlation_service.latest()
+        if not result:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text="⏳ Корреляции ещё рассчитываются. Попробуйте через пару минут.",
+                reply_markup=reply_markup
+            )
+            return
+
+        if context.args:
+            pair = await resolve_pair(context.args[0])
+            if not pair or pair not in result:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"❌ Пара {context.args[0].upper()} не входит в топ-{correlation_service.symbols} по объёму торгов."
+                )
+                return
+            await context.bot.send_message(chat_id=chat_id, text=_related_text(result, pair))
+            return
+
+        caption = (
+            f"🔗 Корреляции топ-{len(result.symbols)} USDT-пар ({result.timeframe})\n\n"
+            f"Кластеры:\n{_clusters_text(result)}\n\n"
+            "Пары, связанные с монетой: /corr BTC"
+        )
+        chart_buffer = await generate_correlation_heatmap(result)
+        if chart_buffer:
+            await context.bot.send_photo(chat_id=chat_id, photo=chart_buffer, caption=caption[:1024],
+                                         reply_markup=reply_markup)
+        else:
+            await context.bot.send_message(chat_id=chat_id, text=caption, reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(f"Ошибка при расчёте корреляций: {e}")
+        await context.bot.send_message(chat_id=chat_id, text="❌ Произошла ошибка при расчёте корреляций.")
+
+def get_correlation_handlers():
+    """Возвращает обработчики для корреляций."""
+    return [
+        CommandHandler("corr", correlation_command),
+        CallbackQueryHandler(correlation_command, pattern="^corr$")
+    ]
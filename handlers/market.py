@@ -1,7 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 import logging
-from services.bybit_api import fetch_top_gainers, fetch_top_losers, fetch_market_sentiment
+from services.bybit_api import fetch_top_gainers, fetch_top_losers, fetch_market_overview, fetch_market_sentiment, staleness_note
 from services.chart import generate_market_overview_chart
 
 # Настройка логгера
@@ -51,10 +51,12 @@ async def show_top_gainers(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, ticker in enumerate(gainers):
             symbol = ticker['symbol'].split('/')[0]  # Берем только первую часть пары (без /USDT)
             price = ticker['last']
-            change = ticker['percentage'] * 100  # Преобразуем в проценты
+            change = ticker.get('percentage') or 0  # ccxt отдаёт изменение уже в процентах
             
             message_text += f"{i+1}. *{symbol}*: ${price:.4f} ({change:+.2f}%)\n"
         
+        message_text += staleness_note('snapshot', 'USDT')
+        
         # Создаем клавиатуру для других действий
         keyboard = [
             [
@@ -112,10 +114,12 @@ async def show_top_losers(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, ticker in enumerate(losers):
             symbol = ticker['symbol'].split('/')[0]  # Берем только первую часть пары (без /USDT)
             price = ticker['last']
-            change = ticker['percentage'] * 100  # Преобразуем в проценты
+            change = ticker.get('percentage') or 0  # ccxt отдаёт изменение уже в процентах
             
             message_text += f"{i+1}. *{symbol}*: ${price:.4f} ({change:+.2f}%)\n"
         
+        message_text += staleness_note('snapshot', 'USDT')
+        
         # Создаем клавиатуру для других действий
         keyboard = [
             [
@@ -153,10 +157,10 @@ async def show_market_overview(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.edit_message_text("⏳ Загружаю данные о рынке...")
     
     try:
-        # Получаем данные о топовых активах
-        gainers = await fetch_top_gainers(10)
+        # Получаем данные о самых торгуемых активах
+        gainers = await fetch_market_overview(10)
         
-        if not gainers или len(gainers) == 0:
+        if not gainers or len(gainers) == 0:
             # Создаем клавиатуру для возврата
             keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="market")]]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -176,6 +180,7 @@ async def show_market_overview(update: Update, context: ContextTypes.DEFAULT_TYP
                 InlineKeyboardButton("🔄 Обновить", callback_data="market_overview"),
                 InlineKeyboardButton("📈 Топ растущих", callback_data="top_gainers")
             ],
+            [InlineKeyboardButton("🔗 Корреляции", callback_data="corr")],
             [InlineKeyboardButton("◀️ Назад", callback_data="market")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -186,7 +191,7 @@ async def show_market_overview(update: Update, context: ContextTypes.DEFAULT_TYP
             await context.bot.send_photo(
                 chat_id=update.effective_chat.id,
                 photo=chart_buffer,
-                caption="📊 *Обзор рынка криптовалют*\n\nИзменения цен за последние 24 часа.",
+                caption="📊 *Обзор рынка криптовалют*\n\nИзменения цен за последние 24 часа." + staleness_note('snapshot', 'USDT'),
                 reply_markup=reply_markup,
                 parse_mode="Markdown"
             )
@@ -197,10 +202,12 @@ async def show_market_overview(update: Update, context: ContextTypes.DEFAULT_TYP
             for i, ticker in enumerate(gainers[:5]):  # Показываем только первые 5
                 symbol = ticker['symbol'].split('/')[0]  # Берем только первую часть пары (без /USDT)
                 price = ticker['last']
-                change = ticker['percentage'] * 100  # Преобразуем в проценты
+                change = ticker.get('percentage') or 0  # ccxt отдаёт изменение уже в процентах
                 
                 message_text += f"{symbol}: ${price:.4f} ({change:+.2f}%)\n"
             
+            message_text += staleness_note('snapshot', 'USDT')
+            
             await query.edit_message_text(
                 message_text,
                 reply_markup=reply_markup,
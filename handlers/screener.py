@@ -0,0 +1,88 @@
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
+import logging
+import datetime
+from services.screener import screener, SCREENS
+
+# Настройка логгера
+logger = logging.getLogger(__name__)
+
+# Формат значения для каждого условия скринера
+VALUE_FORMATS = {
+    'oversold': "RSI {:.1f}",
+    'overbought': "RSI {:.1f}",
+    'squeeze': "ширина {:.2f}%",
+    'ma50_up': "{:+.2f}% от MA-50",
+    'ma50_down': "{:+.2f}% от MA-50",
+    'volume_spike': "объём x{:.1f} к среднему",
+    'vwap_up': "{:+.2f}% от VWAP",
+    'vwap_down': "{:+.2f}% от VWAP",
+    'poc': "{:+.2f}% от уровня",
+}
+
+def _screener_keyboard():
+    keyboard = [[InlineKeyboardButton(title, callback_data=f"screener_{screen}")]
+                for screen, title in SCREENS.items()]
+    return InlineKeyboardMarkup(keyboard)
+
+async def screener_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показывает условия скринера."""
+    message_text = (
+        "🧮 Скринер рынка\n\n"
+        f"Все USDT-пары, таймфрейм {screener.timeframe}.\n"
+        "Выберите условие:"
+    )
+    query = update.callback_query
+    if query:
+        await query.answer()
+        await query.edit_message_text(message_text, reply_markup=_screener_keyboard())
+    else:
+        await update.message.reply_text(message_text, reply_markup=_screener_keyboard())
+
+async def handle_screener_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показывает пары, удовлетворяющие выбранному условию, из готового результата скринера."""
+    query = update.callback_query
+    await query.answer()
+
+    screen = query.data.replace("screener_", "")
+    if screen not in SCREENS:
+        return
+
+    keyboard = [
+        [InlineKeyboardButton("🔄 Обновить", callback_data=f"screener_{screen}")],
+        [InlineKeyboardButton("◀️ Назад", callback_data="screener")]
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    if not screener.ready:
+        await query.edit_message_text(
+            "⏳ Скринер ещё собирает данные по рынку. Попробуйте через пару минут.",
+            reply_markup=reply_markup
+        )
+        return
+
+    matches = screener.top(screen, 10)
+    updated = datetime.datetime.fromtimestamp(screener.updated_at).strftime('%H:%M')
+    message_text = f"🧮 *{SCREENS[screen]}* ({screener.timeframe})\n\n"
+    if matches:
+        for i, item in enumerate(matches):
+            symbol = item['symbol'].split('/')[0]
+            value = VALUE_FORMATS[screen].format(item['value'])
+            message_text += f"{i+1}. *{symbol}*: ${item['price']:.4f} — {value}\n"
+    else:
+        message_text += "Подходящих пар сейчас нет.\n"
+    message_text += f"\nПроверено пар: {screener.scanned}, обновлено в {updated}"
+
+    try:
+        await query.edit_message_text(message_text, reply_markup=reply_markup, parse_mode="Markdown")
+    except Exception as e:
+        # Telegram не даёт отредактировать сообщение без изменений
+        logger.debug(f"Сообщение скринера не изменено: {e}")
+
+def get_screener_handlers():
+    """Возвращает обработчики для скринера."""
+    return [
+        CommandHandler("screener", screener_command),
+        CallbackQueryHandler(screener_command, pattern="^screener$"),
+        CallbackQueryHandler(handle_screener_selection, pattern="^screener_")
+    ]
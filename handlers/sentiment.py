@@ -1,7 +1,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 import logging
-from services.bybit_api import fetch_market_sentiment, fetch_top_gainers, fetch_top_losers
+from services.bybit_api import fetch_market_sentiment, fetch_top_gainers, fetch_top_losers, staleness_note
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -41,8 +41,8 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # На основе соотношения растущих и падающих определяем общее настроение
         if gainers and losers:
             # Подсчитываем средний процент изменения для топовых активов
-            avg_gainers_change = sum(ticker['percentage'] * 100 for ticker in gainers) / len(gainers)
-            avg_losers_change = sum(ticker['percentage'] * 100 for ticker in losers) / len(losers)
+            avg_gainers_change = sum(ticker.get('percentage') or 0 for ticker in gainers) / len(gainers)
+            avg_losers_change = sum(ticker.get('percentage') or 0 for ticker in losers) / len(losers)
             
             # Определяем настроение на основе изменений
             if avg_gainers_change > abs(avg_losers_change) * 1.5:
@@ -70,7 +70,7 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message_text += "📈 *Топ растущих активов:*\n"
             for ticker in gainers:
                 symbol = ticker['symbol'].split('/')[0]
-                change = ticker['percentage'] * 100
+                change = ticker.get('percentage') or 0
                 message_text += f"• {symbol}: {change:+.2f}%\n"
             message_text += "\n"
         
@@ -79,10 +79,12 @@ async def sentiment_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message_text += "📉 *Топ падающих активов:*\n"
             for ticker in losers:
                 symbol = ticker['symbol'].split('/')[0]
-                change = ticker['percentage'] * 100
+                change = ticker.get('percentage') or 0
                 message_text += f"• {symbol}: {change:+.2f}%\n"
             message_text += "\n"
         
+        message_text += staleness_note('snapshot', 'USDT')
+        
         # Добавляем рекомендации на основе настроения
         if market_mood == "🟢 *Бычье*":
             message_text += (
@@ -7,6 +7,7 @@ from handlers.sentiment import sentiment_command
 from handlers.info import info_command
 from handlers.support import support_command
 from handlers.donate import donate_command
+from handlers.screener import screener_command
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,8 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     main_menu = [
         [KeyboardButton("📊 Анализ"), KeyboardButton("💹 Рынок")],
         [KeyboardButton("🔍 Сентимент"), KeyboardButton("ℹ️ Информация")],
-        [KeyboardButton("🛟 Поддержка"), KeyboardButton("💰 Донат")],
-        [KeyboardButton("◀️ Назад")]
+        [KeyboardButton("🧮 Скринер"), KeyboardButton("🛟 Поддержка")],
+        [KeyboardButton("💰 Донат"), KeyboardButton("◀️ Назад")]
     ]
     reply_markup = ReplyKeyboardMarkup(main_menu, resize_keyboard=True)
     
@@ -31,6 +32,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "• Анализировать графики криптовалют\n"
         "• Показывать информацию о рынке\n"
         "• Отслеживать настроение рынка\n"
+        "• Искать пары по техническим условиям (скринер)\n"
         "• Предоставлять аналитическую информацию\n\n"
         "Выберите функцию:"
     )
@@ -47,6 +49,8 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await market_command(update, context)
     elif user_input == "🔍 Сентимент":
         await sentiment_command(update, context)
+    elif user_input == "🧮 Скринер":
+        await screener_command(update, context)
     elif user_input == "ℹ️ Информация":
         await info_command(update, context)
     elif user_input == "🛟 Поддержка":
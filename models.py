@@ -231,6 +231,12 @@ class TradingSignal(db.Model):
     indicators = db.Column(db.Text, nullable=True)  # JSON с показателями индикаторов
     created_at = db.Column(db.DateTime, default=datetime.now)
     is_sent = db.Column(db.Boolean, default=False)  # Был ли сигнал отправлен пользователям
+    candle_timestamp = db.Column(db.BigInteger, nullable=True)  # Время открытия свечи сигнала (мс)
+    
+    # Один сигнал каждого типа на свечу
+    __table_args__ = (
+        db.Index('ix_trading_signals_candle', 'symbol', 'timeframe', 'signal_type', 'candle_timestamp', unique=True),
+    )
     
     def __repr__(self):
         return f'<TradingSignal {self.symbol} {self.timeframe} {self.signal_type}>'
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config.config import BACKFILL_CONCURRENCY, BACKFILL_PAGE_LIMIT, CACHE_MAX_ENTRIES
+from database.database import get_backfilled_pages, get_candles_range, mark_backfill_page, save_candles
+from services.bybit_api import bybit_api
+from services.cache import AsyncTTLCache
+from services.rate_limiter import PRIORITY_BACKGROUND
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+class BackfillJob:
+    """Загрузка истории свечей за произвольный интервал постранично.
+
+    Интервал [start, end) покрывается страницами по BACKFILL_PAGE_LIMIT свечей,
+    страницы загружаются параллельно через общий планировщик запросов и сразу
+    сохраняются в локальное хранилище. Границы страниц кратны длине страницы
+    от начала эпохи и не зависят от start, поэтому одна и та же страница
+    узнаётся при любом запрошенном интервале. Полностью загруженные закрытые
+    страницы запоминаются, и прерванную или повторную загрузку можно продолжить.
+    """
+
+    def __init__(self, symbol: str, timeframe: str, start: int, end: Optional[int] = None,
+                 page_limit: int = BACKFILL_PAGE_LIMIT, concurrency: int = BACKFILL_CONCURRENCY,
+                 priority: int = PRIORITY_BACKGROUND):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.step = timeframe_to_ms(timeframe)
+        self.start = start - start % self.step
+        self.end = end if end is not None else int(time.time() * 1000)
+        self.page_limit = page_limit
+        self.concurrency = concurrency
+        self.priority = priority
+
+    def pages(self) -> List[Tuple[int, int]]:
+        """Границы страниц [начало, конец) в миллисекундах, выровненные по сетке от начала эпохи."""
+        page_span = self.page_limit * self.step
+        first = self.start - self.start % page_span
+        return [(page_start, page_start + page_span) for page_start in range(first, self.end, page_span)]
+
+    async def run(self) -> Dict[str, Any]:
+        """Загрузка недостающих страниц. Возвращает статистику загрузки и найденные пропуски."""
+        started = time.perf_counter()
+        done_pages = get_backfilled_pages(self.symbol, self.timeframe)
+        pending = [page for page in self.pages() if page[0] not in done_pages]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._fetch_page(page, semaphore) for page in pending))
+
+        fetched = sum(count for count in results if count is not None)
+        failed = sum(1 for count in results if count is None)
+        elapsed = time.perf_counter() - started
+        report = {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'pages': len(pending),
+            'skipped_pages': len(self.pages()) - len(pending),
+            'failed_pages': failed,
+            'candles': fetched,
+            'elapsed': elapsed,
+            'candles_per_second': fetched / elapsed if elapsed > 0 else 0.0,
+            'gaps': self.find_gaps(),
+        }
+        logger.info(f"Загрузка истории {self.symbol} {self.timeframe}: {fetched} свечей, "
+                    f"{report['candles_per_second']:.0f} свечей/с, страниц с ошибкой: {failed}, "
+                    f"пропусков: {len(report['gaps'])}")
+        return report
+
+    def find_gaps(self) -> List[Tuple[int, int]]:
+        """Интервалы [начало, конец) внутри диапазона, для которых в хранилище нет свечей."""
+        stored = get_candles_range(self.symbol, self.timeframe, self.start, self.end)
+        if not stored:
+            return [(self.start, self.end)] if self.end > self.start else []
+        timestamps = np.array([candle[0] for candle in stored], dtype=np.int64)
+        jumps = np.flatnonzero(np.diff(timestamps) > self.step)
+        gaps = [(int(timestamps[i] + self.step), int(timestamps[i + 1])) for i in jumps]
+        if timestamps[0] > self.start:
+            gaps.insert(0, (self.start, int(timestamps[0])))
+        if timestamps[-1] + self.step < self.end:
+            gaps.append((int(timestamps[-1] + self.step), self.end))
+        return gaps
+
+    async def _fetch_page(self, page: Tuple[int, int], semaphore: asyncio.Semaphore) -> Optional[int]:
+        """Загрузка одной страницы и сохранение её в хранилище."""
+        page_start, page_end = page
+        async with semaphore:
+            candles = await bybit_api.fetch_ohlcv_page(self.symbol, self.timeframe, since=page_start,
+                                                       limit=self.page_limit, until=page_end - 1,
+                                                       priority=self.priority)
+        if candles is None:
+            return None
+        # Убираем свечи за пределами страницы и дубликаты на стыках страниц
+        unique = {candle[0]: candle for candle in candles if page_start <= candle[0] < page_end}
+        save_candles(self.symbol, self.timeframe, list(unique.values()))
+        # Страница с текущей незакрытой свечой ещё будет дополняться
+        if page_end <= time.time() * 1000:
+            mark_backfill_page(self.symbol, self.timeframe, page_start, page_end)
+        return len(unique)
+
+async def load_history(symbol: str, timeframe: str, start: int, end: Optional[int] = None,
+                       priority: int = PRIORITY_BACKGROUND) -> List:
+    """Загрузка истории свечей за интервал (с докачкой недостающего) из локального хранилища."""
+    job = BackfillJob(symbol, timeframe, start, end, priority=priority)
+    await job.run()
+    return get_candles_range(symbol, timeframe, job.start, job.end)
+
+# Глубина истории базовых таймфреймов, достаточная для построения 50 свечей до 1w включительно
+PREFETCH_HISTORY = {'1m': 1000, '1h': 9000}
+PREFETCH_INTERVAL = 600  # Не чаще одного раза в 10 минут для одной пары
+
+# Пары, для которых загрузка запускалась за последние PREFETCH_INTERVAL секунд
+_prefetched = AsyncTTLCache(max_entries=CACHE_MAX_ENTRIES)
+_prefetch_tasks: Set[asyncio.Task] = set()
+
+async def prefetch_history(symbol: str):
+    """Фоновая загрузка истории базовых таймфреймов, из которых строятся старшие таймфреймы."""
+    now = int(time.time() * 1000)
+    for timeframe, depth in PREFETCH_HISTORY.items():
+        try:
+            await BackfillJob(symbol, timeframe, now - depth * timeframe_to_ms(timeframe), now).run()
+        except Exception as e:
+            logger.error(f"Ошибка при фоновой загрузке истории {symbol} {timeframe}: {e}")
+
+def schedule_prefetch(symbol: str) -> Optional[asyncio.Task]:
+    """Запуск prefetch_history в фоне, если для пары она давно не выполнялась."""
+    if _prefetched.get(symbol) is not None:
+        return None
+    _prefetched.set(symbol, time.time(), PREFETCH_INTERVAL)
+    task = asyncio.create_task(prefetch_history(symbol))
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_tasks.discard)
+    return task
+
+async def stop_prefetch():
+    """Отмена незавершённых фоновых загрузок истории (при остановке бота)."""
+    tasks = list(_prefetch_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,140 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.config import BACKTEST_DAYS, BACKTEST_FEE, BACKTEST_MAX_CANDLES
+from services.indicators import rsi, sma
+from services.ohlcv import to_array
+from services.rate_limiter import PRIORITY_INTERACTIVE
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Стратегия возврата к среднему: покупка при RSI ниже rsi_lower, продажа при RSI выше rsi_upper.
+# При ma_period > 0 покупка только выше скользящей средней (фильтр тренда).
+DEFAULT_PARAMS = {
+    'rsi_period': 14,
+    'rsi_lower': 30,
+    'rsi_upper': 70,
+    'ma_period': 0,
+    'fee': BACKTEST_FEE,
+}
+
+def strategy_signals(closes: np.ndarray, params: Dict[str, Any]):
+    """Векторные сигналы входа и выхода на закрытии каждой свечи."""
+    values = rsi(closes, params['rsi_period'])
+    entries = values < params['rsi_lower']
+    exits = values > params['rsi_upper']
+    if params.get('ma_period'):
+        entries &= closes > sma(closes, params['ma_period'])
+    return entries, exits
+
+def find_trades(entries: np.ndarray, exits: np.ndarray) -> List[List[int]]:
+    """Сделки [свеча входа, свеча выхода] по сигналам; исполнение — по открытию следующей свечи.
+
+    Цикл идёт только по свечам с сигналом. Незакрытая к концу ряда сделка
+    получает свечу выхода None.
+    """
+    n = len(entries)
+    trades, entry = [], None
+    for i in np.flatnonzero(entries | exits):
+        if i + 1 >= n:
+            break
+        if entry is None and entries[i]:
+            entry = i + 1
+        elif entry is not None and exits[i]:
+            trades.append([entry, i + 1])
+            entry = None
+    if entry is not None:
+        trades.append([entry, None])
+    return trades
+
+def backtest(candles: np.ndarray, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Бэктест по массиву свечей (n, 6). Возвращает метрики, сделки и кривую доходности."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    timestamps, opens, closes = candles[:, 0], candles[:, 1], candles[:, 4]
+    n = len(closes)
+    entries, exits = strategy_signals(closes, params)
+    trades = find_trades(entries, exits)
+
+    # Доходность по свечам: свеча входа — от открытия до закрытия, далее — от закрытия
+    # до закрытия, свеча выхода — от предыдущего закрытия до открытия
+    returns = np.zeros(n)
+    factors = np.ones(n)
+    holding = np.zeros(n, dtype=bool)
+    if trades:
+        entry_index = np.array([trade[0] for trade in trades])
+        exit_index = np.array([trade[1] if trade[1] is not None else n for trade in trades])
+        steps = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(steps, entry_index, 1)
+        np.add.at(steps, exit_index, -1)
+        holding = np.cumsum(steps[:-1]).astype(bool)
+
+        previous_close = np.r_[closes[0], closes[:-1]]
+        returns = np.where(holding, closes / previous_close - 1, 0.0)
+        returns[entry_index] = closes[entry_index] / opens[entry_index] - 1
+        closed = exit_index < n
+        returns[exit_index[closed]] = opens[exit_index[closed]] / closes[exit_index[closed] - 1] - 1
+        factors[entry_index] *= 1 - params['fee']
+        factors[exit_index[closed]] *= 1 - params['fee']
+
+    equity = np.cumprod((1 + returns) * factors)
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+
+    trade_list = []
+    for entry, exit_ in trades:
+        exit_price = opens[exit_] if exit_ is not None else closes[-1]
+        result = exit_price / opens[entry] * (1 - params['fee']) ** (2 if exit_ is not None else 1) - 1
+        trade_list.append({
+            'entry_time': int(timestamps[entry]),
+            'exit_time': int(timestamps[exit_]) if exit_ is not None else None,
+            'entry_price': float(opens[entry]),
+            'exit_price': float(exit_price),
+            'return': float(result),
+        })
+    closed_returns = np.array([trade['return'] for trade in trade_list if trade['exit_time'] is not None])
+    gains, losses = closed_returns[closed_returns > 0].sum(), -closed_returns[closed_returns < 0].sum()
+
+    return {
+        'params': params,
+        'candles': n,
+        'total_return': float(equity[-1] - 1) if n else 0.0,
+        'buy_and_hold': float(closes[-1] / opens[0] - 1) if n else 0.0,
+        'max_drawdown': float(drawdown.max()) if n else 0.0,
+        'trades': len(closed_returns),
+        'win_rate': float((closed_returns > 0).mean()) if len(closed_returns) else 0.0,
+        'avg_trade': float(closed_returns.mean()) if len(closed_returns) else 0.0,
+        'profit_factor': float(gains / losses) if losses > 0 else None,
+        'exposure': float(np.count_nonzero(holding) / n) if n else 0.0,
+        'trade_list': trade_list,
+        'timestamps': timestamps,
+        'closes': closes,
+        'equity': equity,
+    }
+
+async def run_backtest(symbol: str, timeframe: str, params: Optional[Dict[str, Any]] = None,
+                       days: int = BACKTEST_DAYS, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """Бэктест по истории пары, догружаемой в локальное хранилище при необходимости.
+
+    По умолчанию история догружается с приоритетом запросов пользователя:
+    бэктест запускается из бота, и пользователь ждёт ответа.
+    """
+    # Импорт здесь: модуль загружается процессами перебора параметров, клиент биржи им не нужен
+    from services.backfill import load_history
+
+    step = timeframe_to_ms(timeframe)
+    now = int(time.time() * 1000)
+    start = now - min(days * 86_400_000, BACKTEST_MAX_CANDLES * step)
+    candles = await load_history(symbol, timeframe, start, priority=priority)
+    if len(candles) < 50:
+        logger.warning(f"Недостаточно истории для бэктеста {symbol} {timeframe}: {len(candles)} свечей")
+        return None
+
+    started = time.perf_counter()
+    result = backtest(to_array(candles), params)
+    logger.info(f"Бэктест {symbol} {timeframe}: {len(candles)} свечей за "
+                f"{(time.perf_counter() - started) * 1000:.1f} мс, сделок: {result['trades']}, "
+                f"доходность: {result['total_return']:+.2%}")
+    return result
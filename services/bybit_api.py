@@ -1,8 +1,22 @@
 import ccxt.async_support as ccxt
 import logging
 import asyncio
-from config.config import BYBIT_API_KEY, BYBIT_SECRET
-from typing import Optional, List, Dict, Any
+from config.config import (BYBIT_API_KEY, BYBIT_SECRET, API_RATE_LIMIT, API_TIMEOUT, CACHE_MAX_ENTRIES,
+                           CACHE_TICKER_TTL, OHLCV_BATCH_CONCURRENCY, MARKETS_CACHE_PATH, MARKETS_REFRESH_INTERVAL,
+                           CIRCUIT_ERROR_THRESHOLD, CIRCUIT_MIN_CALLS, CIRCUIT_WINDOW, CIRCUIT_PROBE_INTERVAL)
+from services.cache import AsyncTTLCache
+from services.indicator_cache import indicator_cache
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.markets import MarketSnapshot
+from services.symbol_index import SymbolIndex
+from services.rate_limiter import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from services.ohlcv import align_ohlcv, to_array
+from services.resample import can_resample, resample_ohlcv
+from services.timeframes import timeframe_to_seconds, timeframe_to_ms
+from database.database import get_candles, save_candles
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Hashable, Tuple
+from datetime import datetime
+import numpy as np
 import time
 import os
 
@@ -10,82 +24,356 @@ import os
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Сколько последних базовых свечей досинхронизируется с биржей перед построением старшего таймфрейма
+RESAMPLE_SYNC_LIMIT = 50
+# Сколько хранится отметка о синхронизации свечей с биржей, с (не меньше наибольшего TTL кэша свечей)
+SYNC_MARK_TTL = 60
+
+def resample_base(timeframe: str) -> Optional[str]:
+    """Базовый таймфрейм для построения timeframe: 1m для таймфреймов меньше часа, иначе 1h."""
+    base = '1m' if timeframe_to_ms(timeframe) < timeframe_to_ms('1h') else '1h'
+    return base if can_resample(base, timeframe) else None
+
+def ohlcv_cache_ttl(timeframe: str) -> float:
+    """TTL кэша свечей: 1/60 длительности таймфрейма, но от 2 до 60 секунд."""
+    return min(max(timeframe_to_seconds(timeframe) / 60, 2), 60)
+
 class BybitAPI:
     def __init__(self):
         """Инициализация соединения с Bybit API."""
         if not BYBIT_API_KEY or not BYBIT_SECRET:
             logger.warning("API-ключи Bybit не указаны или недействительны. Работаем в режиме без аутентификации.")
         
-        # В режиме без аутентификации
+        # В режиме без аутентификации. Частоту запросов ограничивает собственный планировщик,
+        # поэтому встроенный FIFO-ограничитель ccxt отключён.
         self.exchange = ccxt.bybit({
             'apiKey': BYBIT_API_KEY if BYBIT_API_KEY else None,
             'secret': BYBIT_SECRET if BYBIT_SECRET else None,
-            'enableRateLimit': True,
+            'enableRateLimit': False,
+            'timeout': API_TIMEOUT * 1000,
             'options': {'defaultType': 'future'}
         })
-        self._markets = None
-        self._last_market_update = 0
-        self._market_update_interval = 60 * 5  # 5 минут
+        self.limiter = RateLimiter(API_RATE_LIMIT)
+        self.markets = MarketSnapshot(self.exchange, MARKETS_CACHE_PATH, MARKETS_REFRESH_INTERVAL, self._exchange_call)
+        self._cache = AsyncTTLCache(max_entries=CACHE_MAX_ENTRIES)
+        # (символ, таймфрейм) -> время последней синхронизации сохранённых свечей с биржей
+        self._synced = AsyncTTLCache(max_entries=CACHE_MAX_ENTRIES)
+        self.circuit = CircuitBreaker(self._probe_exchange, CIRCUIT_ERROR_THRESHOLD, CIRCUIT_MIN_CALLS,
+                                      CIRCUIT_WINDOW, CIRCUIT_PROBE_INTERVAL)
+        self._stale_served: Dict[Hashable, float] = {}  # Ключ -> время данных, отданных из устаревшего кэша
+        self._symbol_index = SymbolIndex(None)
 
     async def get_markets(self, force_update=False) -> Optional[Dict[str, Any]]:
-        """Получение списка доступных рынков с кэшированием."""
-        current_time = time.time()
-        if (not self._markets or 
-            force_update or 
-            current_time - self._last_market_update > self._market_update_interval):
-            try:
-                self._markets = await self.exchange.load_markets()
-                self._last_market_update = current_time
-                logger.info("Список рынков обновлён")
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке рынков: {e}")
-                if not self._markets:  # Возвращаем None только если нет кэшированных данных
-                    return None
-        return self._markets
-
-    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', 
-                          limit: int = 100, retries: int = 3) -> Optional[List]:
-        """Получение OHLCV данных с повторными попытками при ошибке."""
-        for attempt in range(retries):
-            try:
-                await self.exchange.load_markets()
-                data = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-                logger.info(f"Получены данные OHLCV для {symbol}, таймфрейм {timeframe}")
-                return data
-            except ccxt.RequestTimeout:
-                logger.warning(f"Таймаут при получении OHLCV для {symbol}, попытка {attempt+1}/{retries}")
-                if attempt == retries - 1:
-                    logger.error(f"Превышено максимальное количество попыток для {symbol}")
+        """Получение списка доступных рынков из общего снимка."""
+        if force_update:
+            await self.markets.refresh(PRIORITY_INTERACTIVE)
+        return await self.markets.ensure_loaded()
+
+    async def is_valid_symbol(self, symbol: str) -> bool:
+        """Проверка, что символ существует и торгуется, по снимку рынков без запроса свечей.
+
+        Пока снимка нет (биржа недоступна и на диске ничего не сохранено), символ
+        считается допустимым: решение остаётся за запросом к бирже.
+        """
+        if await self.markets.ensure_loaded() is None:
+            return True
+        return self.markets.is_valid_symbol(symbol)
+
+    async def get_symbol_index(self) -> SymbolIndex:
+        """Индекс пар, перестраиваемый при обновлении снимка рынков."""
+        await self.markets.ensure_loaded()
+        if self._symbol_index.version != self.markets.version:
+            self._symbol_index = SymbolIndex(self.markets.markets, self.markets.version)
+            logger.info(f"Индекс пар перестроен: {len(self._symbol_index)} пар")
+        return self._symbol_index
+
+    def start_background_tasks(self):
+        """Запуск фоновых задач (обновление снимка рынков). Вызывается из работающего цикла событий."""
+        self.markets.start_background_refresh()
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', limit: int = 100,
+                          priority: int = PRIORITY_INTERACTIVE) -> Optional[List]:
+        """Получение OHLCV данных через общий кэш."""
+        return await self._cached(
+            ('ohlcv', symbol, timeframe, limit),
+            ohlcv_cache_ttl(timeframe),
+            lambda: self._fetch_ohlcv(symbol, timeframe, limit, priority),
+            fallback=lambda: self._stored_ohlcv(symbol, timeframe, limit)
+        )
+
+    async def fetch_ohlcv_many(self, symbols: List[str], timeframe: str = '1h', limit: int = 100,
+                               concurrency: Optional[int] = None,
+                               priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """Параллельное получение свечей для нескольких символов с ограничением числа одновременных запросов.
+
+        Возвращает исходные свечи по символам ('data'), ошибки по символам ('errors')
+        и матрицы OHLCV, выровненные по общей шкале времени (см. align_ohlcv).
+        """
+        semaphore = asyncio.Semaphore(concurrency or OHLCV_BATCH_CONCURRENCY)
+
+        async def fetch_one(symbol: str):
+            async with semaphore:
+                try:
+                    return await self.fetch_ohlcv(symbol, timeframe, limit, priority=priority)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+        data, errors = {}, {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors[symbol] = str(result)
+            elif not result:
+                errors[symbol] = "Нет данных"
+            else:
+                data[symbol] = result
+        if errors:
+            logger.warning(f"Не удалось получить свечи для {len(errors)} из {len(symbols)} символов")
+
+        batch = align_ohlcv(data)
+        batch['data'] = data
+        batch['errors'] = errors
+        return batch
+
+    async def _fetch_ohlcv(self, symbol: str, timeframe: str, limit: int, priority: int) -> Optional[List]:
+        """Получение OHLCV данных из локального хранилища с докачкой только новых свечей."""
+        derived = await self._resample_from_store(symbol, timeframe, limit, priority)
+        if derived is not None:
+            return derived
+
+        stored = get_candles(symbol, timeframe, limit)
+        if len(stored) >= limit:
+            last_timestamp = stored[-1][0]
+            missing = (int(time.time() * 1000) - last_timestamp) // timeframe_to_ms(timeframe) + 1
+            if missing < limit:
+                # Последняя сохранённая свеча могла быть незакрытой, поэтому запрашиваем и её
+                fresh = await self._request_ohlcv(symbol, timeframe, limit=missing + 1,
+                                                  since=last_timestamp, priority=priority)
+                if fresh is None:
                     return None
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"Ошибка при получении OHLCV для {symbol}: {e}")
+                save_candles(symbol, timeframe, fresh)
+                self._synced.set((symbol, timeframe), time.time(), SYNC_MARK_TTL)
+                merged = {candle[0]: candle for candle in stored}
+                merged.update((candle[0], candle) for candle in fresh)
+                return [merged[timestamp] for timestamp in sorted(merged)][-limit:]
+
+        data = await self._request_ohlcv(symbol, timeframe, limit=limit, priority=priority)
+        if data:
+            save_candles(symbol, timeframe, data)
+            self._synced.set((symbol, timeframe), time.time(), SYNC_MARK_TTL)
+        return data
+
+    async def _resample_from_store(self, symbol: str, timeframe: str, limit: int,
+                                   priority: int) -> Optional[List]:
+        """Построение свечей старшего таймфрейма из сохранённых свечей базового (см. resample_base).
+
+        Базовый таймфрейм используется, только если в хранилище достаточно его истории;
+        история читается один раз в отдельном потоке. Если базовые свечи синхронизировались
+        с биржей не раньше TTL кэша свечей timeframe (например, при расчёте предыдущего
+        таймфрейма), свечи строятся без запроса к бирже; иначе последние базовые свечи
+        досинхронизируются одним запросом. Возвращает None, если подходящей истории нет.
+        """
+        base = resample_base(timeframe)
+        if base is None:
+            return None
+        base_ms = timeframe_to_ms(base)
+        # Одна лишняя старшая свеча — запас на неполный первый интервал
+        needed = (limit + 1) * (timeframe_to_ms(timeframe) // base_ms)
+        stored = await asyncio.to_thread(get_candles, symbol, base, needed)
+        if len(stored) < needed:
+            return None
+
+        synced_at = self._synced.get((symbol, base))
+        if synced_at is None or time.time() - synced_at > ohlcv_cache_ttl(timeframe):
+            fresh = await self.fetch_ohlcv(symbol, base, RESAMPLE_SYNC_LIMIT, priority=priority)
+            if fresh is None:
+                return None
+            merged = {candle[0]: candle for candle in stored}
+            merged.update((candle[0], candle) for candle in fresh)
+            stored = [merged[timestamp] for timestamp in sorted(merged)][-needed:]
+            source = "после синхронизации последних свечей"
+        else:
+            source = "без запроса к бирже"
+
+        candles = to_array(stored)
+        # Строим только по непрерывному хвосту истории
+        breaks = np.flatnonzero(np.diff(candles[:, 0]) != base_ms)
+        if len(breaks):
+            candles = candles[breaks[-1] + 1:]
+        resampled = resample_ohlcv(candles, base, timeframe)
+        if len(resampled) < limit:
+            return None
+        logger.info(f"Свечи {symbol} {timeframe} построены из {base} {source}")
+        return [[int(row[0])] + row[1:] for row in resampled[-limit:].tolist()]
+
+    async def fetch_ohlcv_page(self, symbol: str, timeframe: str, since: int, limit: int,
+                               until: Optional[int] = None,
+                               priority: int = PRIORITY_BACKGROUND) -> Optional[List]:
+        """Получение одной страницы свечей начиная с since напрямую с биржи, без кэша и хранилища."""
+        return await self._request_ohlcv(symbol, timeframe, limit=limit, since=since, until=until,
+                                         priority=priority)
+
+    async def _request_ohlcv(self, symbol: str, timeframe: str, limit: int, since: Optional[int] = None,
+                             until: Optional[int] = None,
+                             priority: int = PRIORITY_INTERACTIVE) -> Optional[List]:
+        """Получение OHLCV данных с биржи."""
+        try:
+            if not await self._markets_ready():
                 return None
+            started = time.perf_counter()
+            params = {'until': until} if until is not None else {}
+            data = await self._exchange_call(priority, self.exchange.fetch_ohlcv, symbol, timeframe,
+                                             since=since, limit=limit, params=params)
+            logger.info(f"Получены данные OHLCV для {symbol}, таймфрейм {timeframe}, свечей: {len(data)} "
+                        f"за {(time.perf_counter() - started) * 1000:.0f} мс")
+            return data
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка при получении OHLCV для {symbol}: {e}")
+            return None
+
+    async def _markets_ready(self) -> bool:
+        """Загрузка рынков через MarketSnapshot перед запросом к бирже.
+
+        Без загруженных рынков ccxt сам вызвал бы load_markets внутри запроса, минуя
+        сохранённый снимок и планировщик запросов, поэтому запрос в этом случае не
+        выполняется. При разомкнутой цепи запрос отклоняется сразу (CircuitOpenError),
+        не дожидаясь загрузки рынков.
+        """
+        self.circuit.check()
+        if await self.markets.ensure_loaded() is None:
+            logger.warning("Снимок рынков недоступен, запрос к бирже не выполняется")
+            return False
+        return True
 
-    async def fetch_ticker(self, symbol: str) -> Optional[Dict]:
-        """Получение текущих данных тикера для указанного символа."""
+    def _stored_ohlcv(self, symbol: str, timeframe: str, limit: int) -> Optional[Tuple[List, float]]:
+        """Последние сохранённые свечи и время последней из них — для работы без биржи."""
+        stored = get_candles(symbol, timeframe, limit)
+        if not stored:
+            return None
+        return stored, stored[-1][0] / 1000
+
+    async def fetch_ticker(self, symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict]:
+        """Получение текущих данных тикера через общий кэш."""
+        return await self._cached(
+            ('ticker', symbol, None, None),
+            CACHE_TICKER_TTL,
+            lambda: self._fetch_ticker(symbol, priority)
+        )
+
+    async def _fetch_ticker(self, symbol: str, priority: int) -> Optional[Dict]:
+        """Получение текущих данных тикера для указанного символа с биржи."""
         try:
-            ticker = await self.exchange.fetch_ticker(symbol)
+            if not await self._markets_ready():
+                return None
+            ticker = await self._exchange_call(priority, self.exchange.fetch_ticker, symbol)
             logger.info(f"Получены данные тикера для {symbol}")
             return ticker
+        except CircuitOpenError:
+            return None
         except Exception as e:
             logger.error(f"Ошибка при получении тикера для {symbol}: {e}")
             return None
 
+    async def fetch_market_snapshot(self, quote: str = 'USDT',
+                                    priority: int = PRIORITY_INTERACTIVE) -> Optional[List[Dict]]:
+        """Получение снимка рынка через общий кэш."""
+        return await self._cached(
+            ('snapshot', quote, None, None),
+            CACHE_TICKER_TTL,
+            lambda: self._fetch_market_snapshot(quote, priority)
+        )
+
+    async def _fetch_market_snapshot(self, quote: str, priority: int) -> Optional[List[Dict]]:
+        """Получение тикеров всех спотовых пар с указанной котируемой валютой одним запросом."""
+        try:
+            if not await self._markets_ready():
+                return None
+            tickers = await self._exchange_call(priority, self.exchange.fetch_tickers, params={'type': 'spot'})
+            suffix = f"/{quote}"
+            snapshot = [ticker for symbol, ticker in tickers.items() if symbol.endswith(suffix)]
+            logger.info(f"Получен снимок рынка: {len(snapshot)} пар {quote}")
+            return snapshot
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка при получении снимка рынка: {e}")
+            return None
+
+    def stale_since(self, kind: str, symbol: str, timeframe: Optional[str] = None,
+                    limit: Optional[int] = None) -> Optional[float]:
+        """Время данных, если последний ответ по ключу был отдан из устаревшего кэша, иначе None."""
+        return self._stale_served.get((kind, symbol, timeframe, limit))
+
+    async def _cached(self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]],
+                      fallback: Optional[Callable[[], Optional[Tuple[Any, float]]]] = None) -> Any:
+        """Кэшированный запрос; при ошибке или разомкнутой цепи отдаются последние известные данные."""
+        value = await self._cache.get_or_load(key, ttl, loader)
+        if value is not None:
+            self._stale_served.pop(key, None)
+            return value
+
+        stale = self._cache.get_stale(key) or (fallback() if fallback else None)
+        if stale is None:
+            return None
+        value, stored_at = stale
+        self._stale_served[key] = stored_at
+        logger.warning(f"Биржа недоступна, отдаём данные {key} от {datetime.fromtimestamp(stored_at):%H:%M:%S}")
+        return value
+
+    async def _exchange_call(self, priority: int, method: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Запрос к бирже через выключатель и планировщик запросов."""
+        self.circuit.check()
+        await self.limiter.acquire(priority)
+        try:
+            result = await method(*args, **kwargs)
+        except ccxt.NetworkError:
+            self.circuit.record_failure()
+            raise
+        self.circuit.record_success()
+        return result
+
+    async def _probe_exchange(self):
+        """Лёгкий запрос для проверки восстановления биржи."""
+        await self.limiter.acquire(PRIORITY_BACKGROUND)
+        await self.exchange.fetch_time()
+
     async def fetch_market_info(self, symbol: str) -> Optional[Dict]:
         """Получение информации о рынке для указанного символа."""
         try:
-            markets = await self.get_markets()
-            if not markets or symbol not in markets:
-                logger.error(f"Рынок {symbol} не найден")
+            await self.get_markets()
+            if not self.markets.is_valid_symbol(symbol):
+                logger.error(f"Рынок {symbol} не найден или не торгуется")
                 return None
-            return markets[symbol]
+            return self.markets.market(symbol)
         except Exception as e:
             logger.error(f"Ошибка при получении информации о рынке {symbol}: {e}")
             return None
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Статистика кэша запросов к бирже (попадания, промахи, объединённые запросы)."""
+        return self._cache.stats()
+
+    def limiter_stats(self) -> Dict[str, Any]:
+        """Глубина очередей и время ожидания планировщика запросов по приоритетам."""
+        return self.limiter.stats()
+
+    def circuit_stats(self) -> Dict[str, Any]:
+        """Состояние выключателя запросов к бирже."""
+        return self.circuit.stats()
+
+    def markets_stats(self) -> Dict[str, Any]:
+        """Состояние снимка рынков, включая длительность последней загрузки с биржи."""
+        return self.markets.stats()
+
     async def close(self):
         """Безопасное закрытие соединения с биржей."""
+        logger.info(f"Статистика кэша Bybit: {self.cache_stats()}")
+        logger.info(f"Статистика планировщика запросов Bybit: {self.limiter_stats()}")
+        logger.info(f"Статистика кэша индикаторов: {indicator_cache.stats()}")
+        await self.markets.stop_background_refresh()
+        await self.circuit.close()
         try:
             await self.exchange.close()
             logger.info("Соединение с Bybit закрыто")
@@ -106,107 +394,57 @@ async def fetch_market_sentiment():
         logger.error(f"Ошибка при получении настроения рынка: {e}")
         return "Данные о настроении рынка временно недоступны"
 
+def _rank_tickers(tickers: List[Dict], field: str, reverse: bool, limit: int) -> List[Dict]:
+    """Сортировка тикеров снимка рынка по указанному полю."""
+    ranked = sorted(tickers, key=lambda ticker: ticker.get(field) or 0, reverse=reverse)
+    return ranked[:limit]
+
 async def fetch_top_gainers(limit=5):
     """Получение списка топовых растущих активов."""
     try:
-        markets = await bybit_api.get_markets()
-        if not markets:
-            logger.warning("Не удалось получить данные о рынках. Возвращаем пример данных.")
-            # Возвращаем пример данных, когда API недоступно
-            return [
-                {"symbol": "BTC/USDT", "last": 67000, "percentage": 2.5},
-                {"symbol": "ETH/USDT", "last": 3500, "percentage": 1.8},
-                {"symbol": "XRP/USDT", "last": 0.52, "percentage": 1.2},
-                {"symbol": "SOL/USDT", "last": 120, "percentage": 0.9},
-                {"symbol": "ADA/USDT", "last": 0.45, "percentage": 0.7}
-            ][:limit]
-        
-        # Получаем данные тикеров для основных криптовалют
-        tickers = []
-        symbols = [symbol for symbol in markets.keys() if '/USDT' in symbol][:20]  # Ограничиваем для производительности
-        
-        for symbol in symbols:
-            ticker = await bybit_api.fetch_ticker(symbol)
-            if ticker:
-                tickers.append(ticker)
-        
-        # Если не получили ни одного тикера, вернем пример данных
+        tickers = await bybit_api.fetch_market_snapshot()
         if not tickers:
-            logger.warning("Не удалось получить данные тикеров. Возвращаем пример данных.")
-            return [
-                {"symbol": "BTC/USDT", "last": 67000, "percentage": 2.5},
-                {"symbol": "ETH/USDT", "last": 3500, "percentage": 1.8},
-                {"symbol": "XRP/USDT", "last": 0.52, "percentage": 1.2},
-                {"symbol": "SOL/USDT", "last": 120, "percentage": 0.9},
-                {"symbol": "ADA/USDT", "last": 0.45, "percentage": 0.7}
-            ][:limit]
-        
-        # Сортируем по проценту изменения
-        tickers.sort(key=lambda x: x['percentage'] if 'percentage' in x else 0, reverse=True)
-        return tickers[:limit]
+            logger.warning("Не удалось получить снимок рынка")
+            return []
+        return _rank_tickers(tickers, 'percentage', True, limit)
     except Exception as e:
         logger.error(f"Ошибка при получении топовых растущих активов: {e}")
-        return [
-            {"symbol": "BTC/USDT", "last": 67000, "percentage": 2.5},
-            {"symbol": "ETH/USDT", "last": 3500, "percentage": 1.8},
-            {"symbol": "XRP/USDT", "last": 0.52, "percentage": 1.2},
-            {"symbol": "SOL/USDT", "last": 120, "percentage": 0.9},
-            {"symbol": "ADA/USDT", "last": 0.45, "percentage": 0.7}
-        ][:limit]
+        return []
 
 async def fetch_top_losers(limit=5):
     """Получение списка топовых падающих активов."""
     try:
-        markets = await bybit_api.get_markets()
-        if not markets:
-            logger.warning("Не удалось получить данные о рынках. Возвращаем пример данных.")
-            # Возвращаем пример данных, когда API недоступно
-            return [
-                {"symbol": "DOGE/USDT", "last": 0.12, "percentage": -2.1},
-                {"symbol": "LTC/USDT", "last": 75, "percentage": -1.8},
-                {"symbol": "DOT/USDT", "last": 6.2, "percentage": -1.4},
-                {"symbol": "LINK/USDT", "last": 14.2, "percentage": -1.2},
-                {"symbol": "MATIC/USDT", "last": 0.65, "percentage": -0.9}
-            ][:limit]
-        
-        # Получаем данные тикеров для основных криптовалют
-        tickers = []
-        symbols = [symbol for symbol in markets.keys() if '/USDT' in symbol][:20]  # Ограничиваем для производительности
-        
-        for symbol in symbols:
-            ticker = await bybit_api.fetch_ticker(symbol)
-            if ticker:
-                tickers.append(ticker)
-        
-        # Если не получили ни одного тикера, вернем пример данных
+        tickers = await bybit_api.fetch_market_snapshot()
         if not tickers:
-            logger.warning("Не удалось получить данные тикеров. Возвращаем пример данных.")
-            return [
-                {"symbol": "DOGE/USDT", "last": 0.12, "percentage": -2.1},
-                {"symbol": "LTC/USDT", "last": 75, "percentage": -1.8},
-                {"symbol": "DOT/USDT", "last": 6.2, "percentage": -1.4},
-                {"symbol": "LINK/USDT", "last": 14.2, "percentage": -1.2},
-                {"symbol": "MATIC/USDT", "last": 0.65, "percentage": -0.9}
-            ][:limit]
-        
-        # Сортируем по проценту изменения
-        tickers.sort(key=lambda x: x['percentage'] if 'percentage' in x else 0)
-        return tickers[:limit]
+            logger.warning("Не удалось получить снимок рынка")
+            return []
+        return _rank_tickers(tickers, 'percentage', False, limit)
     except Exception as e:
         logger.error(f"Ошибка при получении топовых падающих активов: {e}")
-        return [
-            {"symbol": "DOGE/USDT", "last": 0.12, "percentage": -2.1},
-            {"symbol": "LTC/USDT", "last": 75, "percentage": -1.8},
-            {"symbol": "DOT/USDT", "last": 6.2, "percentage": -1.4},
-            {"symbol": "LINK/USDT", "last": 14.2, "percentage": -1.2},
-            {"symbol": "MATIC/USDT", "last": 0.65, "percentage": -0.9}
-        ][:limit]
+        return []
+
+async def fetch_market_overview(limit=10):
+    """Получение самых торгуемых активов (по объёму в котируемой валюте) для обзора рынка."""
+    try:
+        tickers = await bybit_api.fetch_market_snapshot()
+        if not tickers:
+            logger.warning("Не удалось получить снимок рынка")
+            return []
+        return _rank_tickers(tickers, 'quoteVolume', True, limit)
+    except Exception as e:
+        logger.error(f"Ошибка при получении обзора рынка: {e}")
+        return []
 
 # Методы-обертки для упрощения импорта
 async def fetch_ohlcv_async(symbol: str, timeframe: str = '1m', limit: int = 100):
     """Обертка для метода fetch_ohlcv класса BybitAPI."""
     return await bybit_api.fetch_ohlcv(symbol, timeframe, limit)
 
+async def fetch_ohlcv_many(symbols: List[str], timeframe: str = '1h', limit: int = 100,
+                           concurrency: Optional[int] = None):
+    """Обертка для метода fetch_ohlcv_many класса BybitAPI."""
+    return await bybit_api.fetch_ohlcv_many(symbols, timeframe, limit, concurrency)
+
 async def fetch_ticker(symbol: str):
     """Обертка для метода fetch_ticker класса BybitAPI."""
     return await bybit_api.fetch_ticker(symbol)
@@ -215,6 +453,28 @@ async def fetch_markets():
     """Обертка для метода get_markets класса BybitAPI."""
     return await bybit_api.get_markets()
 
+def staleness_note(kind: str, symbol: str, timeframe: Optional[str] = None,
+                   limit: Optional[int] = None) -> str:
+    """Пометка для ответа пользователю, если данные отданы из кэша во время недоступности биржи."""
+    stale_at = bybit_api.stale_since(kind, symbol, timeframe, limit)
+    if stale_at is None:
+        return ""
+    return f"\n\n⚠️ Биржа недоступна, показаны данные от {datetime.fromtimestamp(stale_at):%d.%m %H:%M:%S}"
+
+async def is_valid_symbol(symbol: str) -> bool:
+    """Обертка для метода is_valid_symbol класса BybitAPI."""
+    return await bybit_api.is_valid_symbol(symbol)
+
+async def resolve_pair(query: str, quote: str = 'USDT') -> Optional[str]:
+    """Точное сопоставление ввода пользователя с существующей парой."""
+    index = await bybit_api.get_symbol_index()
+    return index.resolve(query, quote)
+
+async def search_pairs(query: str, limit: int = 6) -> List[str]:
+    """Поиск подходящих пар по вводу пользователя без запросов к бирже."""
+    index = await bybit_api.get_symbol_index()
+    return index.search(query, limit)
+
 async def close_connection():
     """Закрытие соединения с биржей."""
     await bybit_api.close()
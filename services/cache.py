@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def consume_task_exception(task: asyncio.Task):
+    """Помечает исключение загрузки как обработанное, если все ожидающие уже отменены."""
+    if not task.cancelled():
+        task.exception()
+
+class AsyncTTLCache:
+    """Кэш результатов асинхронных запросов с TTL и объединением одинаковых запросов.
+
+    Пока запрос по ключу выполняется, все остальные обращения с тем же ключом
+    ожидают его результат, а не отправляют собственный запрос на биржу.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self._entries: Dict[Hashable, Tuple[Any, float, float]] = {}  # ключ -> (значение, время сохранения, истекает)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получение неистёкшего значения из кэша без загрузки."""
+        entry = self._entries.get(key)
+        if entry and entry[2] > time.time():
+            return entry[0]
+        return None
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Получение последнего сохранённого значения и времени его сохранения, даже если TTL истёк."""
+        entry = self._entries.get(key)
+        return (entry[0], entry[1]) if entry else None
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Сохранение значения в кэш."""
+        now = time.time()
+        self._entries.pop(key, None)  # Перемещаем ключ в конец порядка вставки
+        self._entries[key] = (value, now, now + ttl)
+        if len(self._entries) > self._max_entries:
+            self._evict(now)
+
+    async def get_or_load(self, key: Hashable, ttl: float,
+                          loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Получение значения из кэша или его загрузка через loader.
+
+        Значение None считается ошибкой загрузки и не кэшируется. Загрузка
+        выполняется в отдельной задаче: отмена любого из ожидающих, в том числе
+        первого, не прерывает её для остальных.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._load(key, ttl, loader))
+            task.add_done_callback(consume_task_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика работы кэша."""
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'saved_requests': self.hits + self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / requests if requests else 0.0,
+        }
+
+    def _evict(self, now: float):
+        """Удаление самых старых записей при нехватке места.
+
+        Истёкшие записи не удаляются заранее: они служат последними известными
+        значениями на случай недоступности биржи.
+        """
+        while len(self._entries) > self._max_entries:
+            del self._entries[next(iter(self._entries))]
@@ -0,0 +1,61 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+
+# Доля шага между свечами, занимаемая телом свечи
+BODY_WIDTH = 0.7
+
+def candle_width(x: np.ndarray, share: float = BODY_WIDTH) -> float:
+    """Ширина тела свечи по медианному шагу между свечами."""
+    if len(x) < 2:
+        return share
+    return share * float(np.median(np.diff(x)))
+
+def candle_geometry(x, opens, highs, lows, closes, width: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Координаты фитилей (n, 2, 2), тел свечей (n, 4, 2) и маска растущих свечей."""
+    x, opens, highs, lows, closes = (np.asarray(values, dtype=np.float64) for values in (x, opens, highs, lows, closes))
+    n = len(x)
+    wicks = np.empty((n, 2, 2))
+    wicks[:, :, 0] = x[:, None]
+    wicks[:, 0, 1] = lows
+    wicks[:, 1, 1] = highs
+
+    rising = closes >= opens
+    bottom = np.minimum(opens, closes)
+    top = np.maximum(opens, closes)
+    left, right = x - width / 2, x + width / 2
+    bodies = np.empty((n, 4, 2))
+    bodies[:, 0] = np.column_stack([left, bottom])
+    bodies[:, 1] = np.column_stack([left, top])
+    bodies[:, 2] = np.column_stack([right, top])
+    bodies[:, 3] = np.column_stack([right, bottom])
+    return wicks, bodies, rising
+
+def draw_candles(ax, x, opens, highs, lows, closes, width: Optional[float] = None, up_color: str = 'green',
+                 down_color: str = 'red', wick_color: str = 'black', alpha: float = 0.8):
+    """Отрисовка свечей двумя коллекциями: все фитили — одна LineCollection, все тела — одна PolyCollection.
+
+    x — числовые координаты (для дат — matplotlib.dates.date2num). Возвращает (фитили, тела).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    width = width if width is not None else candle_width(x)
+    wicks, bodies, rising = candle_geometry(x, opens, highs, lows, closes, width)
+    colors = np.where(rising, up_color, down_color)
+
+    wick_collection = LineCollection(wicks, colors=wick_color, linewidths=1, zorder=2)
+    # Контур цвета тела оставляет видимой свечу с равными ценами открытия и закрытия
+    body_collection = PolyCollection(bodies, facecolors=colors, edgecolors=colors, linewidths=0.5, alpha=alpha,
+                                     zorder=3)
+    ax.add_collection(wick_collection)
+    ax.add_collection(body_collection)
+    ax.autoscale_view()
+    return wick_collection, body_collection
+
+def draw_volume(ax, x, volumes, rising, width: Optional[float] = None, up_color: str = 'green',
+                down_color: str = 'red', alpha: float = 0.5):
+    """Столбцы объёма одним вызовом bar с цветами по маске растущих свечей."""
+    x = np.asarray(x, dtype=np.float64)
+    width = width if width is not None else candle_width(x)
+    return ax.bar(x, np.nan_to_num(np.asarray(volumes, dtype=np.float64)), width=width,
+                  color=np.where(rising, up_color, down_color), alpha=alpha)
@@ -1,14 +1,19 @@
-import datetime
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Использование неинтерактивного бэкенда
 from io import BytesIO
 from services.bybit_api import fetch_ohlcv_async
+from services import indicators
+from services.chart_cache import chart_image_cache, chart_key
+from services.indicator_cache import indicator_cache
+from services.ohlcv import to_array
+from services.render_pool import chart_renderer
+from services.timeframes import timeframe_to_ms
 import logging
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Графики рисуются в пуле процессов (services.render_pool); здесь — загрузка данных
+# и расчёт индикаторов через общий кэш, в пул передаются только готовые массивы.
+
 async def generate_chart(symbol: str, timeframe: str, limit: int = 30, data=None):
     """Генерация графика свечей для криптовалюты."""
     try:
@@ -18,73 +23,77 @@ async def generate_chart(symbol: str, timeframe: str, limit: int = 30, data=None
                 logger.error(f"Недостаточно данных для построения графика {symbol}")
                 return None
         
-        # Создаем фигуру подходящего размера
-        plt.figure(figsize=(12, 6))
-        
-        # Конвертируем временные метки и извлекаем OHLC данные
-        times = [datetime.datetime.fromtimestamp(candle[0] / 1000) for candle in data]
-        opens = np.array([float(candle[1]) for candle in data])
-        highs = np.array([float(candle[2]) for candle in data])
-        lows = np.array([float(candle[3]) for candle in data])
-        closes = np.array([float(candle[4]) for candle in data])
-        
-        # Определяем цвета свечей
-        colors = ['green' if close >= open else 'red' for open, close in zip(opens, closes)]
-        
-        # Рисуем свечи
-        for i in range(len(data)):
-            # Фитиль (высокая-низкая цена)
-            plt.plot([times[i], times[i]], [lows[i], highs[i]], color='black', linewidth=1)
-            
-            # Тело свечи (открытие-закрытие)
-            if closes[i] >= opens[i]:
-                # Бычья свеча (зеленая)
-                rect_bottom = opens[i]
-                rect_height = closes[i] - opens[i]
-            else:
-                # Медвежья свеча (красная)
-                rect_bottom = closes[i]
-                rect_height = opens[i] - closes[i]
-            
-            # Для более широких свечей на графике
-            width = 0.7 * (times[1] - times[0]).total_seconds() / 86400 if i < len(data) - 1 else 0.7
-            plt.bar(times[i], rect_height, bottom=rect_bottom, color=colors[i], width=width, alpha=0.8)
+        candles = to_array(data)
+        candles[:, 5] = np.nan_to_num(candles[:, 5])
+        highs, lows, closes, volumes = candles[:, 2], candles[:, 3], candles[:, 4], candles[:, 5]
+        payload = {'symbol': symbol, 'timeframe': timeframe, 'candles': candles}
         
         # Добавляем скользящую среднюю (MA-20)
         if len(closes) >= 20:
-            ma_20 = np.convolve(closes, np.ones(20)/20, mode='valid')
-            plt.plot(times[19:], ma_20, color='blue', linestyle='-', linewidth=1.5, label='MA-20')
+            payload['ma20'] = indicator_cache.get_or_compute(symbol, timeframe, 'sma', (20,), data,
+                                                             lambda: np.convolve(closes, np.ones(20)/20, mode='valid'))
 
-        # Добавляем индикаторы RSI и Bollinger Bands
-        if len(closes) >= 14:
-            rsi = calculate_rsi(closes, 14)
-            plt.plot(times[-len(rsi):], rsi, color='purple', linestyle='--', label='RSI (14)')
-        
+        # Добавляем полосы Боллинджера
         if len(closes) >= 20:
-            upper_band, lower_band = calculate_bollinger_bands(closes, 20)
-            plt.fill_between(times[-len(upper_band):], upper_band, lower_band, color='gray', alpha=0.2, label='Bollinger Bands')
-        
-        # Добавляем заголовок и сетку
-        plt.title(f"{symbol} - {timeframe}")
-        plt.xlabel('Время')
-        plt.ylabel('Цена')
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plt.tight_layout()  # Автоматическая подгонка элементов
+            payload['bollinger'] = indicator_cache.get_or_compute(symbol, timeframe, 'bollinger', (20, 2), data,
+                                                                  lambda: calculate_bollinger_bands(closes, 20))
+        
+        # VWAP: внутри суточной сессии для таймфреймов меньше дня, иначе — от первой свечи графика
+        if volumes.sum() > 0:
+            if timeframe_to_ms(timeframe) < 86_400_000:
+                payload['vwap'] = indicator_cache.get_or_compute(
+                    symbol, timeframe, 'vwap', (86_400_000,), data,
+                    lambda: indicators.vwap(highs, lows, closes, volumes, candles[:, 0].astype(np.int64)))
+                payload['vwap_label'] = 'VWAP (сессия)'
+            else:
+                payload['vwap'] = indicator_cache.get_or_compute(
+                    symbol, timeframe, 'anchored_vwap', (0,), data,
+                    lambda: indicators.anchored_vwap(highs, lows, closes, volumes, 0))
+                payload['vwap_label'] = 'VWAP'
+
+            # Профиль объёма по ценовым уровням
+            payload['profile'] = indicator_cache.get_or_compute(symbol, timeframe, 'volume_profile', (24,), data,
+                                                                lambda: indicators.volume_profile(closes, volumes, 24))
+
+        # RSI рисуется на отдельной шкале 0-100
+        if len(closes) > 14:
+            payload['rsi'] = indicator_cache.get_or_compute(symbol, timeframe, 'rsi', (14,), data,
+                                                            lambda: calculate_rsi(closes, 14))
         
-        # Сохраняем в буфер
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
-        plt.close()
-        buffer.seek(0)
+        png = await chart_renderer.render('candles', payload)
+        if not png:
+            return None
         
         logger.info(f"График успешно создан для {symbol}, таймфрейм {timeframe}")
-        return buffer
+        return BytesIO(png)
     except Exception as e:
         logger.error(f"Ошибка при создании графика для {symbol}: {e}")
         return None
 
+async def get_chart_image(symbol: str, timeframe: str, limit: int = 50, style: str = 'candles'):
+    """Версия и PNG графика свечей: (ключ chart_key, байты) или None.
+
+    Свечи берутся из кэша запросов к бирже, поэтому, пока свечи не изменились,
+    картинка отдаётся из кэша графиков без загрузки данных и отрисовки.
+    """
+    try:
+        data = await fetch_ohlcv_async(symbol, timeframe, limit=limit)
+        if not data or len(data) < 2:
+            logger.error(f"Недостаточно данных для построения графика {symbol}")
+            return None
+
+        key = chart_key(symbol, timeframe, limit, style, data)
+
+        async def render():
+            buffer = await generate_chart(symbol, timeframe, limit, data=data)
+            return buffer.getvalue() if buffer else None
+
+        png = await chart_image_cache.get_or_render(key, render)
+        return (key, png) if png else None
+    except Exception as e:
+        logger.error(f"Ошибка при получении графика для {symbol}: {e}")
+        return None
+
 async def generate_market_overview_chart(market_data):
     """Генерация сводного графика рынка (топ-5 по объему)."""
     try:
@@ -92,55 +101,95 @@ async def generate_market_overview_chart(market_data):
             logger.error("Нет данных для создания обзорного графика рынка")
             return None
         
-        # Создаем фигуру
-        plt.figure(figsize=(14, 8))
-        
         # Подготавливаем данные для графика
         symbols = [data['symbol'].split('/')[0] for data in market_data]  # Берем только базовую валюту
-        changes = [data['percentage'] * 100 if 'percentage' in data else 0 for data in market_data]  # В процентах
-        
-        # Цвета в зависимости от изменения
-        colors = ['green' if change >= 0 else 'red' for change in changes]
+        changes = [data.get('percentage') or 0 for data in market_data]  # ccxt отдаёт изменение уже в процентах
         
-        # Создаем горизонтальную столбчатую диаграмму
-        plt.barh(symbols, changes, color=colors, alpha=0.7)
-        
-        # Добавляем значения к столбцам
-        for i, v in enumerate(changes):
-            plt.text(v + 0.1, i, f"{v:.2f}%", va='center')
-        
-        # Добавляем заголовок и сетку
-        plt.title("Обзор изменений на рынке криптовалют (последние 24ч)")
-        plt.xlabel('Изменение цены (%)')
-        plt.ylabel('Криптовалюты')
-        plt.axvline(x=0, color='black', linestyle='-', linewidth=0.5)  # Линия на нуле
-        plt.grid(True, axis='x', alpha=0.3)
-        plt.tight_layout()
-        
-        # Сохраняем в буфер
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
-        plt.close()
-        buffer.seek(0)
+        png = await chart_renderer.render('market_overview', {'symbols': symbols, 'changes': changes})
+        if not png:
+            return None
         
         logger.info("Обзорный график рынка успешно создан")
-        return buffer
+        return BytesIO(png)
     except Exception as e:
         logger.error(f"Ошибка при создании обзорного графика рынка: {e}")
         return None
 
+async def generate_equity_chart(result, symbol: str, timeframe: str):
+    """Генерация графика доходности бэктеста в сравнении с удержанием актива."""
+    try:
+        timestamps = result['timestamps']
+        if len(timestamps) == 0:
+            logger.error(f"Нет данных для графика бэктеста {symbol}")
+            return None
+
+        # Отмечаем точки входа в сделки
+        entry_times = np.array([trade['entry_time'] for trade in result['trade_list']], dtype=np.int64)
+        entry_index = np.flatnonzero(np.isin(timestamps.astype(np.int64), entry_times))
+        payload = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'timestamps': timestamps,
+            'equity': result['equity'],
+            'closes': result['closes'],
+            'entry_index': entry_index,
+        }
+        png = await chart_renderer.render('equity', payload)
+        if not png:
+            return None
+
+        logger.info(f"График бэктеста для {symbol} ({timeframe}) успешно создан")
+        return BytesIO(png)
+    except Exception as e:
+        logger.error(f"Ошибка при создании графика бэктеста для {symbol}: {e}")
+        return None
+
+async def generate_correlation_heatmap(result, limit: int = 40):
+    """Генерация тепловой карты корреляций для первых limit пар по объёму торгов."""
+    try:
+        count = min(limit, len(result.symbols))
+        if count < 2:
+            logger.error("Недостаточно пар для тепловой карты корреляций")
+            return None
+
+        # Пары одного кластера располагаем рядом
+        order = [i for i in result.order() if i < count]
+        payload = {
+            'matrix': result.matrix[np.ix_(order, order)],
+            'labels': [result.symbols[i].split('/')[0] for i in order],
+            'timeframe': result.timeframe,
+            'window': result.window,
+        }
+        png = await chart_renderer.render('correlation_heatmap', payload)
+        if not png:
+            return None
+
+        logger.info(f"Тепловая карта корреляций ({result.timeframe}) успешно создана")
+        return BytesIO(png)
+    except Exception as e:
+        logger.error(f"Ошибка при создании тепловой карты корреляций: {e}")
+        return None
+
+def _valid_tail(values):
+    """Значения индикатора начиная с первой свечи, для которой хватает истории."""
+    valid = np.flatnonzero(~np.isnan(values))
+    return values[valid[0]:] if len(valid) else values[:0]
+
 def calculate_rsi(closes, period=14):
     """Расчет индикатора RSI."""
-    # ...реализация...
+    return _valid_tail(indicators.rsi(closes, period))
 
 def calculate_macd(closes, short_period=12, long_period=26, signal_period=9):
-    """Расчет индикатора MACD."""
-    # ...реализация...
+    """Расчет индикатора MACD: линия MACD, сигнальная линия и гистограмма."""
+    macd_line, signal_line, histogram = indicators.macd(closes, short_period, long_period, signal_period)
+    histogram = _valid_tail(histogram)
+    return macd_line[-len(histogram):], signal_line[-len(histogram):], histogram
 
 def calculate_bollinger_bands(closes, period=20, std_dev=2):
-    """Расчет полос Боллинджера."""
-    # ...реализация...
+    """Расчет полос Боллинджера: верхняя и нижняя полосы."""
+    _, upper_band, lower_band = indicators.bollinger_bands(closes, period, std_dev)
+    return _valid_tail(upper_band), _valid_tail(lower_band)
 
 def calculate_kdj(highs, lows, closes, period=14):
-    """Расчет индикатора KDJ."""
-    # ...реализация...
+    """Расчет индикатора KDJ: линии K, D и J."""
+    return tuple(_valid_tail(line) for line in indicators.kdj(highs, lows, closes, period))
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config.config import CHART_CACHE_MAX_BYTES
+from services.cache import consume_task_exception
+from services.indicator_cache import IndicatorCache
+
+logger = logging.getLogger(__name__)
+
+def chart_key(symbol: str, timeframe: str, limit: int, style: str, candles: List) -> Tuple:
+    """Версия графика: параметры запроса и состояние свечей.
+
+    Пока закрытых свечей не прибавилось, а незакрытая свеча не изменилась,
+    ключ остаётся прежним и картинку можно не перерисовывать.
+    """
+    return (symbol, timeframe, limit, style) + IndicatorCache.candles_key(candles, timeframe)
+
+class ChartImageCache:
+    """LRU-кэш готовых PNG графиков с ограничением по суммарному размеру в байтах.
+
+    Одновременные запросы одной версии графика ожидают одну отрисовку.
+    Для каждого графика (символ, таймфрейм, число свечей, стиль) хранится также
+    file_id последней отправленной в Telegram версии: повторная отправка той же
+    версии не загружает картинку заново, новая версия заменяет file_id.
+    """
+
+    def __init__(self, max_bytes: int = CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._file_ids: Dict[Tuple, Tuple[Tuple, str]] = {}  # график -> (версия, file_id)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.file_id_hits = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """PNG из кэша без отрисовки."""
+        png = self._entries.get(key)
+        if png is not None:
+            self._entries.move_to_end(key)
+        return png
+
+    def set(self, key: Hashable, png: bytes):
+        """Сохранение PNG; картинка больше всего бюджета не кэшируется."""
+        if len(png) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = png
+        self.size += len(png)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+            self.evicted_bytes += len(evicted)
+
+    async def get_or_render(self, key: Hashable, render: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """PNG из кэша или отрисовка через render(). None (ошибка отрисовки) не кэшируется.
+
+        Отрисовка выполняется в отдельной задаче и не прерывается отменой одного из ожидающих.
+        """
+        png = self.get(key)
+        if png is not None:
+            self.hits += 1
+            return png
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._render(key, render))
+            task.add_done_callback(consume_task_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _render(self, key: Hashable, render: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        try:
+            png = await render()
+            if png:
+                self.set(key, png)
+            return png
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_file_id(self, key: Tuple) -> Optional[str]:
+        """file_id Telegram для версии графика key, если эта версия уже отправлялась."""
+        entry = self._file_ids.get(key[:4])
+        if entry and entry[0] == key:
+            self.file_id_hits += 1
+            return entry[1]
+        return None
+
+    def set_file_id(self, key: Tuple, file_id: str):
+        """Запоминание file_id отправленной версии графика вместо предыдущей."""
+        self._file_ids[key[:4]] = (key, file_id)
+
+    def drop_file_id(self, key: Tuple):
+        """Удаление file_id, который Telegram больше не принимает."""
+        entry = self._file_ids.get(key[:4])
+        if entry and entry[0] == key:
+            del self._file_ids[key[:4]]
+
+    def clear(self):
+        self._entries.clear()
+        self._file_ids.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика работы кэша."""
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+            'file_ids': len(self._file_ids),
+            'file_id_hits': self.file_id_hits,
+            'hit_rate': (self.hits + self.coalesced) / requests if requests else 0.0,
+        }
+
+# Общий кэш графиков для всех пользователей
+chart_image_cache = ChartImageCache()
@@ -0,0 +1,270 @@
+"""Синхронная отрисовка графиков в PNG.
+
+Функции получают словарь с массивами NumPy и строками и возвращают байты PNG.
+Используется объектный API matplotlib (Figure + FigureCanvasAgg) без глобального
+состояния pyplot, поэтому отрисовка безопасна в процессах пула и в потоках.
+
+Самый частый график — свечной — рисуется на заготовке (CandleChartTemplate):
+фигура, оси, подписи и поля создаются один раз на процесс, а на каждый запрос
+заменяются только данные. Заготовка не рассчитана на одновременное использование
+из нескольких потоков.
+"""
+import datetime
+from io import BytesIO
+from typing import Any, Callable, Dict
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Использование неинтерактивного бэкенда
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from services.candlestick import candle_width, draw_candles, draw_volume
+
+def _figure(figsize) -> Figure:
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+def _to_png(figure: Figure, tight: bool = True) -> bytes:
+    """PNG фигуры. tight=False — для фигур с заданными заранее полями: без расчёта
+    tight_layout и без лишнего прохода отрисовки ради bbox_inches='tight'."""
+    buffer = BytesIO()
+    if tight:
+        figure.tight_layout()
+        figure.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
+    else:
+        figure.savefig(buffer, format='png', dpi=100)
+    return buffer.getvalue()
+
+def _dates(timestamps) -> np.ndarray:
+    """Метки времени в мс -> числовые даты matplotlib в локальном времени."""
+    return mdates.date2num([datetime.datetime.fromtimestamp(ts / 1000) for ts in timestamps])
+
+def _padded(low: float, high: float, margin: float = 0.05):
+    """Пределы оси с полями, как при автомасштабировании matplotlib."""
+    pad = (high - low) * margin or abs(high) * margin or 1.0
+    return low - pad, high + pad
+
+class CandleChartTemplate:
+    """Заготовка свечного графика с MA-20, полосами Боллинджера, VWAP, профилем объёма и RSI.
+
+    Оси, подписи, сетка и поля фигуры задаются один раз; update() удаляет
+    данные предыдущего запроса и добавляет новые, пределы осей считаются по данным.
+    """
+
+    def __init__(self):
+        self.figure = _figure((12, 6))
+        # Поля под подписи осей, повёрнутые метки дат и шкалу RSI справа
+        self.figure.subplots_adjust(left=0.07, right=0.94, top=0.93, bottom=0.17)
+        self.price_axis = self.figure.add_subplot()
+        self.price_axis.xaxis_date()
+        self.price_axis.set_xlabel('Время')
+        self.price_axis.set_ylabel('Цена')
+        self.price_axis.tick_params(axis='x', labelrotation=45)
+        self.price_axis.grid(True, alpha=0.3)
+
+        # Профиль объёма: горизонтальные столбцы от правого края графика
+        self.profile_axis = self.price_axis.twiny()
+        self.profile_axis.set_xticks([])
+
+        # RSI рисуем на отдельной шкале 0-100, чтобы не искажать шкалу цены
+        self.rsi_axis = self.price_axis.twinx()
+        self.rsi_axis.set_ylim(0, 100)
+        self.rsi_axis.set_ylabel('RSI')
+        self._artists = []
+
+    def update(self, payload: Dict[str, Any]):
+        """Замена данных графика."""
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+        price_axis = self.price_axis
+
+        candles = payload['candles']
+        x = _dates(candles[:, 0])
+        lows, highs = candles[:, 3], candles[:, 2]
+        width = candle_width(x)
+        self._artists.extend(draw_candles(price_axis, x, candles[:, 1], highs, lows, candles[:, 4], width=width))
+        low, high = np.nanmin(lows), np.nanmax(highs)
+
+        if payload.get('ma20') is not None:
+            ma_20 = payload['ma20']
+            self._artists.extend(price_axis.plot(x[-len(ma_20):], ma_20, color='blue', linestyle='-', linewidth=1.5,
+                                                 label='MA-20'))
+        if payload.get('bollinger') is not None:
+            upper_band, lower_band = payload['bollinger']
+            self._artists.append(price_axis.fill_between(x[-len(upper_band):], upper_band, lower_band, color='gray',
+                                                         alpha=0.2, label='Bollinger Bands'))
+            low, high = min(low, np.nanmin(lower_band)), max(high, np.nanmax(upper_band))
+        if payload.get('vwap') is not None:
+            vwap = payload['vwap']
+            self._artists.extend(price_axis.plot(x, vwap, color='orange', linestyle='-', linewidth=1.2,
+                                                 label=payload['vwap_label']))
+            low, high = min(low, np.nanmin(vwap)), max(high, np.nanmax(vwap))
+
+        price_axis.set_xlim(*_padded(x[0] - width / 2, x[-1] + width / 2))
+        price_axis.set_ylim(*_padded(low, high))
+        handles, labels = price_axis.get_legend_handles_labels()
+
+        profile = payload.get('profile')
+        self.profile_axis.set_visible(profile is not None)
+        if profile is not None:
+            edges, volumes = profile
+            self._artists.append(self.profile_axis.barh(edges[:-1], volumes, height=np.diff(edges), align='edge',
+                                                        color='steelblue', alpha=0.15, label='Профиль объёма'))
+            self.profile_axis.set_xlim(volumes.max() * 4, 0)
+            profile_handles, profile_labels = self.profile_axis.get_legend_handles_labels()
+            handles += profile_handles
+            labels += profile_labels
+
+        rsi = payload.get('rsi')
+        self.rsi_axis.set_visible(rsi is not None)
+        if rsi is not None:
+            self._artists.extend(self.rsi_axis.plot(x[-len(rsi):], rsi, color='purple', linestyle='--',
+                                                    label='RSI (14)'))
+            rsi_handles, rsi_labels = self.rsi_axis.get_legend_handles_labels()
+            handles += rsi_handles
+            labels += rsi_labels
+
+        price_axis.set_title(f"{payload['symbol']} - {payload['timeframe']}")
+        price_axis.legend(handles, labels, loc='upper left')
+
+    def render(self, payload: Dict[str, Any]) -> bytes:
+        self.update(payload)
+        return _to_png(self.figure, tight=False)
+
+# Стиль графика -> класс заготовки
+TEMPLATES: Dict[str, Callable[[], Any]] = {
+    'candles': CandleChartTemplate,
+}
+
+_templates: Dict[str, Any] = {}
+
+def template(style: str):
+    """Заготовка стиля style, создаваемая при первом обращении в процессе."""
+    if style not in _templates:
+        _templates[style] = TEMPLATES[style]()
+    return _templates[style]
+
+def render_candles(payload: Dict[str, Any]) -> bytes:
+    """Свечной график с MA-20, полосами Боллинджера, VWAP, профилем объёма и RSI."""
+    return template('candles').render(payload)
+
+def render_market_overview(payload: Dict[str, Any]) -> bytes:
+    """Горизонтальные столбцы изменения цены за 24 часа."""
+    symbols, changes = payload['symbols'], payload['changes']
+    figure = _figure((14, 8))
+    axis = figure.add_subplot()
+    axis.barh(symbols, changes, color=['green' if change >= 0 else 'red' for change in changes], alpha=0.7)
+    for i, change in enumerate(changes):
+        axis.text(change + 0.1, i, f"{change:.2f}%", va='center')
+    axis.set_title("Обзор изменений на рынке криптовалют (последние 24ч)")
+    axis.set_xlabel('Изменение цены (%)')
+    axis.set_ylabel('Криптовалюты')
+    axis.axvline(x=0, color='black', linestyle='-', linewidth=0.5)  # Линия на нуле
+    axis.grid(True, axis='x', alpha=0.3)
+    return _to_png(figure)
+
+def render_candlestick_volume(payload: Dict[str, Any]) -> bytes:
+    """Свечной график с панелью объёма и скользящими средними MA20/MA50."""
+    candles = payload['candles']
+    opens, highs, lows, closes, volumes = (candles[:, i] for i in range(1, 6))
+    figure = _figure((12, 8))
+    ax1, ax2 = figure.subplots(2, 1, height_ratios=[4, 1], gridspec_kw={'hspace': 0.1})
+
+    positions = np.arange(len(closes))
+    draw_candles(ax1, positions, opens, highs, lows, closes, width=0.6)
+    draw_volume(ax2, positions, volumes, closes >= opens, width=0.6)
+
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+    ax1.tick_params(axis='x', labelbottom=False)
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+    figure.autofmt_xdate()
+
+    ax1.set_title(payload['title'])
+    ax1.grid(True, alpha=0.3)
+    ax2.grid(True, alpha=0.3)
+    ax1.set_ylabel('Цена')
+    ax2.set_ylabel('Объем')
+
+    for period, color in ((20, 'blue'), (50, 'orange')):
+        if len(closes) >= period:
+            average = np.convolve(closes, np.ones(period) / period, mode='valid')
+            ax1.plot(range(period - 1, len(closes)), average, color=color, linewidth=1.5, label=f"MA{period}")
+    ax1.legend()
+    return _to_png(figure)
+
+def render_price_comparison(payload: Dict[str, Any]) -> bytes:
+    """Нормированные кривые цены нескольких пар."""
+    normalized = payload['normalized']
+    figure = _figure((12, 7))
+    axis = figure.add_subplot()
+    periods = np.arange(normalized.shape[1])
+    for label, series in zip(payload['labels'], normalized):
+        axis.plot(periods, series, label=label, linewidth=2)
+    axis.set_title(f"Сравнение динамики цен ({payload['timeframe']})")
+    axis.set_xlabel("Периоды")
+    axis.set_ylabel("Изменение в % от начальной цены")
+    axis.grid(True, alpha=0.3)
+    axis.legend()
+    return _to_png(figure)
+
+def render_equity(payload: Dict[str, Any]) -> bytes:
+    """Доходность бэктеста в сравнении с удержанием актива."""
+    x = _dates(payload['timestamps'])
+    equity = (payload['equity'] - 1) * 100
+    closes = payload['closes']
+    buy_and_hold = (closes / closes[0] - 1) * 100
+    entry_index = payload['entry_index']
+
+    figure = _figure((12, 6))
+    axis = figure.add_subplot()
+    axis.xaxis_date()
+    axis.plot(x, equity, color='blue', linewidth=1.2, label='Стратегия')
+    axis.plot(x, buy_and_hold, color='gray', linewidth=1, alpha=0.7, label='Удержание')
+    axis.fill_between(x, equity, 0, where=equity < 0, color='red', alpha=0.1)
+    axis.scatter(x[entry_index], equity[entry_index], color='green', marker='^', s=20, label='Вход')
+
+    axis.set_title(f"Бэктест {payload['symbol']} ({payload['timeframe']})")
+    axis.set_ylabel('Доходность (%)')
+    axis.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+    axis.grid(True, alpha=0.3)
+    axis.legend(loc='upper left')
+    axis.tick_params(axis='x', labelrotation=45)
+    return _to_png(figure)
+
+def render_correlation_heatmap(payload: Dict[str, Any]) -> bytes:
+    """Тепловая карта матрицы корреляций."""
+    matrix, labels = payload['matrix'], payload['labels']
+    count = len(labels)
+    size = max(8, count * 0.25)
+    figure = _figure((size + 2, size))
+    axis = figure.add_subplot()
+    image = axis.imshow(matrix, cmap='RdYlGn', vmin=-1, vmax=1, interpolation='nearest')
+    figure.colorbar(image, ax=axis, fraction=0.046, pad=0.04, label='Корреляция')
+    axis.set_xticks(range(count), labels, rotation=90, fontsize=7)
+    axis.set_yticks(range(count), labels, fontsize=7)
+    axis.set_title(f"Корреляция доходностей ({payload['timeframe']}, {payload['window']} свечей)")
+    return _to_png(figure)
+
+# Вид графика -> функция отрисовки
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    'candles': render_candles,
+    'market_overview': render_market_overview,
+    'candlestick_volume': render_candlestick_volume,
+    'price_comparison': render_price_comparison,
+    'equity': render_equity,
+    'correlation_heatmap': render_correlation_heatmap,
+}
+
+def render(kind: str, payload: Dict[str, Any]) -> bytes:
+    return RENDERERS[kind](payload)
+
+def warm_up():
+    """Создание заготовок и первая отрисовка: загрузка шрифтов и инициализация бэкенда до реальных запросов."""
+    timestamps = np.arange(30, dtype=np.float64) * 3_600_000
+    closes = 100 + np.cumsum(np.sin(np.arange(30)))
+    candles = np.column_stack([timestamps, closes, closes + 1, closes - 1, closes, np.ones(30)])
+    render_candles({'symbol': 'BTC/USDT', 'timeframe': '1h', 'candles': candles})
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Запрос отклонён: цепь разомкнута из-за недоступности биржи."""
+
+class CircuitBreaker:
+    """Автоматический выключатель запросов к бирже.
+
+    Размыкается, когда доля ошибок за скользящее окно превышает порог, и
+    отклоняет запросы без обращения к бирже. Пока цепь разомкнута, фоновая
+    проверка периодически вызывает probe и замыкает цепь после первого успеха.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+
+    def __init__(self, probe: Callable[[], Awaitable[Any]], error_threshold: float = 0.5,
+                 min_calls: int = 5, window: float = 60, probe_interval: float = 15):
+        self.probe = probe
+        self.error_threshold = error_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.probe_interval = probe_interval
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._probe_task: Optional[asyncio.Task] = None
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def check(self):
+        """Проверка перед запросом: при разомкнутой цепи сразу выбрасывает CircuitOpenError."""
+        if self.is_open:
+            self.rejected += 1
+            if self._probe_task is None or self._probe_task.done():
+                self._start_probe()
+            raise CircuitOpenError("Биржа временно недоступна")
+
+    def record_success(self):
+        self._record(True)
+
+    def record_failure(self):
+        self._record(False)
+        total = len(self._outcomes)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if not self.is_open and total >= self.min_calls and failures / total >= self.error_threshold:
+            self._open(failures, total)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние выключателя."""
+        total = len(self._outcomes)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            'state': self.state,
+            'opened_at': self.opened_at,
+            'error_rate': failures / total if total else 0.0,
+            'calls_in_window': total,
+            'rejected': self.rejected,
+        }
+
+    async def close(self):
+        """Остановка фоновой проверки."""
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def _record(self, ok: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self, failures: int, total: int):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        logger.warning(f"Цепь запросов к бирже разомкнута: {failures} ошибок из {total} за {self.window:.0f} с")
+        self._start_probe()
+
+    def _start_probe(self):
+        try:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+        except RuntimeError:
+            # Нет работающего цикла событий: проверка запустится при следующем запросе
+            self._probe_task = None
+
+    async def _probe_loop(self):
+        """Периодическая проверка доступности биржи, пока цепь разомкнута."""
+        while self.is_open:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.info(f"Биржа всё ещё недоступна: {e}")
+                continue
+            self.state = self.CLOSED
+            self.opened_at = None
+            self._outcomes.clear()
+            logger.info("Биржа снова доступна, цепь запросов замкнута")
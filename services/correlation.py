@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import (CORRELATION_CLUSTER_THRESHOLD, CORRELATION_INTERVAL, CORRELATION_SYMBOLS,
+                           CORRELATION_TIMEFRAME, CORRELATION_WINDOW)
+from services.bybit_api import bybit_api, fetch_market_overview
+from services.rate_limiter import PRIORITY_BACKGROUND
+from services.resample import bucket_starts
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Пара участвует в расчёте, если в окне есть не менее 90% доходностей
+MIN_COVERAGE = 0.9
+
+def correlation_matrix(closes: np.ndarray, window: int,
+                       min_coverage: float = MIN_COVERAGE) -> Tuple[np.ndarray, np.ndarray]:
+    """Корреляция логарифмических доходностей за последние window свечей для всех пар сразу.
+
+    closes — матрица (символы x время) с NaN на месте отсутствующих свечей.
+    Пропущенные доходности после центрирования считаются нулевыми, поэтому
+    матрица получается одним матричным произведением. Возвращает
+    (индексы участвующих строк, матрица корреляций).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.diff(np.log(closes), axis=1)[:, -window:]
+    present = ~np.isnan(returns)
+    count = present.sum(axis=1)
+    keep = count >= max(2, min_coverage * returns.shape[1])
+
+    returns, present, count = returns[keep], present[keep], count[keep]
+    mean = np.where(present, returns, 0).sum(axis=1) / np.maximum(count, 1)
+    centered = np.where(present, returns - mean[:, None], 0)
+    norm = np.sqrt((centered * centered).sum(axis=1))
+    # Пары без движения цены в окне корреляции не имеют
+    moving = norm > 0
+    centered = centered[moving] / norm[moving, None]
+
+    matrix = np.clip(centered @ centered.T, -1, 1)
+    np.fill_diagonal(matrix, 1)
+    return np.flatnonzero(keep)[moving], matrix
+
+def cluster_labels(matrix: np.ndarray, threshold: float) -> np.ndarray:
+    """Метки кластеров: пары связаны, если их корреляция не ниже порога (одиночная связь).
+
+    Компоненты связности находятся возведением матрицы достижимости в квадрат,
+    за log2(N) матричных произведений. Метка — наименьший индекс в кластере.
+    """
+    reach = (matrix >= threshold).astype(np.float32)
+    while True:
+        expanded = ((reach @ reach) > 0).astype(np.float32)
+        if np.array_equal(expanded, reach):
+            break
+        reach = expanded
+    return reach.argmax(axis=1)
+
+class CorrelationMatrix:
+    """Результат расчёта корреляций для одного таймфрейма."""
+
+    def __init__(self, symbols: List[str], matrix: np.ndarray, labels: np.ndarray, timeframe: str,
+                 candle_timestamp: int, window: int):
+        self.symbols = symbols
+        self.matrix = matrix
+        self.labels = labels
+        self.timeframe = timeframe
+        self.candle_timestamp = candle_timestamp
+        self.window = window
+        self.updated_at = time.time()
+        self._positions = {symbol: i for i, symbol in enumerate(symbols)}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    def related(self, symbol: str, limit: int = 5) -> Optional[Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]]:
+        """Наиболее и наименее коррелирующие с symbol пары."""
+        i = self._positions.get(symbol)
+        if i is None:
+            return None
+        row = self.matrix[i]
+        order = np.argsort(row, kind='stable')
+        order = order[order != i]
+        most = [(self.symbols[j], float(row[j])) for j in order[::-1][:limit]]
+        least = [(self.symbols[j], float(row[j])) for j in order[:limit]]
+        return most, least
+
+    def clusters(self, min_size: int = 2) -> List[List[str]]:
+        """Кластеры пар по убыванию размера; внутри кластера — в порядке объёма торгов."""
+        labels, counts = np.unique(self.labels, return_counts=True)
+        result = [[self.symbols[j] for j in np.flatnonzero(self.labels == label)]
+                  for label, size in zip(labels, counts) if size >= min_size]
+        return sorted(result, key=len, reverse=True)
+
+    def order(self) -> np.ndarray:
+        """Порядок строк для тепловой карты: пары одного кластера рядом, крупные кластеры первыми."""
+        sizes = np.bincount(self.labels)[self.labels]
+        return np.lexsort((np.arange(len(self.symbols)), self.labels, -sizes))
+
+class CorrelationService:
+    """Фоновый расчёт и кэширование матрицы корреляций по таймфреймам.
+
+    Матрица пересчитывается в фоне с низким приоритетом запросов, когда по
+    таймфрейму закрылась новая свеча; команда бота отвечает из последнего
+    результата без обращения к бирже.
+    """
+
+    def __init__(self, symbols: int = CORRELATION_SYMBOLS, window: int = CORRELATION_WINDOW,
+                 threshold: float = CORRELATION_CLUSTER_THRESHOLD, timeframe: str = CORRELATION_TIMEFRAME,
+                 interval: float = CORRELATION_INTERVAL):
+        self.symbols = symbols
+        self.window = window
+        self.threshold = threshold
+        self.timeframe = timeframe
+        self.interval = interval
+        self._results: Dict[str, CorrelationMatrix] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def latest(self, timeframe: Optional[str] = None) -> Optional[CorrelationMatrix]:
+        """Последняя рассчитанная матрица без обращения к бирже (None, если расчёта ещё не было)."""
+        return self._results.get(timeframe or self.timeframe)
+
+    async def refresh(self, timeframe: Optional[str] = None,
+                      priority: int = PRIORITY_BACKGROUND) -> Optional[CorrelationMatrix]:
+        """Пересчёт матрицы, если по таймфрейму закрылась новая свеча; одновременные вызовы ожидают один расчёт."""
+        timeframe = timeframe or self.timeframe
+        step = timeframe_to_ms(timeframe)
+        closed_candle = int(bucket_starts(np.int64(time.time() * 1000), timeframe)) - step
+        lock = self._locks.setdefault(timeframe, asyncio.Lock())
+        async with lock:
+            cached = self._results.get(timeframe)
+            if cached and cached.candle_timestamp >= closed_candle:
+                return cached
+            result = await self._compute(timeframe, closed_candle, priority)
+            if result:
+                self._results[timeframe] = result
+            # При ошибке остаётся прошлый результат, если он есть
+            return result or cached
+
+    def start_background(self):
+        """Запуск периодического пересчёта в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop_background(self):
+        """Остановка периодического пересчёта."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка при расчёте корреляций: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _compute(self, timeframe: str, closed_candle: int, priority: int) -> Optional[CorrelationMatrix]:
+        started = time.perf_counter()
+        tickers = await fetch_market_overview(self.symbols)
+        symbols = [ticker['symbol'] for ticker in tickers]
+        if len(symbols) < 2:
+            logger.warning("Корреляции: не удалось получить список пар")
+            return None
+
+        batch = await bybit_api.fetch_ohlcv_many(symbols, timeframe, self.window + 2, priority=priority)
+        closes = batch['close'][:, batch['timestamps'] <= closed_candle] if batch['symbols'] else None
+        if closes is None or closes.shape[1] < 3:
+            logger.warning(f"Корреляции: недостаточно свечей для {timeframe}")
+            return None
+
+        rows, matrix = correlation_matrix(closes, self.window)
+        if len(rows) < 2:
+            logger.warning(f"Корреляции: недостаточно пар с полной историей для {timeframe}")
+            return None
+        labels = cluster_labels(matrix, self.threshold)
+        result = CorrelationMatrix([batch['symbols'][i] for i in rows], matrix, labels, timeframe,
+                                   closed_candle, self.window)
+        logger.info(f"Корреляции {timeframe}: {len(rows)} пар за {time.perf_counter() - started:.1f} с, "
+                    f"кластеров: {len(result.clusters())}, ошибок загрузки: {len(batch['errors'])}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {timeframe: {'symbols': len(result.symbols), 'updated_at': result.updated_at}
+                for timeframe, result in self._results.items()}
+
+# Создание singleton-экземпляра
+correlation_service = CorrelationService()
@@ -0,0 +1,78 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from config.config import INDICATOR_CACHE_MAX_ENTRIES
+from services.ohlcv import split_closed
+
+logger = logging.getLogger(__name__)
+
+def _freeze(value: Any) -> Any:
+    """Запрет изменения общих массивов результата, отдаваемых разным пользователям."""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    return value
+
+class IndicatorCache:
+    """LRU-кэш рассчитанных индикаторов.
+
+    Ключ — (символ, таймфрейм, индикатор, параметры, число свечей, время последней
+    закрытой свечи, OHLCV незакрытой свечи). Пока закрытых свечей не прибавилось,
+    а текущая свеча не изменилась, все запросы одной пары получают один и тот же
+    результат расчёта.
+    """
+
+    def __init__(self, max_entries: int = INDICATOR_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def candles_key(candles: List, timeframe: str) -> Tuple:
+        """Часть ключа, определяемая свечами.
+
+        Незакрытая свеча входит в ключ целиком: VWAP, OBV, профиль объёма и полосы
+        зависят от её максимума, минимума и объёма, а не только от цены закрытия.
+        """
+        closed, forming = split_closed(candles, timeframe)
+        last_closed = int(closed[-1][0]) if closed else None
+        forming_key = (int(forming[0]),) + tuple(float(value) for value in forming[1:6]) if forming else None
+        return len(candles), last_closed, forming_key
+
+    def get_or_compute(self, symbol: str, timeframe: str, indicator: str, params: Tuple,
+                       candles: List, compute: Callable[[], Any]) -> Any:
+        """Результат из кэша или расчёт через compute() с сохранением."""
+        key = (symbol, timeframe, indicator, tuple(params)) + self.candles_key(candles, timeframe)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        value = _freeze(compute())
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика работы кэша."""
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
+
+# Общий кэш для построения графиков и текстового анализа
+indicator_cache = IndicatorCache()
@@ -0,0 +1,416 @@
+"""Векторизованные технические индикаторы на NumPy.
+
+Все функции принимают одномерные массивы (или списки) цен, работают с float64
+и возвращают массивы той же длины, что и вход: значения, для которых ещё не
+хватает истории, заполняются NaN. Экспоненциальное сглаживание считается
+блочным рекуррентным фильтром без цикла по свечам, скользящие суммы — через
+накопленные суммы, скользящие экстремумы — алгоритмом ван Херка — Гил-Вермана,
+поэтому сложность каждого индикатора O(n). Объёмные индикаторы (VWAP, OBV)
+строятся на накопленных суммах, профиль объёма — одним np.bincount.
+
+Функции batch_* считают те же индикаторы сразу для матрицы (символы × время).
+"""
+import threading
+
+import numpy as np
+
+# Допустимый рост весов внутри блока рекуррентного фильтра (ограничивает потерю точности)
+_MAX_BLOCK_GROWTH = 1e4
+
+# Рабочие буферы промежуточных расчётов, свои для каждого потока
+_workspace = threading.local()
+
+def _scratch(name: str, shape) -> np.ndarray:
+    """Рабочий буфер name нужной формы, переиспользуемый между вызовами.
+
+    Свежевыделенная память при первой записи даёт отказы страниц, которые на
+    матрицах в несколько мегабайт стоят дороже самих вычислений. Буфер растёт
+    до наибольшего запрошенного размера и содержит мусор; наружу его
+    содержимое не возвращается.
+    """
+    size = int(np.prod(shape))
+    buffers = _workspace.__dict__.setdefault('buffers', {})
+    buffer = buffers.get(name)
+    if buffer is None or buffer.size < size:
+        buffer = buffers[name] = np.empty(size)
+    return buffer[:size].reshape(shape)
+
+def _as_matrix(values) -> np.ndarray:
+    """Одномерный ряд в виде матрицы (1, n) типа float64."""
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+def _smooth(values: np.ndarray, alpha: float, start: np.ndarray, seed: np.ndarray,
+            scratch: bool = False) -> np.ndarray:
+    """Экспоненциальное сглаживание по строкам, начинающееся в позиции start со значения seed.
+
+    y[start] = seed, далее y[t] = alpha * x[t] + (1 - alpha) * y[t - 1]; до start — NaN.
+    Начальное значение задаётся подменой входа: x[start] = seed / alpha при нулевом
+    состоянии фильтра. Ряд делится на блоки: внутри блока фильтр считается в
+    замкнутой форме через накопленную сумму, а состояние между блоками переносится
+    префиксным сканом. Все шаги выполняются в одном буфере без промежуточных массивов.
+    При scratch=True это рабочий буфер: результат действителен до следующего вызова.
+    """
+    rows, n = values.shape
+    decay = 1.0 - alpha
+    # Наибольший допустимый блок, затем выравнивание блоков по длине ряда
+    block = int(max(1, min(n, np.log(_MAX_BLOCK_GROWTH) / -np.log(decay)))) if decay > 0.0 else n
+    blocks = -(-n // block) if n else 0
+    block = -(-n // blocks) if blocks else 0
+
+    buffer = _scratch('smooth', (rows, blocks * block)) if scratch else np.empty((rows, blocks * block))
+    buffer[:, :n] = values
+    buffer[:, n:] = 0.0
+    before = np.arange(blocks * block) < start[:, None]
+    buffer[before] = 0.0
+    seeded = np.flatnonzero(start < n)
+    buffer[seeded, start[seeded]] = seed[seeded] / alpha
+
+    if decay > 0.0 and n:
+        powers = decay ** np.arange(block)
+        local = buffer.reshape(rows, blocks, block)
+        local *= alpha / powers
+        np.cumsum(local, axis=-1, out=local)
+        local *= powers
+        # Состояние на конец блока: carry[b] = local[b, -1] + decay**block * carry[b - 1],
+        # считается параллельным префиксным сканом за log2(blocks) шагов
+        carry = local[:, :, -1].copy()
+        factor, shift = decay ** block, 1
+        while shift < blocks and factor > 0.0:
+            carry[:, shift:] = carry[:, shift:] + factor * carry[:, :-shift]
+            factor, shift = factor * factor, shift * 2
+        # По одному блоку за шаг: промежуточный массив размером с блок, а не со всю матрицу
+        tail = powers * decay
+        increment = np.empty((rows, block))
+        for b in range(1, blocks):
+            np.multiply(carry[:, b - 1, None], tail, out=increment)
+            local[:, b, :] += increment
+    else:
+        buffer *= alpha
+    buffer[before] = np.nan
+    return buffer[:, :n]
+
+def _cumulative(values: np.ndarray, scratch: bool = False) -> np.ndarray:
+    """Накопленные суммы по строкам с нулевым первым столбцом: сумма values[a:b] = c[b] - c[a].
+
+    При scratch=True результат — рабочий буфер, действительный до следующего вызова.
+    """
+    rows, n = values.shape
+    cumulative = _scratch('cumulative', (rows, n + 1)) if scratch else np.empty((rows, n + 1))
+    cumulative[:, 0] = 0.0
+    np.cumsum(values, axis=-1, out=cumulative[:, 1:])
+    return cumulative
+
+def _window_sums(values: np.ndarray, period: int) -> np.ndarray:
+    """Суммы по скользящему окну, выровненные по правому краю окна; первые period - 1 значений — NaN."""
+    rows, n = values.shape
+    sums = np.full((rows, n), np.nan)
+    if period <= n:
+        cumulative = _cumulative(values, scratch=True)
+        np.subtract(cumulative[:, period:], cumulative[:, :n - period + 1], out=sums[:, period - 1:])
+    return sums
+
+def _window_mean_at(values: np.ndarray, period: int, end: np.ndarray) -> np.ndarray:
+    """Среднее values[end - period + 1 .. end] для каждой строки (0, если end за пределами ряда)."""
+    rows, n = values.shape
+    means = np.zeros(rows)
+    seeded = np.flatnonzero(end < n)
+    if len(seeded):
+        columns = end[seeded, None] - np.arange(period)
+        means[seeded] = values[seeded[:, None], columns].mean(axis=1)
+    return means
+
+def _rolling_extreme(values: np.ndarray, period: int, ufunc: np.ufunc, fill: float) -> np.ndarray:
+    """Скользящий максимум/минимум за O(n) (ван Херк — Гил-Верман)."""
+    rows, n = values.shape
+    result = np.full((rows, n), np.nan)
+    if period > n:
+        return result
+    blocks = -(-n // period)
+    padded = np.full((rows, blocks * period), fill)
+    padded[:, :n] = np.where(np.isnan(values), fill, values)
+    padded = padded.reshape(rows, blocks, period)
+    prefix = ufunc.accumulate(padded, axis=-1).reshape(rows, -1)
+    suffix = ufunc.accumulate(padded[:, :, ::-1], axis=-1)[:, :, ::-1].reshape(rows, -1)
+    result[:, period - 1:] = ufunc(suffix[:, :n - period + 1], prefix[:, period - 1:n])
+    return result
+
+def _sma(values: np.ndarray, period: int) -> np.ndarray:
+    return _window_sums(values, period) / period
+
+def _ema(values: np.ndarray, period: int, start: np.ndarray) -> np.ndarray:
+    """EMA с начальным значением SMA первых period точек, начиная с позиции start."""
+    seed_at = start + period - 1
+    return _smooth(values, 2.0 / (period + 1), seed_at, _window_mean_at(values, period, seed_at))
+
+def _rsi(closes: np.ndarray, period: int, start: np.ndarray) -> np.ndarray:
+    rows, n = closes.shape
+    result = np.full((rows, n), np.nan)
+    if n < 2:
+        return result
+    # Рост и падение сглаживаются одним вызовом фильтра: строки [0, rows) и [rows, 2 * rows)
+    moves = _scratch('moves', (2 * rows, n - 1))
+    gains, losses = moves[:rows], moves[rows:]
+    np.subtract(closes[:, 1:], closes[:, :-1], out=gains)
+    gains[np.isnan(gains)] = 0.0
+    np.minimum(gains, 0.0, out=losses)
+    np.negative(losses, out=losses)
+    np.maximum(gains, 0.0, out=gains)
+
+    # Первое значение — простое среднее изменений за period свечей (по Уайлдеру)
+    seed_at = np.concatenate((start, start)) + period - 1
+    averages = _smooth(moves, 1.0 / period, seed_at, _window_mean_at(moves, period, seed_at), scratch=True)
+    avg_gain, total = averages[:rows], averages[rows:]
+    total += avg_gain
+    avg_gain *= 100.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.divide(avg_gain, total, out=result[:, 1:])
+    result[:, 1:][total == 0] = 50.0
+    return result
+
+def _macd(closes: np.ndarray, fast: int, slow: int, signal: int, start: np.ndarray):
+    macd_line = _ema(closes, fast, start) - _ema(closes, slow, start)
+    macd_line[np.arange(closes.shape[1]) < (start + slow - 1)[:, None]] = np.nan
+    signal_line = _ema(np.nan_to_num(macd_line), signal, start + slow - 1)
+    return macd_line, signal_line, macd_line - signal_line
+
+def _bollinger_bands(closes: np.ndarray, period: int, std_dev: float, start: np.ndarray):
+    rows, n = closes.shape
+    # Сдвиг к первому значению ряда уменьшает потерю точности в E[x²] - E[x]²
+    reference = closes[np.arange(rows), np.minimum(start, n - 1)][:, None] if n else np.zeros((rows, 1))
+    # Суммы x и x² по окну считаются одним вызовом: строки [0, rows) и [rows, 2 * rows)
+    moments = _scratch('moments', (2 * rows, n))
+    shifted, squares = moments[:rows], moments[rows:]
+    np.subtract(closes, reference, out=shifted)
+    shifted[np.isnan(shifted)] = 0.0
+    np.multiply(shifted, shifted, out=squares)
+    sums = _window_sums(moments, period)
+    sums /= period
+    mean, variance = sums[:rows], sums[rows:]
+    np.multiply(mean, mean, out=shifted)
+    variance -= shifted
+    np.maximum(variance, 0.0, out=variance)
+    np.sqrt(variance, out=variance)
+    variance *= std_dev
+    mean += reference
+    mean[np.arange(n) < (start + period - 1)[:, None]] = np.nan
+    lower = mean - variance
+    upper = np.add(mean, variance, out=variance)
+    return mean, upper, lower
+
+def _kdj(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int, smoothing: int,
+         start: np.ndarray):
+    rows, n = closes.shape
+    highest = _rolling_extreme(highs, period, np.maximum, -np.inf)
+    lowest = _rolling_extreme(lows, period, np.minimum, np.inf)
+    spread = highest - lowest
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsv = np.where(spread > 0, 100.0 * (closes - lowest) / spread, 50.0)
+    rsv_start = start + period - 1
+    rsv = np.where(np.arange(n) < rsv_start[:, None], 0.0, np.nan_to_num(rsv, nan=50.0))
+
+    # K и D начинаются с 50: K[start] = alpha * RSV[start] + (1 - alpha) * 50
+    alpha = 1.0 / smoothing
+    rows_index = np.arange(rows)
+    first_rsv = rsv[rows_index, np.minimum(rsv_start, n - 1)] if n else np.zeros(rows)
+    k = _smooth(rsv, alpha, rsv_start, alpha * first_rsv + (1 - alpha) * 50.0)
+    first_k = k[rows_index, np.minimum(rsv_start, n - 1)] if n else np.zeros(rows)
+    d = _smooth(np.nan_to_num(k), alpha, rsv_start, alpha * first_k + (1 - alpha) * 50.0)
+    return k, d, 3.0 * k - 2.0 * d
+
+def _typical_price(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    return (highs + lows + closes) / 3.0
+
+def _session_starts(timestamps: np.ndarray, session_ms: int, shape) -> np.ndarray:
+    """Индекс первой свечи сессии для каждой позиции; сессия — интервал времени длиной session_ms."""
+    sessions = np.broadcast_to(np.asarray(timestamps, dtype=np.int64) // session_ms, shape)
+    rows, n = shape
+    boundary = np.ones(shape, dtype=bool)
+    boundary[:, 1:] = sessions[:, 1:] != sessions[:, :-1]
+    starts = np.where(boundary, np.arange(n), 0)
+    return np.maximum.accumulate(starts, axis=1)
+
+def _vwap(typical: np.ndarray, volumes: np.ndarray, segment_start: np.ndarray) -> np.ndarray:
+    """VWAP от segment_start[t] до t включительно через разности накопленных сумм."""
+    row_index = np.arange(typical.shape[0])[:, None]
+    price_volume = _cumulative(typical * volumes)
+    volume = _cumulative(volumes)
+    numerator = price_volume[:, 1:] - price_volume[row_index, segment_start]
+    denominator = volume[:, 1:] - volume[row_index, segment_start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+def _obv(closes: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+    """On-Balance Volume: накопленный объём со знаком изменения цены закрытия, начиная с 0."""
+    signed = np.zeros(closes.shape)
+    signed[:, 1:] = np.sign(np.diff(closes, axis=1)) * volumes[:, 1:]
+    return np.cumsum(signed, axis=1)
+
+def _volume_profile(prices: np.ndarray, volumes: np.ndarray, bins: int):
+    """Распределение объёма по ценовым уровням для каждой строки.
+
+    Диапазон строки [min, max] делится на bins равных интервалов; номер интервала
+    вычисляется арифметически, объём суммируется одним np.bincount по всем строкам.
+    Возвращает (границы интервалов (rows, bins + 1), объём (rows, bins)).
+    """
+    rows = prices.shape[0]
+    # fmin/fmax пропускают NaN; строка без цен (новый листинг) даёт NaN без предупреждения
+    low = np.fmin.reduce(prices, axis=1) if prices.size else np.zeros(rows)
+    high = np.fmax.reduce(prices, axis=1) if prices.size else np.zeros(rows)
+    span = high - low
+    with np.errstate(invalid='ignore', divide='ignore'):
+        position = np.where(span[:, None] > 0, (prices - low[:, None]) / span[:, None], 0.0)
+    index = np.clip(np.nan_to_num(position) * bins, 0, bins - 1).astype(np.int64)
+    index += np.arange(rows)[:, None] * bins
+    weights = np.nan_to_num(volumes) * ~np.isnan(prices)
+    profile = np.bincount(index.ravel(), weights=weights.ravel(), minlength=rows * bins).reshape(rows, bins)
+    edges = low[:, None] + span[:, None] * np.linspace(0.0, 1.0, bins + 1)
+    return edges, profile
+
+def sma(values, period: int) -> np.ndarray:
+    """Простая скользящая средняя."""
+    return _sma(_as_matrix(values), period)[0]
+
+def ema(values, period: int) -> np.ndarray:
+    """Экспоненциальная скользящая средняя (первое значение — SMA за period)."""
+    return _ema(_as_matrix(values), period, np.zeros(1, dtype=np.int64))[0]
+
+def rolling_max(values, period: int) -> np.ndarray:
+    """Максимум за скользящее окно."""
+    return _rolling_extreme(_as_matrix(values), period, np.maximum, -np.inf)[0]
+
+def rolling_min(values, period: int) -> np.ndarray:
+    """Минимум за скользящее окно."""
+    return _rolling_extreme(_as_matrix(values), period, np.minimum, np.inf)[0]
+
+def rsi(closes, period: int = 14) -> np.ndarray:
+    """RSI со сглаживанием Уайлдера. Первые period значений — NaN."""
+    return _rsi(_as_matrix(closes), period, np.zeros(1, dtype=np.int64))[0]
+
+def macd(closes, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD: линия MACD, сигнальная линия и гистограмма."""
+    lines = _macd(_as_matrix(closes), fast, slow, signal, np.zeros(1, dtype=np.int64))
+    return tuple(line[0] for line in lines)
+
+def bollinger_bands(closes, period: int = 20, std_dev: float = 2):
+    """Полосы Боллинджера: средняя, верхняя и нижняя линии (стандартное отклонение по генеральной совокупности)."""
+    bands = _bollinger_bands(_as_matrix(closes), period, std_dev, np.zeros(1, dtype=np.int64))
+    return tuple(band[0] for band in bands)
+
+def kdj(highs, lows, closes, period: int = 9, smoothing: int = 3):
+    """Стохастический индикатор KDJ: линии K, D и J."""
+    lines = _kdj(_as_matrix(highs), _as_matrix(lows), _as_matrix(closes), period, smoothing,
+                 np.zeros(1, dtype=np.int64))
+    return tuple(line[0] for line in lines)
+
+def vwap(highs, lows, closes, volumes, timestamps, session_ms: int = 86_400_000) -> np.ndarray:
+    """VWAP по типичной цене с обнулением в начале каждой сессии (по умолчанию — сутки UTC)."""
+    typical = _typical_price(_as_matrix(highs), _as_matrix(lows), _as_matrix(closes))
+    starts = _session_starts(timestamps, session_ms, typical.shape)
+    return _vwap(typical, _as_matrix(volumes), starts)[0]
+
+def anchored_vwap(highs, lows, closes, volumes, anchor: int) -> np.ndarray:
+    """VWAP от свечи с индексом anchor; до неё — NaN."""
+    typical = _typical_price(_as_matrix(highs), _as_matrix(lows), _as_matrix(closes))
+    n = typical.shape[1]
+    anchor = anchor % n if n else 0
+    result = _vwap(typical, _as_matrix(volumes), np.full(typical.shape, anchor, dtype=np.int64))[0]
+    result[:anchor] = np.nan
+    return result
+
+def obv(closes, volumes) -> np.ndarray:
+    """On-Balance Volume."""
+    return _obv(_as_matrix(closes), _as_matrix(volumes))[0]
+
+def volume_profile(closes, volumes, bins: int = 24):
+    """Профиль объёма: границы ценовых интервалов (bins + 1) и объём в каждом интервале."""
+    edges, profile = _volume_profile(_as_matrix(closes), _as_matrix(volumes), bins)
+    return edges[0], profile[0]
+
+# Пакетные варианты для матриц (символы × время), например из services.ohlcv.align_ohlcv.
+# История разной длины задаётся NaN в начале строки; пропуски внутри строки при расчёте
+# заполняются предыдущим значением, а в результате остаются NaN.
+
+def _prepare_batch(*matrices):
+    """Заполнение пропусков в матрицах и начало истории каждой строки."""
+    arrays = [np.atleast_2d(np.asarray(matrix, dtype=np.float64)) for matrix in matrices]
+    missing = np.zeros(arrays[0].shape, dtype=bool)
+    for array in arrays:
+        missing |= np.isnan(array)
+    rows, n = missing.shape
+    present = ~missing
+    start = np.where(present.any(axis=1), present.argmax(axis=1), n)
+    if not missing.any():
+        return arrays, start, missing
+
+    before = np.arange(n) < start[:, None]
+    if np.array_equal(missing, before):
+        # Пропуски только в начале строк: заполняем первым известным значением
+        first = np.minimum(start, n - 1)[:, None]
+        row_index = np.arange(rows)[:, None]
+        filled = [np.where(before, np.nan_to_num(array[row_index, first]), array) for array in arrays]
+        return filled, start, missing
+
+    # Индекс последнего известного значения; до начала истории — первое известное значение
+    positions = np.where(present, np.arange(n), -1)
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    positions = np.where(positions < 0, np.minimum(start, n - 1)[:, None], positions)
+    row_index = np.arange(rows)[:, None]
+    filled = [np.nan_to_num(array[row_index, positions]) for array in arrays]
+    return filled, start, missing
+
+def _mask_batch(result, missing):
+    result[missing] = np.nan
+    return result
+
+def batch_sma(values, period: int) -> np.ndarray:
+    """Простая скользящая средняя по каждой строке матрицы."""
+    (filled,), start, missing = _prepare_batch(values)
+    result = _sma(filled, period)
+    result[np.arange(filled.shape[1]) < (start + period - 1)[:, None]] = np.nan
+    return _mask_batch(result, missing)
+
+def batch_ema(values, period: int) -> np.ndarray:
+    """Экспоненциальная скользящая средняя по каждой строке матрицы."""
+    (filled,), start, missing = _prepare_batch(values)
+    return _mask_batch(_ema(filled, period, start), missing)
+
+def batch_rsi(closes, period: int = 14) -> np.ndarray:
+    """RSI со сглаживанием Уайлдера по каждой строке матрицы."""
+    (filled,), start, missing = _prepare_batch(closes)
+    return _mask_batch(_rsi(filled, period, start), missing)
+
+def batch_macd(closes, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD по каждой строке матрицы: линия MACD, сигнальная линия и гистограмма."""
+    (filled,), start, missing = _prepare_batch(closes)
+    return tuple(_mask_batch(line, missing) for line in _macd(filled, fast, slow, signal, start))
+
+def batch_bollinger_bands(closes, period: int = 20, std_dev: float = 2):
+    """Полосы Боллинджера по каждой строке матрицы: средняя, верхняя и нижняя линии."""
+    (filled,), start, missing = _prepare_batch(closes)
+    return tuple(_mask_batch(band, missing) for band in _bollinger_bands(filled, period, std_dev, start))
+
+def batch_kdj(highs, lows, closes, period: int = 9, smoothing: int = 3):
+    """KDJ по каждой строке матриц: линии K, D и J."""
+    (highs, lows, filled), start, missing = _prepare_batch(highs, lows, closes)
+    return tuple(_mask_batch(line, missing) for line in _kdj(highs, lows, filled, period, smoothing, start))
+
+def _prepare_volume_batch(highs, lows, closes, volumes):
+    """Заполнение пропусков цен; объём отсутствующих свечей считается нулевым."""
+    (highs, lows, closes, volumes), start, missing = _prepare_batch(highs, lows, closes, volumes)
+    return highs, lows, closes, np.where(missing, 0.0, volumes), missing
+
+def batch_vwap(highs, lows, closes, volumes, timestamps, session_ms: int = 86_400_000) -> np.ndarray:
+    """Сессионный VWAP по каждой строке матриц; timestamps — общая шкала времени или матрица."""
+    highs, lows, closes, volumes, missing = _prepare_volume_batch(highs, lows, closes, volumes)
+    typical = _typical_price(highs, lows, closes)
+    return _mask_batch(_vwap(typical, volumes, _session_starts(timestamps, session_ms, typical.shape)), missing)
+
+def batch_obv(closes, volumes) -> np.ndarray:
+    """On-Balance Volume по каждой строке матрицы (отсчёт от первой свечи строки)."""
+    (closes, volumes), start, missing = _prepare_batch(closes, volumes)
+    return _mask_batch(_obv(closes, np.where(missing, 0.0, volumes)), missing)
+
+def batch_volume_profile(closes, volumes, bins: int = 24):
+    """Профиль объёма по каждой строке матриц: границы интервалов (rows, bins + 1) и объём (rows, bins)."""
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    return _volume_profile(closes, np.atleast_2d(np.asarray(volumes, dtype=np.float64)), bins)
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from services.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повторной загрузкой после ошибки; удваивается до интервала обновления
+RETRY_MIN_DELAY = 5
+
+class MarketSnapshot:
+    """Единый снимок метаданных рынков биржи.
+
+    Снимок загружается один раз, обновляется в фоне и сохраняется на диск,
+    поэтому после перезапуска бот может обслуживать запросы ещё до первого
+    ответа биржи. Запрос к бирже выполняется через call(priority, method, *args) —
+    тот же путь через выключатель и планировщик, что и у остальных запросов.
+    После ошибки загрузки повторные попытки откладываются с экспоненциальной паузой.
+    """
+
+    def __init__(self, exchange, path: str, refresh_interval: int,
+                 call: Optional[Callable[..., Awaitable[Any]]] = None):
+        self.exchange = exchange
+        self.call = call
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.markets: Optional[Dict[str, Any]] = None
+        self.updated_at = 0.0
+        self.version = 0  # Увеличивается при каждом обновлении снимка
+        self.last_load_ms: Optional[float] = None  # Длительность последней загрузки с биржи
+        self.failures = 0  # Ошибок загрузки подряд
+        self.retry_at = 0.0  # Раньше этого времени повторная загрузка не выполняется
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        """Снимок устарел и требует обновления."""
+        return time.time() - self.updated_at > self.refresh_interval
+
+    async def ensure_loaded(self) -> Optional[Dict[str, Any]]:
+        """Гарантирует наличие снимка: с диска, а при его отсутствии — с биржи.
+
+        После неудачной загрузки до истечения паузы возвращает None без запроса к бирже.
+        """
+        if self.markets is None and not self.load_from_disk() and time.time() >= self.retry_at:
+            async with self._lock:
+                # Снимок мог загрузить (или не загрузить) параллельный запрос
+                if self.markets is None and time.time() >= self.retry_at:
+                    await self._load_from_exchange(PRIORITY_INTERACTIVE)
+        return self.markets
+
+    def load_from_disk(self) -> bool:
+        """Загрузка сохранённого снимка с диска."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                payload = json.load(file)
+            self._apply(payload['markets'], payload['updated_at'])
+            logger.info(f"Снимок рынков загружен с диска: {len(self.markets)} рынков")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при чтении снимка рынков {self.path}: {e}")
+            return False
+
+    async def refresh(self, priority: int = PRIORITY_BACKGROUND) -> bool:
+        """Загрузка актуального снимка с биржи и сохранение его на диск."""
+        async with self._lock:
+            return await self._load_from_exchange(priority)
+
+    def start_background_refresh(self):
+        """Запуск фонового обновления снимка в текущем цикле событий."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop_background_refresh(self):
+        """Остановка фонового обновления."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def market(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Метаданные рынка по символу."""
+        if not self.markets:
+            return None
+        return self.markets.get(symbol)
+
+    def is_valid_symbol(self, symbol: str) -> bool:
+        """Проверка, что символ существует и торгуется."""
+        market = self.market(symbol)
+        return bool(market) and market.get('active') is not False
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние снимка рынков."""
+        return {
+            'markets': len(self.markets) if self.markets else 0,
+            'version': self.version,
+            'age_seconds': time.time() - self.updated_at if self.updated_at else None,
+            'last_load_ms': self.last_load_ms,
+            'failures': self.failures,
+        }
+
+    async def _refresh_loop(self):
+        """Периодическое обновление снимка."""
+        while True:
+            if self.is_stale and time.time() >= self.retry_at:
+                await self.refresh()
+            if self.failures:
+                delay = self.retry_at - time.time()
+            else:
+                delay = self.refresh_interval - (time.time() - self.updated_at)
+            await asyncio.sleep(max(delay, 1))
+
+    async def _load_from_exchange(self, priority: int) -> bool:
+        """Загрузка рынков с биржи. Вызывается под блокировкой."""
+        started = time.perf_counter()
+        try:
+            if self.call:
+                markets = await self.call(priority, self.exchange.load_markets, True)
+            else:
+                markets = await self.exchange.load_markets(True)
+        except Exception as e:
+            self.failures += 1
+            delay = min(RETRY_MIN_DELAY * 2 ** (self.failures - 1), self.refresh_interval)
+            self.retry_at = time.time() + delay
+            logger.error(f"Ошибка при загрузке рынков: {e or type(e).__name__}. "
+                         f"Повторная попытка через {delay:.0f} с")
+            return False
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+        self._apply(markets, time.time())
+        self._save_to_disk()
+        logger.info(f"Снимок рынков обновлён за {self.last_load_ms:.0f} мс: {len(markets)} рынков")
+        return True
+
+    def _apply(self, markets: Dict[str, Any], updated_at: float):
+        """Применение снимка к объекту биржи, чтобы ccxt не загружал рынки повторно."""
+        self.exchange.set_markets(markets)
+        self.markets = self.exchange.markets
+        self.updated_at = updated_at
+        self.version += 1
+
+    def _save_to_disk(self):
+        """Атомарное сохранение снимка на диск."""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'updated_at': self.updated_at, 'markets': self.markets}, file)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении снимка рынков {self.path}: {e}")
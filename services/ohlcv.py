@@ -0,0 +1,51 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Порядок столбцов свечи в ответе ccxt
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+def to_array(candles: List) -> np.ndarray:
+    """Преобразование списка свечей ccxt в массив float64 формы (n, 6)."""
+    if not candles:
+        return np.empty((0, 6), dtype=np.float64)
+    return np.asarray(candles, dtype=np.float64)
+
+def align_ohlcv(data: Dict[str, List]) -> Dict[str, np.ndarray]:
+    """Выравнивание свечей нескольких символов по общей шкале времени.
+
+    Возвращает отсортированный массив меток времени (объединение по всем
+    символам) и матрицы (символы × время) для каждого поля OHLCV; отсутствующие
+    свечи заполняются NaN.
+    """
+    symbols = list(data)
+    arrays = [to_array(data[symbol]) for symbol in symbols]
+    if arrays:
+        timestamps = np.unique(np.concatenate([array[:, 0] for array in arrays])).astype(np.int64)
+    else:
+        timestamps = np.empty(0, dtype=np.int64)
+
+    result = {'symbols': symbols, 'timestamps': timestamps}
+    matrices = {field: np.full((len(symbols), len(timestamps)), np.nan) for field in OHLCV_FIELDS}
+    for row, array in enumerate(arrays):
+        if not len(array):
+            continue
+        columns = np.searchsorted(timestamps, array[:, 0].astype(np.int64))
+        for offset, field in enumerate(OHLCV_FIELDS, start=1):
+            matrices[field][row, columns] = array[:, offset]
+    result.update(matrices)
+    return result
+
+def split_closed(candles: List, timeframe: str, now_ms: Optional[int] = None) -> Tuple[List, Optional[List]]:
+    """Разделение свечей на закрытые и текущую незакрытую (если она есть)."""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    step = timeframe_to_ms(timeframe)
+    if candles and candles[-1][0] + step > now_ms:
+        return candles[:-1], candles[-1]
+    return candles, None
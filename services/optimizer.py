@@ -0,0 +1,206 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import (BACKTEST_DAYS, BACKTEST_MAX_CANDLES, OPTIMIZER_MAX_RUNS, OPTIMIZER_MIN_PARALLEL_WORK,
+                           OPTIMIZER_WORKERS)
+from services.backtest import backtest
+from services.ohlcv import to_array
+from services.rate_limiter import PRIORITY_INTERACTIVE
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Сетка параметров по умолчанию: 3 x 4 x 4 x 4 = 192 прогона
+DEFAULT_SPACE = {
+    'rsi_period': [7, 14, 21],
+    'rsi_lower': [20, 25, 30, 35],
+    'rsi_upper': [65, 70, 75, 80],
+    'ma_period': [0, 50, 100, 200],
+}
+
+# Метрики прогона, передаваемые из процесса-исполнителя (без массивов и списка сделок)
+SUMMARY_FIELDS = ('total_return', 'buy_and_hold', 'max_drawdown', 'trades', 'win_rate', 'avg_trade',
+                  'profit_factor', 'exposure')
+
+# Минимальный объём пачки (свечей x прогонов), ~0.25 с счёта: более мелкие задачи не окупают передачу между процессами
+CHUNK_MIN_WORK = 1_000_000
+
+def parameter_grid(space: Dict[str, List]) -> List[Dict[str, Any]]:
+    """Все сочетания значений параметров."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_parameters(space: Dict[str, List], count: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Случайная выборка count различных сочетаний из сетки параметров."""
+    grid = parameter_grid(space)
+    if count >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, count)
+
+class SharedCandles:
+    """Массив свечей в разделяемой памяти для процессов перебора.
+
+    Процесс-исполнитель подключается к блоку по имени один раз при запуске,
+    поэтому свечи не сериализуются с каждой задачей.
+    """
+
+    def __init__(self, candles: np.ndarray):
+        candles = np.ascontiguousarray(candles, dtype=np.float64)
+        self._memory = shared_memory.SharedMemory(create=True, size=max(candles.nbytes, 1))
+        np.ndarray(candles.shape, dtype=candles.dtype, buffer=self._memory.buf)[:] = candles
+        self.spec = (self._memory.name, candles.shape, candles.dtype.str)
+
+    def close(self):
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Свечи, подключённые в процессе-исполнителе
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_candles: Optional[np.ndarray] = None
+
+def _attach(spec: Tuple[str, Tuple[int, ...], str]):
+    global _worker_memory, _worker_candles
+    name, shape, dtype = spec
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_candles = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_memory.buf)
+
+def _run_params(candles: np.ndarray, param_sets: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    results = []
+    for params in param_sets:
+        result = backtest(candles, params)
+        results.append((params, {field: result[field] for field in SUMMARY_FIELDS}))
+    return results
+
+def _run_chunk(param_sets: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    return _run_params(_worker_candles, param_sets)
+
+def _chunks(param_sets: List[Dict[str, Any]], workers: int, candle_count: int) -> List[List[Dict[str, Any]]]:
+    # Несколько пачек на процесс: накладные расходы на задачу меньше, а результаты приходят по ходу перебора;
+    # на коротких историях пачка укрупняется до CHUNK_MIN_WORK
+    size = max(1, -(-len(param_sets) // (workers * 4)), -(-CHUNK_MIN_WORK // max(candle_count, 1)))
+    return [param_sets[i:i + size] for i in range(0, len(param_sets), size)]
+
+def _executor(shared: SharedCandles, workers: int) -> ProcessPoolExecutor:
+    # forkserver: бот работает с потоками, а fork многопоточного процесса небезопасен
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_attach,
+                               initargs=(shared.spec,))
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    workers = workers if workers is not None else OPTIMIZER_WORKERS
+    return workers if workers > 0 else os.cpu_count() or 1
+
+def plan_workers(candle_count: int, runs: int, workers: Optional[int] = None,
+                 min_work: int = OPTIMIZER_MIN_PARALLEL_WORK) -> int:
+    """Число процессов для перебора; 1 — перебор в текущем процессе.
+
+    Пул запускается, только если объём перебора не меньше min_work, и не больше,
+    чем по одному процессу на пачку.
+    """
+    workers = resolve_workers(workers)
+    if workers < 2 or candle_count * runs < min_work:
+        return 1
+    return min(workers, len(_chunks([{}] * runs, workers, candle_count)))
+
+def sweep(candles: np.ndarray, param_sets: List[Dict[str, Any]], workers: Optional[int] = None,
+          min_work: int = OPTIMIZER_MIN_PARALLEL_WORK) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Перебор параметров; пары (параметры, метрики) выдаются по мере готовности.
+
+    Небольшой перебор (см. plan_workers) выполняется в текущем процессе.
+    """
+    workers = plan_workers(len(candles), len(param_sets), workers, min_work)
+    if workers == 1:
+        for chunk in _chunks(param_sets, 1, len(candles)):
+            yield from _run_params(candles, chunk)
+        return
+    with SharedCandles(candles) as shared, _executor(shared, workers) as pool:
+        futures = [pool.submit(_run_chunk, chunk) for chunk in _chunks(param_sets, workers, len(candles))]
+        for future in as_completed(futures):
+            yield from future.result()
+
+async def sweep_async(candles: np.ndarray, param_sets: List[Dict[str, Any]], workers: Optional[int] = None,
+                      min_work: int = OPTIMIZER_MIN_PARALLEL_WORK) -> AsyncIterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """То же, что sweep, без блокировки цикла событий.
+
+    Небольшой перебор считается пачками в отдельном потоке. Остановка пула (ожидание
+    завершения процессов) тоже выполняется в отдельном потоке; при досрочном выходе
+    невыполненные пачки отменяются.
+    """
+    workers = plan_workers(len(candles), len(param_sets), workers, min_work)
+    if workers == 1:
+        for chunk in _chunks(param_sets, 1, len(candles)):
+            for item in await asyncio.to_thread(_run_params, candles, chunk):
+                yield item
+        return
+    loop = asyncio.get_running_loop()
+    with SharedCandles(candles) as shared:
+        pool = _executor(shared, workers)
+        try:
+            futures = [loop.run_in_executor(pool, _run_chunk, chunk)
+                       for chunk in _chunks(param_sets, workers, len(candles))]
+            for future in asyncio.as_completed(futures):
+                for item in await future:
+                    yield item
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Разделяемая память освобождается только после завершения процессов
+            await loop.run_in_executor(None, pool.shutdown)
+
+def rank(results: List[Tuple[Dict[str, Any], Dict[str, Any]]], metric: str = 'total_return',
+         min_trades: int = 5) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Результаты по убыванию метрики; прогоны с малым числом сделок не учитываются."""
+    eligible = [item for item in results if item[1]['trades'] >= min_trades and item[1][metric] is not None]
+    return sorted(eligible, key=lambda item: item[1][metric], reverse=True)
+
+async def optimize(symbol: str, timeframe: str, space: Optional[Dict[str, List]] = None,
+                   runs: Optional[int] = None, metric: str = 'total_return', workers: Optional[int] = None,
+                   days: int = BACKTEST_DAYS, on_result=None,
+                   priority: int = PRIORITY_INTERACTIVE) -> Optional[List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """Перебор параметров стратегии по истории пары.
+
+    При runs меньше размера сетки выполняется случайная выборка. on_result
+    вызывается для каждого готового прогона. Возвращает результаты по убыванию метрики.
+    История догружается с приоритетом priority: перебор запускается пользователем из бота.
+    """
+    # Импорт здесь: модуль загружается процессами перебора параметров, клиент биржи им не нужен
+    from services.backfill import load_history
+
+    space = space or DEFAULT_SPACE
+    runs = min(runs or OPTIMIZER_MAX_RUNS, OPTIMIZER_MAX_RUNS)
+    param_sets = parameter_grid(space)
+    if len(param_sets) > runs:
+        param_sets = random_parameters(space, runs)
+
+    start = int(time.time() * 1000) - min(days * 86_400_000, BACKTEST_MAX_CANDLES * timeframe_to_ms(timeframe))
+    candles = await load_history(symbol, timeframe, start, priority=priority)
+    if len(candles) < 50:
+        logger.warning(f"Недостаточно истории для перебора параметров {symbol} {timeframe}: {len(candles)} свечей")
+        return None
+
+    started = time.perf_counter()
+    results = []
+    async for item in sweep_async(to_array(candles), param_sets, workers):
+        results.append(item)
+        if on_result:
+            on_result(item, len(results), len(param_sets))
+    logger.info(f"Перебор параметров {symbol} {timeframe}: {len(results)} прогонов по {len(candles)} свечам "
+                f"за {time.perf_counter() - started:.1f} с, "
+                f"процессов: {plan_workers(len(candles), len(param_sets), workers)}")
+    return rank(results, metric)
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета запросов к бирже (меньше — важнее)
+PRIORITY_INTERACTIVE = 0  # Запросы пользователей: графики, поиск
+PRIORITY_BACKGROUND = 1   # Фоновая работа: предзагрузка, скринер, сигналы, уведомления
+
+class RateLimiter:
+    """Планировщик запросов на основе token bucket с очередями по приоритетам.
+
+    Бюджет запросов задаётся в минуту. Пока есть ожидающие интерактивные
+    запросы, фоновые запросы токены не получают.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: Optional[int] = None,
+                 lanes: Tuple[int, ...] = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)):
+        self.rate = requests_per_minute / 60  # Токенов в секунду
+        self.capacity = burst or max(1, requests_per_minute // 10)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lanes = tuple(sorted(lanes))
+        self._queues: Dict[int, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in self._lanes}
+        self._stats = {lane: {'granted': 0, 'total_wait': 0.0, 'max_wait': 0.0} for lane in self._lanes}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        """Ожидание токена в очереди указанного приоритета."""
+        if priority not in self._queues:
+            raise ValueError(f"Неизвестный приоритет: {priority}")
+        self._refill()
+        if self._tokens >= 1 and not any(self._queues[lane] for lane in self._lanes if lane <= priority):
+            self._tokens -= 1
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        self._queues[priority].append(entry)
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                try:
+                    self._queues[priority].remove(entry)
+                except ValueError:
+                    pass
+            else:
+                self._tokens += 1  # Токен выдан, но запрос отменён — возвращаем его
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очередей и время ожидания по каждому приоритету."""
+        lanes = {}
+        for lane in self._lanes:
+            stats = self._stats[lane]
+            lanes[lane] = {
+                'queued': len(self._queues[lane]),
+                'granted': stats['granted'],
+                'avg_wait_ms': stats['total_wait'] / stats['granted'] * 1000 if stats['granted'] else 0.0,
+                'max_wait_ms': stats['max_wait'] * 1000,
+            }
+        return {'rate_per_minute': self.rate * 60, 'tokens': self._tokens, 'lanes': lanes}
+
+    def _refill(self):
+        """Пополнение токенов за прошедшее время."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self):
+        """Выдача доступных токенов ожидающим запросам в порядке приоритета."""
+        self._timer = None
+        self._refill()
+        for lane in self._lanes:
+            queue = self._queues[lane]
+            while queue and self._tokens >= 1:
+                future, enqueued_at = queue.popleft()
+                if future.done():
+                    continue
+                self._tokens -= 1
+                self._record(lane, time.monotonic() - enqueued_at)
+                future.set_result(None)
+        self._schedule()
+
+    def _schedule(self):
+        """Планирование следующей выдачи токенов, если есть ожидающие."""
+        if self._timer is not None or not any(self._queues.values()):
+            return
+        delay = max((1 - self._tokens) / self.rate, 0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _record(self, lane: int, wait: float):
+        """Учёт выданного токена в статистике."""
+        stats = self._stats[lane]
+        stats['granted'] += 1
+        stats['total_wait'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from config.config import CHART_RENDER_QUEUE, CHART_RENDER_TIMEOUT, CHART_RENDER_WORKERS
+from services import chart_render
+
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    chart_render.warm_up()
+
+def _ping() -> bool:
+    return True
+
+def _render_job(kind: str, payload: Dict[str, Any]) -> Tuple[bytes, float]:
+    started = time.perf_counter()
+    png = chart_render.render(kind, payload)
+    return png, time.perf_counter() - started
+
+class ChartRenderer:
+    """Отрисовка графиков в пуле процессов вне цикла событий бота.
+
+    Процессы запускаются заранее и прогреваются (шрифты, бэкенд matplotlib).
+    Одновременно в пул передаётся не больше задач, чем процессов; остальные ждут
+    в очереди длиной не более max_queue, сверх неё запросы сразу отклоняются.
+    Задача, не уложившаяся в timeout, завершается для вызывающего с None;
+    процесс дорисовывает её, но результат отбрасывается. Место в пуле
+    освобождается только после завершения задачи в процессе, поэтому задач
+    в работе никогда не больше, чем процессов.
+    При workers = 0 графики рисуются в отдельном потоке.
+    """
+
+    def __init__(self, workers: int = CHART_RENDER_WORKERS, max_queue: int = CHART_RENDER_QUEUE,
+                 timeout: float = CHART_RENDER_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(max(workers, 1))
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._render_total = 0.0
+        self._render_max = 0.0
+
+    def start(self):
+        """Запуск и прогрев процессов пула."""
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            # forkserver: бот работает с потоками, а fork многопоточного процесса небезопасен
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if context.get_start_method() == 'forkserver':
+                # matplotlib импортируется один раз в сервере процессов, а не в каждом процессе пула
+                context.set_forkserver_preload(['services.chart_render'])
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker)
+            # По задаче на процесс, чтобы все процессы запустились и прогрелись сразу
+            for _ in range(self.workers):
+                self._executor.submit(_ping)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-render',
+                                                initializer=_init_worker)
+        logger.info(f"Пул отрисовки графиков запущен, процессов: {self.workers}")
+
+    async def render(self, kind: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Optional[bytes]:
+        """PNG графика вида kind или None при переполнении очереди, превышении времени или ошибке."""
+        self.start()
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"Очередь отрисовки графиков заполнена ({self.pending}), запрос {kind} отклонён")
+            return None
+
+        self.pending += 1
+        self.submitted += 1
+        queued = time.perf_counter()
+        executor = None
+        try:
+            await self._slots.acquire()
+            wait = time.perf_counter() - queued
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            executor = self._executor
+            try:
+                job = executor.submit(_render_job, kind, payload)
+            except Exception:
+                self._slots.release()
+                raise
+            job.add_done_callback(self._release_slot(asyncio.get_running_loop()))
+            png, render_time = await asyncio.wait_for(asyncio.wrap_future(job), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Отрисовка графика {kind} не уложилась в {timeout or self.timeout} с")
+            return None
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart(executor)
+            return None
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ошибка при отрисовке графика {kind}: {e}")
+            return None
+        else:
+            self.completed += 1
+            self._render_total += render_time
+            self._render_max = max(self._render_max, render_time)
+            return png
+        finally:
+            self.pending -= 1
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop):
+        """Колбэк завершения задачи в пуле: место освобождается в цикле событий, когда процесс закончил работу."""
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._slots.release)
+            except RuntimeError:
+                pass  # Цикл событий уже закрыт
+        return release
+
+    def _restart(self, broken: Optional[Executor]):
+        """Перезапуск пула, в котором задача завершилась с BrokenProcessPool.
+
+        Когда пул падает, ошибку получают все задачи в нём; перезапускает его только
+        первая, остальные застают уже новый пул и его не трогают.
+        """
+        if broken is None or broken is not self._executor:
+            return
+        logger.error("Пул отрисовки графиков аварийно остановлен, перезапуск")
+        self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def close(self):
+        """Остановка пула."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info(f"Пул отрисовки графиков остановлен: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики очереди и отрисовки."""
+        started = self.completed + self.failed + self.timeouts
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'avg_queue_wait': self._wait_total / started if started else 0.0,
+            'max_queue_wait': self._wait_max,
+            'avg_render_time': self._render_total / self.completed if self.completed else 0.0,
+            'max_render_time': self._render_max,
+        }
+
+# Создание singleton-экземпляра
+chart_renderer = ChartRenderer()
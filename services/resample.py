@@ -0,0 +1,51 @@
+import logging
+
+import numpy as np
+
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# 01.01.1970 — четверг, а недельные свечи Bybit начинаются в понедельник
+_WEEK_OFFSET_MS = 4 * 24 * 60 * 60 * 1000
+
+def can_resample(source_timeframe: str, target_timeframe: str) -> bool:
+    """Можно ли построить target_timeframe из свечей source_timeframe."""
+    source_ms, target_ms = timeframe_to_ms(source_timeframe), timeframe_to_ms(target_timeframe)
+    return target_ms > source_ms and target_ms % source_ms == 0 and not target_timeframe.endswith(('M', 'y'))
+
+def bucket_starts(timestamps: np.ndarray, timeframe: str) -> np.ndarray:
+    """Начало интервала таймфрейма для каждой метки времени (в UTC, как у биржи)."""
+    step = timeframe_to_ms(timeframe)
+    offset = _WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+    return timestamps - (timestamps - offset) % step
+
+def resample_ohlcv(candles: np.ndarray, source_timeframe: str, target_timeframe: str,
+                   drop_partial_first: bool = True) -> np.ndarray:
+    """Построение свечей старшего таймфрейма из свечей младшего.
+
+    candles — массив (n, 6) [время, open, high, low, close, volume] в порядке
+    возрастания времени. Первая свеча результата отбрасывается, если исходные
+    данные начинаются не с её начала (иначе open/high/low были бы неверными).
+    """
+    if not can_resample(source_timeframe, target_timeframe):
+        raise ValueError(f"Нельзя построить {target_timeframe} из {source_timeframe}")
+    if len(candles) == 0:
+        return np.empty((0, 6), dtype=np.float64)
+
+    timestamps = candles[:, 0].astype(np.int64)
+    starts = bucket_starts(timestamps, target_timeframe)
+    boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last_rows = np.r_[boundaries[1:] - 1, len(candles) - 1]
+
+    result = np.empty((len(boundaries), 6), dtype=np.float64)
+    result[:, 0] = starts[boundaries]
+    result[:, 1] = candles[boundaries, 1]
+    result[:, 2] = np.maximum.reduceat(candles[:, 2], boundaries)
+    result[:, 3] = np.minimum.reduceat(candles[:, 3], boundaries)
+    result[:, 4] = candles[last_rows, 4]
+    result[:, 5] = np.add.reduceat(candles[:, 5], boundaries)
+
+    if drop_partial_first and timestamps[0] != starts[0]:
+        result = result[1:]
+    return result
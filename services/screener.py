@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.config import SCREENER_CANDLES, SCREENER_INTERVAL, SCREENER_MAX_SYMBOLS, SCREENER_TIMEFRAME
+from services.bybit_api import bybit_api
+from services.indicators import (batch_bollinger_bands, batch_obv, batch_rsi, batch_sma, batch_volume_profile,
+                                 batch_vwap)
+from services.rate_limiter import PRIORITY_BACKGROUND
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Условия скринера: ключ -> описание для пользователя
+SCREENS = {
+    'oversold': 'RSI ниже 30',
+    'overbought': 'RSI выше 70',
+    'squeeze': 'Сжатие полос Боллинджера',
+    'ma50_up': 'Пробой MA-50 вверх',
+    'ma50_down': 'Пробой MA-50 вниз',
+    'volume_spike': 'Всплеск объёма',
+    'vwap_up': 'Возврат выше VWAP',
+    'vwap_down': 'Уход ниже VWAP',
+    'poc': 'Цена у уровня наибольшего объёма',
+}
+
+# Сжатие: ширина полос не более чем на 5% выше минимума за последние SQUEEZE_LOOKBACK свечей
+SQUEEZE_LOOKBACK = 50
+SQUEEZE_TOLERANCE = 1.05
+
+# Всплеск: объём свечи не менее чем в VOLUME_SPIKE_RATIO раз выше среднего за VOLUME_LOOKBACK предыдущих свечей
+VOLUME_LOOKBACK = 20
+VOLUME_SPIKE_RATIO = 3.0
+
+# Пересечение VWAP на последней свече засчитывается, если OBV за свечу изменился в ту же сторону.
+# Уровень наибольшего объёма (POC) — середина самого наполненного из PROFILE_BINS ценовых интервалов
+# профиля объёма за все свечи; цена «у уровня», если отклоняется от него не более чем на POC_TOLERANCE
+PROFILE_BINS = 24
+POC_TOLERANCE = 0.005
+
+def evaluate_screens(batch: Dict[str, Any], timeframe: str,
+                     now_ms: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Расчёт условий скринера по выровненным свечам (см. BybitAPI.fetch_ohlcv_many).
+
+    Условия проверяются на последней закрытой свече каждого символа. Возвращает
+    для каждого условия отсортированный список {'symbol', 'price', 'value'}.
+    """
+    symbols, timestamps = batch['symbols'], batch['timestamps']
+    highs, lows, closes, volumes = batch['high'], batch['low'], batch['close'], batch['volume']
+    results: Dict[str, List[Dict[str, Any]]] = {screen: [] for screen in SCREENS}
+    if not symbols or closes.shape[1] < 2:
+        return results
+
+    # Незакрытую свечу не учитываем, чтобы результаты не менялись внутри свечи
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    step = timeframe_to_ms(timeframe)
+    if timestamps[-1] + step > now_ms:
+        timestamps, highs, lows = timestamps[:-1], highs[:, :-1], lows[:, :-1]
+        closes, volumes = closes[:, :-1], volumes[:, :-1]
+
+    rows = np.arange(len(symbols))
+    present = ~np.isnan(closes)
+    last = closes.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+    previous = np.maximum(last - 1, 0)
+    price = closes[rows, last]
+
+    rsi = batch_rsi(closes, 14)[rows, last]
+    middle, upper, lower = batch_bollinger_bands(closes, 20, 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bandwidth = (upper - lower) / middle
+    recent = bandwidth[:, -SQUEEZE_LOOKBACK:]
+    narrowest = np.where(np.isnan(recent), np.inf, recent).min(axis=1)
+    current_bandwidth = bandwidth[rows, last]
+    ma50 = batch_sma(closes, 50)
+    ma_last, ma_previous = ma50[rows, last], ma50[rows, previous]
+    price_previous = closes[rows, previous]
+    # Средний объём предыдущих свечей: скользящее среднее, сдвинутое на одну свечу
+    average_volume = batch_sma(np.where(np.isnan(closes), np.nan, np.nan_to_num(volumes)), VOLUME_LOOKBACK)
+    volume_ratio = volumes[rows, last] / average_volume[rows, previous]
+    # Внутри дня — VWAP дневной сессии, для дневных и старших таймфреймов — от начала окна
+    session_ms = 86_400_000 if step < 86_400_000 else int(timestamps[-1]) + 1
+    vwap = batch_vwap(highs, lows, closes, volumes, timestamps, session_ms)
+    vwap_last, vwap_previous = vwap[rows, last], vwap[rows, previous]
+    obv = batch_obv(closes, volumes)
+    obv_change = obv[rows, last] - obv[rows, previous]
+    edges, profile = batch_volume_profile(closes, volumes, PROFILE_BINS)
+    peak = profile.argmax(axis=1)
+    poc = (edges[rows, peak] + edges[rows, peak + 1]) / 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distance = (price / ma_last - 1) * 100
+        vwap_distance = (price / vwap_last - 1) * 100
+        poc_distance = (price / poc - 1) * 100
+        masks = {
+            'oversold': rsi < 30,
+            'overbought': rsi > 70,
+            'squeeze': current_bandwidth <= narrowest * SQUEEZE_TOLERANCE,
+            'ma50_up': (price_previous <= ma_previous) & (price > ma_last),
+            'ma50_down': (price_previous >= ma_previous) & (price < ma_last),
+            'volume_spike': volume_ratio >= VOLUME_SPIKE_RATIO,
+            'vwap_up': (price_previous <= vwap_previous) & (price > vwap_last) & (obv_change > 0),
+            'vwap_down': (price_previous >= vwap_previous) & (price < vwap_last) & (obv_change < 0),
+            'poc': np.abs(poc_distance) <= POC_TOLERANCE * 100,
+        }
+    values = {
+        'oversold': rsi,
+        'overbought': rsi,
+        'squeeze': current_bandwidth * 100,
+        'ma50_up': distance,
+        'ma50_down': distance,
+        'volume_spike': volume_ratio,
+        'vwap_up': vwap_distance,
+        'vwap_down': vwap_distance,
+        'poc': poc_distance,
+    }
+    # Ключ сортировки: сильнее выраженное условие — выше
+    rank_keys = {
+        'oversold': rsi,
+        'overbought': -rsi,
+        'squeeze': current_bandwidth,
+        'ma50_up': -distance,
+        'ma50_down': distance,
+        'volume_spike': -volume_ratio,
+        'vwap_up': -vwap_distance,
+        'vwap_down': vwap_distance,
+        'poc': np.abs(poc_distance),
+    }
+    for screen, mask in masks.items():
+        matched = np.flatnonzero(mask & ~np.isnan(values[screen]))
+        matched = matched[np.argsort(rank_keys[screen][matched], kind='stable')]
+        results[screen] = [{'symbol': symbols[i], 'price': float(price[i]), 'value': float(values[screen][i])}
+                           for i in matched]
+    return results
+
+class Screener:
+    """Периодический скринер всех USDT-пар с готовым ранжированным результатом.
+
+    Проход выполняется в фоне с низким приоритетом запросов; команда бота
+    отвечает из последнего результата без обращения к бирже.
+    """
+
+    def __init__(self, timeframe: str = SCREENER_TIMEFRAME, candles: int = SCREENER_CANDLES,
+                 interval: float = SCREENER_INTERVAL, max_symbols: int = SCREENER_MAX_SYMBOLS):
+        self.timeframe = timeframe
+        self.candles = candles
+        self.interval = interval
+        self.max_symbols = max_symbols
+        self.results: Dict[str, List[Dict[str, Any]]] = {}
+        self.updated_at = 0.0
+        self.scanned = 0
+        self.failed = 0
+        self.last_duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.updated_at > 0
+
+    def top(self, screen: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Первые limit пар, удовлетворяющих условию."""
+        return self.results.get(screen, [])[:limit]
+
+    async def scan(self) -> bool:
+        """Один проход по всем USDT-парам."""
+        started = time.perf_counter()
+        index = await bybit_api.get_symbol_index()
+        symbols = index.symbols_for_quote('USDT')
+        if self.max_symbols:
+            symbols = symbols[:self.max_symbols]
+        if not symbols:
+            logger.warning("Скринер: список USDT-пар пуст")
+            return False
+
+        batch = await bybit_api.fetch_ohlcv_many(symbols, self.timeframe, self.candles,
+                                                 priority=PRIORITY_BACKGROUND)
+        if not batch['symbols']:
+            logger.warning("Скринер: не удалось получить свечи ни для одной пары")
+            return False
+
+        self.results = evaluate_screens(batch, self.timeframe)
+        self.updated_at = time.time()
+        self.scanned = len(batch['symbols'])
+        self.failed = len(batch['errors'])
+        self.last_duration = time.perf_counter() - started
+        logger.info(f"Скринер: {self.scanned} пар за {self.last_duration:.1f} с, ошибок: {self.failed}, "
+                    + ", ".join(f"{screen}: {len(items)}" for screen, items in self.results.items()))
+        return True
+
+    def start_background(self):
+        """Запуск периодического сканирования в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop_background(self):
+        """Остановка периодического сканирования."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.scan()
+            except Exception as e:
+                logger.error(f"Ошибка при проходе скринера: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'updated_at': self.updated_at,
+            'scanned': self.scanned,
+            'failed': self.failed,
+            'last_duration': self.last_duration,
+            'matches': {screen: len(items) for screen, items in self.results.items()},
+        }
+
+# Создание singleton-экземпляра
+screener = Screener()
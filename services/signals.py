@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import (SIGNAL_CANDLES, SIGNAL_MAX_ATTEMPTS, SIGNAL_MAX_SYMBOLS, SIGNAL_REQUEST_BUDGET,
+                           SIGNAL_RULES, SIGNAL_SYMBOLS, SIGNAL_TIMEFRAMES, SIGNAL_WORKERS)
+from database.database import save_trading_signals
+from services.bybit_api import bybit_api
+from services.rate_limiter import PRIORITY_BACKGROUND
+from services.resample import bucket_starts
+from services.streaming_indicators import IndicatorSet, get_indicator_set, save_indicator_sets, update_indicators
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Правило получает значения индикаторов на последней закрытой свече каждого символа
+# (векторы длины «число символов») и возвращает маску срабатывания и уверенность 0-1.
+Rule = Callable[[Dict[str, np.ndarray]], Tuple[np.ndarray, np.ndarray]]
+
+def _rsi_oversold(ctx):
+    return ctx['rsi'] < 30, np.clip((30 - ctx['rsi']) / 30 + 0.5, 0, 1)
+
+def _rsi_overbought(ctx):
+    return ctx['rsi'] > 70, np.clip((ctx['rsi'] - 70) / 30 + 0.5, 0, 1)
+
+def _macd_cross_up(ctx):
+    return (ctx['macd_hist_prev'] <= 0) & (ctx['macd_hist'] > 0), np.full(len(ctx['close']), 0.6)
+
+def _macd_cross_down(ctx):
+    return (ctx['macd_hist_prev'] >= 0) & (ctx['macd_hist'] < 0), np.full(len(ctx['close']), 0.6)
+
+def _bollinger_lower(ctx):
+    width = ctx['bb_upper'] - ctx['bb_lower']
+    return ctx['close'] < ctx['bb_lower'], np.clip(0.5 + (ctx['bb_lower'] - ctx['close']) / width, 0, 1)
+
+def _bollinger_upper(ctx):
+    width = ctx['bb_upper'] - ctx['bb_lower']
+    return ctx['close'] > ctx['bb_upper'], np.clip(0.5 + (ctx['close'] - ctx['bb_upper']) / width, 0, 1)
+
+def _ma50_cross_up(ctx):
+    return (ctx['close_prev'] <= ctx['ma50_prev']) & (ctx['close'] > ctx['ma50']), np.full(len(ctx['close']), 0.55)
+
+def _ma50_cross_down(ctx):
+    return (ctx['close_prev'] >= ctx['ma50_prev']) & (ctx['close'] < ctx['ma50']), np.full(len(ctx['close']), 0.55)
+
+# Пересечение сессионного VWAP; уверенность выше, если OBV подтверждает направление
+def _vwap_cross_up(ctx):
+    confirmed = ctx['obv'] > ctx['obv_prev']
+    return (ctx['close_prev'] <= ctx['vwap_prev']) & (ctx['close'] > ctx['vwap']), np.where(confirmed, 0.6, 0.5)
+
+def _vwap_cross_down(ctx):
+    confirmed = ctx['obv'] < ctx['obv_prev']
+    return (ctx['close_prev'] >= ctx['vwap_prev']) & (ctx['close'] < ctx['vwap']), np.where(confirmed, 0.6, 0.5)
+
+# Имя правила -> (тип сигнала, правило)
+RULES: Dict[str, Tuple[str, Rule]] = {
+    'rsi_oversold': ('buy', _rsi_oversold),
+    'rsi_overbought': ('sell', _rsi_overbought),
+    'macd_cross_up': ('buy', _macd_cross_up),
+    'macd_cross_down': ('sell', _macd_cross_down),
+    'bollinger_lower': ('buy', _bollinger_lower),
+    'bollinger_upper': ('sell', _bollinger_upper),
+    'ma50_cross_up': ('buy', _ma50_cross_up),
+    'ma50_cross_down': ('sell', _ma50_cross_down),
+    'vwap_cross_up': ('buy', _vwap_cross_up),
+    'vwap_cross_down': ('sell', _vwap_cross_down),
+}
+
+def _component(value, index: Optional[int] = None) -> float:
+    """Значение индикатора (или элемент кортежа MACD/Боллинджера) как float, None -> NaN."""
+    if value is not None and index is not None:
+        value = value[index]
+    return np.nan if value is None else float(value)
+
+def streaming_context(indicator_sets: List[IndicatorSet]) -> Dict[str, np.ndarray]:
+    """Значения индикаторов на последней и предпоследней закрытой свече каждого символа."""
+    current = [indicator_set.values() for indicator_set in indicator_sets]
+    previous = [indicator_set.previous for indicator_set in indicator_sets]
+
+    def column(rows, name, index=None):
+        return np.array([_component(row.get(name), index) for row in rows], dtype=np.float64)
+
+    return {
+        'candle_timestamp': np.array([indicator_set.last_timestamp for indicator_set in indicator_sets],
+                                     dtype=np.int64),
+        'close': np.array([_component(indicator_set.close) for indicator_set in indicator_sets]),
+        'close_prev': np.array([_component(indicator_set.previous_close) for indicator_set in indicator_sets]),
+        'rsi': column(current, 'rsi'),
+        'macd_hist': column(current, 'macd', 2),
+        'macd_hist_prev': column(previous, 'macd', 2),
+        'bb_upper': column(current, 'bollinger', 1),
+        'bb_lower': column(current, 'bollinger', 2),
+        'ma50': column(current, 'ma50'),
+        'ma50_prev': column(previous, 'ma50'),
+        'vwap': column(current, 'vwap'),
+        'vwap_prev': column(previous, 'vwap'),
+        'obv': column(current, 'obv'),
+        'obv_prev': column(previous, 'obv'),
+    }
+
+def evaluate_rules(symbols: List[str], timeframe: str, ctx: Dict[str, np.ndarray],
+                   rules: Dict[str, Tuple[str, Rule]]) -> List[Tuple]:
+    """Строки для trading_signals: не более одного сигнала каждого типа на символ и свечу.
+
+    Если на свече сработало несколько правил одного типа, уверенность берётся
+    максимальной, а имена правил перечисляются в JSON индикаторов.
+    """
+    matched: Dict[Tuple[int, str], Tuple[float, List[str]]] = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name, (signal_type, rule) in rules.items():
+            mask, confidence = rule(ctx)
+            for i in np.flatnonzero(mask & ~np.isnan(confidence)):
+                best, names = matched.get((i, signal_type), (0.0, []))
+                matched[(i, signal_type)] = (max(best, float(confidence[i])), names + [name])
+
+    signals = []
+    for (i, signal_type), (confidence, names) in matched.items():
+        indicators = {
+            'rules': names,
+            'rsi': _rounded(ctx['rsi'][i]),
+            'macd_hist': _rounded(ctx['macd_hist'][i]),
+            'bb_upper': _rounded(ctx['bb_upper'][i]),
+            'bb_lower': _rounded(ctx['bb_lower'][i]),
+            'ma50': _rounded(ctx['ma50'][i]),
+            'vwap': _rounded(ctx['vwap'][i]),
+            'obv': _rounded(ctx['obv'][i]),
+        }
+        signals.append((symbols[i], timeframe, signal_type, float(ctx['close'][i]), round(confidence, 3),
+                        json.dumps(indicators), int(ctx['candle_timestamp'][i])))
+    return signals
+
+def _rounded(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 8)
+
+class SignalEngine:
+    """Фоновый расчёт торговых сигналов по списку пар и таймфреймов.
+
+    Проход запускается в начале каждой минуты; таймфрейм обрабатывается, только
+    если с прошлого прохода по нему закрылась новая свеча. Индикаторы каждой пары
+    хранятся в потоковом состоянии (services.streaming_indicators): за проход
+    загружаются только новые закрытые свечи с ограниченным числом параллельных
+    запросов, правила считаются векторно сразу по всем парам, сигналы и состояние
+    индикаторов сохраняются пакетными вставками.
+
+    За проход обновляется не больше budget пар (по запросу свечей на пару), чтобы
+    фоновая нагрузка не вытесняла запросы пользователей: при лимите 100 запросов
+    в минуту и бюджете 50 свеча 200 пар обрабатывается за 4 прохода (минуты).
+    Таймфрейм остаётся в работе, пока все пары не учли его последнюю закрытую
+    свечу; пара, которую не удалось обновить max_attempts раз, пропускается до
+    следующей свечи.
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None, timeframes: Optional[List[str]] = None,
+                 rules: Optional[List[str]] = None, candles: int = SIGNAL_CANDLES, workers: int = SIGNAL_WORKERS,
+                 budget: int = SIGNAL_REQUEST_BUDGET, max_attempts: int = SIGNAL_MAX_ATTEMPTS):
+        self.symbols = symbols if symbols is not None else SIGNAL_SYMBOLS
+        self.timeframes = timeframes if timeframes is not None else SIGNAL_TIMEFRAMES
+        enabled = rules if rules is not None else SIGNAL_RULES
+        unknown = [name for name in enabled if name not in RULES]
+        if unknown:
+            logger.warning(f"Неизвестные правила сигналов пропущены: {', '.join(unknown)}")
+        self.rules = {name: RULES[name] for name in (enabled or RULES) if name in RULES}
+        self.candles = candles
+        self.workers = workers
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self._last_candle: Dict[str, int] = {}
+        self._attempts: Dict[str, Tuple[int, Dict[str, int]]] = {}  # таймфрейм -> (свеча, пара -> попыток)
+        self._task: Optional[asyncio.Task] = None
+        self.last_pass: Dict[str, Any] = {}
+
+    async def watchlist(self) -> List[str]:
+        """Пары для расчёта: из настроек или первые SIGNAL_MAX_SYMBOLS USDT-пар."""
+        if self.symbols:
+            return self.symbols
+        index = await bybit_api.get_symbol_index()
+        return index.symbols_for_quote('USDT')[:SIGNAL_MAX_SYMBOLS]
+
+    async def run_pass(self, force: bool = False) -> Dict[str, Any]:
+        """Один проход по таймфреймам, у которых не все пары учли последнюю закрытую свечу."""
+        started = time.perf_counter()
+        now_ms = int(time.time() * 1000)
+        due = [tf for tf in self.timeframes if force or self._closed_candle(tf, now_ms) != self._last_candle.get(tf)]
+        report = {'timeframes': due, 'symbols': 0, 'signals': 0, 'inserted': 0, 'errors': 0, 'pending': 0}
+        if due:
+            symbols = await self.watchlist()
+            budget = self.budget
+            for timeframe in due:
+                closed = self._closed_candle(timeframe, now_ms)
+                pending = self._pending(symbols, timeframe, closed, force)
+                batch, deferred = pending[:budget], pending[budget:]
+                budget -= len(batch)
+                if batch:
+                    signals, failed = await self._evaluate_timeframe(batch, timeframe, now_ms)
+                    report['symbols'] += len(batch)
+                    report['signals'] += len(signals)
+                    report['errors'] += len(failed)
+                    report['inserted'] += save_trading_signals(signals)
+                    deferred += self._retry(timeframe, closed, failed)
+                report['pending'] += len(deferred)
+                if not deferred:
+                    self._last_candle[timeframe] = closed
+
+        report['duration'] = time.perf_counter() - started
+        self.last_pass = report
+        if due:
+            logger.info(f"Проход сигналов {', '.join(due)}: {report['symbols']} пар за {report['duration']:.1f} с, "
+                        f"сигналов: {report['signals']}, новых: {report['inserted']}, ошибок: {report['errors']}, "
+                        f"отложено: {report['pending']}")
+            if report['duration'] > 60:
+                logger.warning("Проход сигналов длится дольше одной минутной свечи")
+        return report
+
+    def _pending(self, symbols: List[str], timeframe: str, closed: int, force: bool) -> List[str]:
+        """Пары, в состоянии которых ещё нет свечи closed, кроме исчерпавших попытки на этой свече."""
+        if self._attempts.get(timeframe, (None,))[0] != closed:
+            self._attempts[timeframe] = (closed, {})
+        attempts = self._attempts[timeframe][1]
+        return [symbol for symbol in symbols
+                if (force or get_indicator_set(symbol, timeframe).last_timestamp != closed)
+                and attempts.get(symbol, 0) < self.max_attempts]
+
+    def _retry(self, timeframe: str, closed: int, failed: List[str]) -> List[str]:
+        """Учёт неудачной попытки; возвращает пары, которые повторятся в следующем проходе."""
+        attempts = self._attempts[timeframe][1]
+        retry = []
+        for symbol in failed:
+            attempts[symbol] = attempts.get(symbol, 0) + 1
+            if attempts[symbol] < self.max_attempts:
+                retry.append(symbol)
+            else:
+                logger.warning(f"Пара {symbol} {timeframe} пропущена до следующей свечи: "
+                               f"{self.max_attempts} неудачных попыток")
+        return retry
+
+    async def _evaluate_timeframe(self, symbols: List[str], timeframe: str,
+                                  now_ms: int) -> Tuple[List[Tuple], List[str]]:
+        """Сигналы по парам, обновлённым до последней закрытой свечи, и пары, которые обновить не удалось."""
+        semaphore = asyncio.Semaphore(self.workers)
+        closed = self._closed_candle(timeframe, now_ms)
+
+        async def advance(symbol: str) -> Optional[IndicatorSet]:
+            async with semaphore:
+                try:
+                    return await update_indicators(symbol, timeframe, PRIORITY_BACKGROUND, save=False,
+                                                   seed=self.candles)
+                except Exception as e:
+                    logger.error(f"Ошибка при обновлении индикаторов {symbol} {timeframe}: {e}")
+                    return None
+
+        results = await asyncio.gather(*(advance(symbol) for symbol in symbols))
+        # Пара, для которой биржа не отдала закрывшуюся свечу (ошибка или устаревшие данные), повторяется позже
+        ready = [indicator_set for indicator_set in results
+                 if indicator_set is not None and indicator_set.last_timestamp == closed]
+        failed = [symbol for symbol, indicator_set in zip(symbols, results)
+                  if indicator_set is None or indicator_set.last_timestamp != closed]
+        save_indicator_sets(ready)
+        if not ready:
+            return [], failed
+        ctx = streaming_context(ready)
+        return evaluate_rules([indicator_set.symbol for indicator_set in ready], timeframe, ctx, self.rules), failed
+
+    @staticmethod
+    def _closed_candle(timeframe: str, now_ms: int) -> int:
+        """Время открытия последней закрытой свечи таймфрейма."""
+        return int(bucket_starts(np.int64(now_ms), timeframe)) - timeframe_to_ms(timeframe)
+
+    def start_background(self):
+        """Запуск проходов по расписанию в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop_background(self):
+        """Остановка проходов по расписанию."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_pass()
+            except Exception as e:
+                logger.error(f"Ошибка при расчёте торговых сигналов: {e}")
+            # Следующий проход — в начале следующей минуты, с небольшим запасом на закрытие свечи
+            await asyncio.sleep(60 - time.time() % 60 + 2)
+
+# Создание singleton-экземпляра
+signal_engine = SignalEngine()
@@ -0,0 +1,478 @@
+"""Потоковые (инкрементальные) индикаторы.
+
+Состояние индикатора заполняется по истории закрытых свечей (seed), после
+чего каждая новая закрытая свеча применяется за O(1) (update). Незакрытую
+свечу можно учесть без изменения состояния (peek). Состояние сериализуется
+в словарь (to_dict/from_dict) и хранится в таблице indicator_state, поэтому
+переживает перезапуск бота. Результаты совпадают с services.indicators.
+
+Индикаторы с source = 'candle' получают всю свечу, остальные — цену закрытия.
+Используется движком сигналов (services.signals): за проход по паре
+запрашиваются только свечи, закрывшиеся после последней учтённой.
+"""
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from database.database import get_indicator_state, save_indicator_states
+from services.bybit_api import bybit_api
+from services.ohlcv import split_closed
+from services.rate_limiter import PRIORITY_BACKGROUND
+from services.timeframes import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+# Свечей истории для заполнения состояния с нуля
+SEED_CANDLES = 200
+
+class StreamingSMA:
+    """Простая скользящая средняя."""
+    kind = 'sma'
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        self.value = self._next(price)
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        return self._next(price)
+
+    def _next(self, price: float) -> Optional[float]:
+        if len(self.window) < self.period - 1:
+            return None
+        dropped = self.window[0] if len(self.window) == self.period else 0.0
+        return (self.total - dropped + price) / self.period
+
+    def params(self) -> Dict[str, Any]:
+        return {'period': self.period}
+
+    def state(self) -> Dict[str, Any]:
+        return {'window': list(self.window), 'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.window = deque(state['window'], maxlen=self.period)
+        self.total = math.fsum(self.window)
+        self.value = state['value']
+
+class StreamingEMA:
+    """Экспоненциальная скользящая средняя, первое значение — SMA за period."""
+    kind = 'ema'
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        self.value = self._next(price)
+        self.count += 1
+        if self.count <= self.period:
+            self.seed_total += price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        return self._next(price)
+
+    def _next(self, price: float) -> Optional[float]:
+        if self.count < self.period - 1:
+            return None
+        if self.count == self.period - 1:
+            return (self.seed_total + price) / self.period
+        return self.alpha * price + (1 - self.alpha) * self.value
+
+    def params(self) -> Dict[str, Any]:
+        return {'period': self.period}
+
+    def state(self) -> Dict[str, Any]:
+        return {'count': self.count, 'seed_total': self.seed_total, 'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.count = state['count']
+        self.seed_total = state['seed_total']
+        self.value = state['value']
+
+class StreamingRSI:
+    """RSI со сглаживанием Уайлдера."""
+    kind = 'rsi'
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.previous is not None:
+            self.avg_gain, self.avg_loss, self.value = self._next(price)
+            self.count += 1
+        self.previous = price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        if self.previous is None:
+            return None
+        return self._next(price)[2]
+
+    def _next(self, price: float) -> Tuple[float, float, Optional[float]]:
+        change = price - self.previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.count < self.period - 1:
+            # Пока копим сумму изменений для первого простого среднего
+            return self.avg_gain + gain, self.avg_loss + loss, None
+        if self.count == self.period - 1:
+            avg_gain, avg_loss = (self.avg_gain + gain) / self.period, (self.avg_loss + loss) / self.period
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        total = avg_gain + avg_loss
+        return avg_gain, avg_loss, 100.0 * avg_gain / total if total > 0 else 50.0
+
+    def params(self) -> Dict[str, Any]:
+        return {'period': self.period}
+
+    def state(self) -> Dict[str, Any]:
+        return {'previous': self.previous, 'count': self.count, 'avg_gain': self.avg_gain,
+                'avg_loss': self.avg_loss, 'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        for name in ('previous', 'count', 'avg_gain', 'avg_loss', 'value'):
+            setattr(self, name, state[name])
+
+class StreamingMACD:
+    """MACD: значение — кортеж (линия MACD, сигнальная линия, гистограмма)."""
+    kind = 'macd'
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.value: Optional[Tuple] = None
+
+    def update(self, price: float) -> Optional[Tuple]:
+        fast, slow = self.fast.update(price), self.slow.update(price)
+        self.value = self._combine(fast, slow, self.signal.update)
+        return self.value
+
+    def peek(self, price: float) -> Optional[Tuple]:
+        return self._combine(self.fast.peek(price), self.slow.peek(price), self.signal.peek)
+
+    @staticmethod
+    def _combine(fast, slow, apply_signal) -> Optional[Tuple]:
+        if slow is None:
+            return None
+        line = fast - slow
+        signal = apply_signal(line)
+        return line, signal, line - signal if signal is not None else None
+
+    def params(self) -> Dict[str, Any]:
+        return {'fast': self.fast.period, 'slow': self.slow.period, 'signal': self.signal.period}
+
+    def state(self) -> Dict[str, Any]:
+        return {'fast': self.fast.state(), 'slow': self.slow.state(), 'signal': self.signal.state(),
+                'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.fast.load_state(state['fast'])
+        self.slow.load_state(state['slow'])
+        self.signal.load_state(state['signal'])
+        self.value = tuple(state['value']) if state['value'] is not None else None
+
+class StreamingBollinger:
+    """Полосы Боллинджера: значение — кортеж (средняя, верхняя, нижняя)."""
+    kind = 'bollinger'
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque(maxlen=period)
+        self.value: Optional[Tuple] = None
+        self._reset_sums()
+
+    def _reset_sums(self):
+        # Суммы считаются от опорной цены, чтобы не терять точность в E[x²] - E[x]²
+        self.reference = self.window[0] if self.window else 0.0
+        self.total = math.fsum(p - self.reference for p in self.window)
+        self.total_sq = math.fsum((p - self.reference) ** 2 for p in self.window)
+
+    def update(self, price: float) -> Optional[Tuple]:
+        if not self.window:
+            self.reference = price
+        self.value = self._next(price)
+        if len(self.window) == self.period:
+            dropped = self.window[0] - self.reference
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        self.window.append(price)
+        shifted = price - self.reference
+        self.total += shifted
+        self.total_sq += shifted * shifted
+        return self.value
+
+    def peek(self, price: float) -> Optional[Tuple]:
+        return self._next(price)
+
+    def _next(self, price: float) -> Optional[Tuple]:
+        if len(self.window) < self.period - 1:
+            return None
+        total, total_sq = self.total, self.total_sq
+        if len(self.window) == self.period:
+            dropped = self.window[0] - self.reference
+            total, total_sq = total - dropped, total_sq - dropped * dropped
+        shifted = price - self.reference
+        mean = (total + shifted) / self.period
+        variance = max((total_sq + shifted * shifted) / self.period - mean * mean, 0.0)
+        middle = mean + self.reference
+        width = self.std_dev * math.sqrt(variance)
+        return middle, middle + width, middle - width
+
+    def params(self) -> Dict[str, Any]:
+        return {'period': self.period, 'std_dev': self.std_dev}
+
+    def state(self) -> Dict[str, Any]:
+        return {'window': list(self.window), 'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.window = deque(state['window'], maxlen=self.period)
+        self.value = tuple(state['value']) if state['value'] is not None else None
+        self._reset_sums()
+
+class StreamingOBV:
+    """On-Balance Volume от первой учтённой свечи."""
+    kind = 'obv'
+    source = 'candle'
+
+    def __init__(self):
+        self.close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, candle: List) -> Optional[float]:
+        self.value = self._next(candle)
+        self.close = float(candle[4])
+        return self.value
+
+    def peek(self, candle: List) -> Optional[float]:
+        return self._next(candle)
+
+    def _next(self, candle: List) -> float:
+        if self.close is None:
+            return 0.0
+        close, volume = float(candle[4]), float(candle[5] or 0.0)
+        direction = (close > self.close) - (close < self.close)
+        return self.value + direction * volume
+
+    def params(self) -> Dict[str, Any]:
+        return {}
+
+    def state(self) -> Dict[str, Any]:
+        return {'close': self.close, 'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.close = state['close']
+        self.value = state['value']
+
+class StreamingVWAP:
+    """VWAP внутри сессии длиной session_ms (по умолчанию — сутки UTC)."""
+    kind = 'vwap'
+    source = 'candle'
+
+    def __init__(self, session_ms: int = 86_400_000):
+        self.session_ms = session_ms
+        self.session: Optional[int] = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, candle: List) -> Optional[float]:
+        self.session, self.price_volume, self.volume, self.value = self._next(candle)
+        return self.value
+
+    def peek(self, candle: List) -> Optional[float]:
+        return self._next(candle)[3]
+
+    def _next(self, candle: List) -> Tuple[int, float, float, Optional[float]]:
+        session = int(candle[0]) // self.session_ms
+        price_volume, volume = (self.price_volume, self.volume) if session == self.session else (0.0, 0.0)
+        candle_volume = float(candle[5] or 0.0)
+        typical = (float(candle[2]) + float(candle[3]) + float(candle[4])) / 3.0
+        price_volume += typical * candle_volume
+        volume += candle_volume
+        return session, price_volume, volume, price_volume / volume if volume > 0 else None
+
+    def params(self) -> Dict[str, Any]:
+        return {'session_ms': self.session_ms}
+
+    def state(self) -> Dict[str, Any]:
+        return {'session': self.session, 'price_volume': self.price_volume, 'volume': self.volume,
+                'value': self.value}
+
+    def load_state(self, state: Dict[str, Any]):
+        for name in ('session', 'price_volume', 'volume', 'value'):
+            setattr(self, name, state[name])
+
+_INDICATOR_TYPES = {cls.kind: cls for cls in (StreamingSMA, StreamingEMA, StreamingRSI, StreamingMACD,
+                                              StreamingBollinger, StreamingOBV, StreamingVWAP)}
+
+def default_indicators() -> Dict[str, Any]:
+    """Набор индикаторов графика и сигналов: RSI, MACD, полосы Боллинджера, MA-20, MA-50, OBV и VWAP."""
+    return {
+        'rsi': StreamingRSI(14),
+        'macd': StreamingMACD(12, 26, 9),
+        'bollinger': StreamingBollinger(20, 2),
+        'ma20': StreamingSMA(20),
+        'ma50': StreamingSMA(50),
+        'obv': StreamingOBV(),
+        'vwap': StreamingVWAP(),
+    }
+
+def _input(indicator, candle: List):
+    """Свеча для индикаторов с source = 'candle', иначе цена закрытия."""
+    return candle if getattr(indicator, 'source', 'close') == 'candle' else float(candle[4])
+
+class IndicatorSet:
+    """Набор потоковых индикаторов для одной пары и таймфрейма."""
+
+    def __init__(self, symbol: str, timeframe: str, indicators: Optional[Dict[str, Any]] = None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.indicators = indicators if indicators is not None else default_indicators()
+        self.last_timestamp: Optional[int] = None
+        self.close: Optional[float] = None
+        self.previous_close: Optional[float] = None
+        self.previous: Dict[str, Any] = {}  # Значения на предпоследней закрытой свече
+        self.forming: Optional[List] = None  # Незакрытая свеча последнего запроса, не сохраняется
+
+    def seed(self, candles: List) -> Dict[str, Any]:
+        """Заполнение состояния с нуля по истории закрытых свечей."""
+        self.indicators = {name: type(indicator)(**indicator.params())
+                           for name, indicator in self.indicators.items()}
+        self.last_timestamp = None
+        self.close = self.previous_close = None
+        self.previous = {}
+        for candle in candles:
+            self.update(candle)
+        return self.values()
+
+    def update(self, candle: List) -> Optional[Dict[str, Any]]:
+        """Применение закрытой свечи. Уже учтённые свечи пропускаются (возвращается None)."""
+        if self.last_timestamp is not None and candle[0] <= self.last_timestamp:
+            return None
+        self.previous = self.values()
+        for indicator in self.indicators.values():
+            indicator.update(_input(indicator, candle))
+        self.previous_close, self.close = self.close, float(candle[4])
+        self.last_timestamp = int(candle[0])
+        return self.values()
+
+    def peek(self, candle: List) -> Dict[str, Any]:
+        """Значения с учётом незакрытой свечи без изменения состояния."""
+        return {name: indicator.peek(_input(indicator, candle)) for name, indicator in self.indicators.items()}
+
+    def values(self) -> Dict[str, Any]:
+        """Значения индикаторов на последней закрытой свече."""
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'last_timestamp': self.last_timestamp,
+            'close': self.close,
+            'previous_close': self.previous_close,
+            'previous': self.previous,
+            'indicators': {name: {'kind': indicator.kind, 'params': indicator.params(),
+                                  'state': indicator.state()}
+                           for name, indicator in self.indicators.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IndicatorSet':
+        indicators = {}
+        for name, item in data['indicators'].items():
+            indicator = _INDICATOR_TYPES[item['kind']](**item['params'])
+            indicator.load_state(item['state'])
+            indicators[name] = indicator
+        indicator_set = cls(data['symbol'], data['timeframe'], indicators)
+        indicator_set.last_timestamp = data['last_timestamp']
+        indicator_set.close = data['close']
+        indicator_set.previous_close = data['previous_close']
+        indicator_set.previous = {name: tuple(value) if isinstance(value, list) else value
+                                  for name, value in data['previous'].items()}
+        return indicator_set
+
+_indicator_sets: Dict[Tuple[str, str], IndicatorSet] = {}
+
+def get_indicator_set(symbol: str, timeframe: str) -> IndicatorSet:
+    """Набор индикаторов из памяти, из сохранённого состояния или новый."""
+    key = (symbol, timeframe)
+    if key not in _indicator_sets:
+        indicator_set = None
+        stored = get_indicator_state(symbol, timeframe)
+        if stored:
+            try:
+                indicator_set = IndicatorSet.from_dict(json.loads(stored))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Сохранённое состояние индикаторов {symbol} {timeframe} повреждено: {e}")
+            # Состояние прежнего набора индикаторов заполняется заново
+            if indicator_set and set(indicator_set.indicators) != set(default_indicators()):
+                indicator_set = None
+        _indicator_sets[key] = indicator_set or IndicatorSet(symbol, timeframe)
+    return _indicator_sets[key]
+
+def save_indicator_sets(indicator_sets: List[IndicatorSet]):
+    """Сохранение состояния нескольких наборов одной транзакцией."""
+    save_indicator_states([(indicator_set.symbol, indicator_set.timeframe, json.dumps(indicator_set.to_dict()))
+                           for indicator_set in indicator_sets])
+
+async def update_indicators(symbol: str, timeframe: str, priority: int = PRIORITY_BACKGROUND,
+                            save: bool = True, seed: int = SEED_CANDLES) -> Optional[IndicatorSet]:
+    """Продвижение индикаторов пары до последней закрытой свечи.
+
+    Запрашиваются только свечи после последней учтённой; если состояния нет
+    или история прервалась, состояние заполняется заново по seed свечам.
+    Незакрытая свеча сохраняется в indicator_set.forming (значения с её учётом —
+    indicator_set.peek(indicator_set.forming)). Без save состояние сохраняет вызывающий.
+    """
+    indicator_set = get_indicator_set(symbol, timeframe)
+    step = timeframe_to_ms(timeframe)
+    now_ms = int(time.time() * 1000)
+    limit = seed
+    if indicator_set.last_timestamp is not None:
+        limit = min(max((now_ms - indicator_set.last_timestamp) // step + 1, 2), seed)
+
+    candles = await bybit_api.fetch_ohlcv(symbol, timeframe, limit=limit, priority=priority)
+    if not candles:
+        return None
+    closed, forming = split_closed(candles, timeframe, now_ms)
+
+    last = indicator_set.last_timestamp
+    if last is None or (closed and closed[0][0] > last + step):
+        if limit < seed:
+            candles = await bybit_api.fetch_ohlcv(symbol, timeframe, limit=seed, priority=priority)
+            if not candles:
+                return None
+            closed, forming = split_closed(candles, timeframe, now_ms)
+        indicator_set.seed(closed)
+    else:
+        for candle in closed:
+            indicator_set.update(candle)
+
+    indicator_set.forming = forming
+    if save:
+        save_indicator_sets([indicator_set])
+    return indicator_set
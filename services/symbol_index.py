@@ -0,0 +1,137 @@
+import bisect
+import difflib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Порядок предпочтения котируемых валют в результатах поиска
+QUOTE_PRIORITY = ["USDT", "USDC", "BTC", "ETH", "EUR"]
+
+# Распространённые альтернативные названия монет
+ALIASES = {
+    "BITCOIN": "BTC", "XBT": "BTC", "БИТКОИН": "BTC", "БИТОК": "BTC",
+    "ETHEREUM": "ETH", "ETHER": "ETH", "ЭФИР": "ETH", "ЭФИРИУМ": "ETH",
+    "SOLANA": "SOL", "СОЛАНА": "SOL",
+    "RIPPLE": "XRP", "РИПЛ": "XRP",
+    "CARDANO": "ADA", "КАРДАНО": "ADA",
+    "DOGECOIN": "DOGE", "ДОГИ": "DOGE",
+    "LITECOIN": "LTC", "ЛАЙТКОИН": "LTC",
+    "POLKADOT": "DOT", "CHAINLINK": "LINK", "TRON": "TRX",
+    "AVALANCHE": "AVAX", "TONCOIN": "TON", "POLYGON": "POL",
+    "BINANCE": "BNB", "SHIBA": "SHIB", "TETHER": "USDT",
+}
+
+# Порог похожести написания для нечёткого поиска (difflib.SequenceMatcher.ratio)
+FUZZY_CUTOFF = 0.6
+# Сколько результатов нечёткого поиска хранится в индексе
+FUZZY_CACHE_SIZE = 1024
+
+def _quote_rank(quote: str) -> int:
+    """Позиция котируемой валюты в порядке предпочтения."""
+    return QUOTE_PRIORITY.index(quote) if quote in QUOTE_PRIORITY else len(QUOTE_PRIORITY)
+
+class SymbolIndex:
+    """Индекс спотовых пар для мгновенного поиска и проверки без запросов к бирже."""
+
+    def __init__(self, markets: Optional[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self._symbols = set()
+        self._by_base: Dict[str, List[str]] = {}
+        self._by_quote: Dict[str, List[str]] = {}
+        for symbol, market in (markets or {}).items():
+            if not market.get('spot') or market.get('active') is False:
+                continue
+            base, quote = market.get('base'), market.get('quote')
+            if not base or not quote:
+                continue
+            self._symbols.add(symbol)
+            self._by_base.setdefault(base, []).append(symbol)
+            self._by_quote.setdefault(quote, []).append(symbol)
+        for symbols in self._by_base.values():
+            symbols.sort(key=lambda symbol: (_quote_rank(symbol.split('/')[1]), symbol))
+        self._bases = sorted(self._by_base)
+        # Кандидаты нечёткого поиска: базовые валюты по символу в первой и во второй позиции
+        self._by_position: List[Dict[str, Set[str]]] = [{}, {}]
+        for base in self._bases:
+            for position, char in enumerate(base[:2]):
+                self._by_position[position].setdefault(char, set()).add(base)
+        self._fuzzy: 'OrderedDict[Tuple[str, int], List[str]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def contains(self, symbol: str) -> bool:
+        """Проверка, что пара есть в индексе."""
+        return symbol in self._symbols
+
+    def symbols_for_quote(self, quote: str = "USDT") -> List[str]:
+        """Все пары с указанной валютой котировки."""
+        return sorted(self._by_quote.get(quote, []))
+
+    def resolve(self, query: str, quote: str = "USDT") -> Optional[str]:
+        """Точное сопоставление ввода пользователя с парой (например, 'btc' → 'BTC/USDT')."""
+        query = self._normalize(query)
+        if query in self._symbols:
+            return query
+        symbol = f"{ALIASES.get(query, query)}/{quote}"
+        return symbol if symbol in self._symbols else None
+
+    def search(self, query: str, limit: int = 6) -> List[str]:
+        """Поиск пар по базовой валюте, префиксу, алиасу или похожему написанию."""
+        query = self._normalize(query)
+        if not query:
+            return []
+        if '/' in query:
+            base, _, quote = query.partition('/')
+            if query in self._symbols:
+                return [query]
+            if quote:
+                return [symbol for symbol in self._by_quote.get(quote, []) if symbol.startswith(f"{base}/")][:limit]
+            query = base
+        query = ALIASES.get(query, query)
+
+        results = list(self._by_base.get(query, []))
+        # Базовые валюты с тем же префиксом: двоичный поиск по отсортированному списку
+        start = bisect.bisect_left(self._bases, query)
+        prefixed = []
+        for base in self._bases[start:]:
+            if not base.startswith(query):
+                break
+            if base != query:
+                prefixed.append(base)
+        prefixed.sort(key=lambda base: (len(base), base))
+        results.extend(self._by_base[base][0] for base in prefixed)
+
+        if not results:
+            results = [self._by_base[base][0] for base in self._close_bases(query, limit)]
+        return results[:limit]
+
+    def _close_bases(self, query: str, limit: int) -> List[str]:
+        """Базовые валюты с похожим написанием (опечатки), с кэшем результатов.
+
+        Сравниваются только валюты, совпадающие с запросом в первом или втором символе
+        (опечатка редко затрагивает оба) и подходящие по длине: при длинах a и b
+        ratio не больше 2 * min(a, b) / (a + b), поэтому остальные порог не пройдут.
+        """
+        cached = self._fuzzy.get((query, limit))
+        if cached is not None:
+            self._fuzzy.move_to_end((query, limit))
+            return cached
+        candidates = set()
+        for position, char in enumerate(query[:2]):
+            candidates |= self._by_position[position].get(char, set())
+        length = len(query)
+        candidates = sorted(base for base in candidates
+                            if 2 * min(length, len(base)) >= FUZZY_CUTOFF * (length + len(base)))
+        matches = difflib.get_close_matches(query, candidates, n=limit, cutoff=FUZZY_CUTOFF)
+        self._fuzzy[(query, limit)] = matches
+        if len(self._fuzzy) > FUZZY_CACHE_SIZE:
+            self._fuzzy.popitem(last=False)
+        return matches
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Приведение ввода к виду 'BTC' или 'BTC/USDT'."""
+        return query.strip().upper().replace(' ', '').replace('-', '/')
@@ -0,0 +1,24 @@
+# Вспомогательные функции для работы с таймфреймами
+from typing import Dict
+
+# Длительность единиц таймфрейма в секундах
+_UNIT_SECONDS: Dict[str, int] = {
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+    'd': 24 * 60 * 60,
+    'w': 7 * 24 * 60 * 60,
+    'M': 30 * 24 * 60 * 60,
+    'y': 365 * 24 * 60 * 60,
+}
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """Перевод таймфрейма вида '1m', '4h', '1d' в секунды."""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in _UNIT_SECONDS or not amount.isdigit():
+        raise ValueError(f"Неизвестный таймфрейм: {timeframe}")
+    return int(amount) * _UNIT_SECONDS[unit]
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Перевод таймфрейма в миллисекунды."""
+    return timeframe_to_seconds(timeframe) * 1000